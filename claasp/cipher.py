@@ -25,11 +25,8 @@ from copy import deepcopy
 import claasp
 from claasp import editor
 from claasp.rounds import Rounds
-from claasp.cipher_modules import tester, evaluator
-from claasp.utils.templates import TemplateManager, CSVBuilder
-from claasp.cipher_modules.models.algebraic.algebraic_model import AlgebraicModel
-from claasp.cipher_modules import continuous_tests, neural_network_tests, code_generator, \
-    component_analysis_tests, avalanche_tests, algebraic_tests
+from claasp.cipher_modules import tester, evaluator, cipher_cache
+from claasp.cipher_modules import code_generator
 from claasp.name_mappings import CIPHER_OUTPUT, CONSTANT, INTERMEDIATE_OUTPUT, MIX_COLUMN, SBOX, WORD_OPERATION
 
 tii_path = inspect.getfile(claasp)
@@ -145,10 +142,31 @@ class Cipher:
         self._reference_code = cipher_reference_code
         self._id = self.make_cipher_id()
         self._file_name = self.make_file_name()
+        self._compiled_evaluators = {}
+        self._structural_fingerprint = None
+        self._rounds_fingerprints = {}
+        self._is_sorted = False
+        self._shared_component_ids = set()
+
+    def __getstate__(self):
+        # compiled evaluators live in modules built at runtime and cannot be pickled
+        state = self.__dict__.copy()
+        state['_compiled_evaluators'] = {}
+        # an unpickled cipher shares its components with no other cipher
+        state['_shared_component_ids'] = set()
+
+        return state
 
     def _are_there_not_forbidden_components(self, forbidden_types, forbidden_descriptions):
         return self._rounds.are_there_not_forbidden_components(forbidden_types, forbidden_descriptions)
 
+    def _get_rounds_fingerprints(self, round_number):
+        if round_number not in self._rounds_fingerprints:
+            cipher_round = self._rounds.round_at(round_number)
+            self._rounds_fingerprints[round_number] = editor.make_round_fingerprints(cipher_round)
+
+        return self._rounds_fingerprints[round_number]
+
     def add_AND_component(self, input_id_links, input_bit_positions, output_bit_size):
         return editor.add_AND_component(self, input_id_links, input_bit_positions, output_bit_size)
 
@@ -265,6 +283,7 @@ class Cipher:
             ....: 'max_degree_of_equations': [1, 1], 'test_passed': [False, False]}}  # long time
             True
         """
+        from claasp.cipher_modules import algebraic_tests
         return algebraic_tests.algebraic_tests(self, timeout)
 
     def analyze_cipher(self, tests_configuration):
@@ -277,7 +296,8 @@ class Cipher:
 
         INPUT:
 
-        - ``tests_configuration`` -- **python dictionary**
+        - ``tests_configuration`` -- **python dictionary**; the entry ``"diffusion_tests"`` takes the keyword arguments
+          of :py:meth:`diffusion_tests` (e.g. ``"processes"`` or ``"seed"``) and ``"run_tests"``
 
         EXAMPLES::
 
@@ -293,6 +313,7 @@ class Cipher:
             sage: analysis["diffusion_tests"]["test_results"]["key"]["round_output"][ # random
             ....: "avalanche_dependence_vectors"]["differences"][31]["output_vectors"][0]["vector"] # random
         """
+        from claasp.cipher_modules import algebraic_tests, avalanche_tests, component_analysis_tests
         tmp_tests_configuration = deepcopy(tests_configuration)
         analysis_results = {}
         if "diffusion_tests" in tests_configuration and tests_configuration["diffusion_tests"]["run_tests"]:
@@ -345,6 +366,7 @@ class Cipher:
             sage: apvs = speck.avalanche_probability_vectors(100)
             sage: apvs["key"]["round_output"][31][0] # random
         """
+        from claasp.cipher_modules import avalanche_tests
         return avalanche_tests.avalanche_probability_vectors(self, nb_samples)
 
     def component_analysis_tests(self):
@@ -363,6 +385,7 @@ class Cipher:
             sage: len(result)
             9
         """
+        from claasp.cipher_modules import component_analysis_tests
         return component_analysis_tests.component_analysis_tests(self)
 
     def print_component_analysis_as_radar_charts(self, component_analysis_results):
@@ -381,6 +404,7 @@ class Cipher:
             sage: fig = aes.print_component_analysis_as_radar_charts(result)
             sage: fig.show() # doctest: +SKIP
         """
+        from claasp.cipher_modules import component_analysis_tests
         return component_analysis_tests.print_component_analysis_as_radar_charts(component_analysis_results)
 
     def component_from(self, round_number, index):
@@ -437,6 +461,7 @@ class Cipher:
             sage: d = speck.compute_criterion_from_avalanche_probability_vectors(apvs, 0.2)
             sage: d["key"]["round_output"][0][0]["avalanche_dependence_vectors"] # random
         """
+        from claasp.cipher_modules import avalanche_tests
         return avalanche_tests.compute_criterion_from_avalanche_probability_vectors(self, all_apvs,
                                                                                     avalanche_dependence_uniform_bias)
 
@@ -457,6 +482,7 @@ class Cipher:
             sage: result['plaintext']['round_key_output']['continuous_avalanche_factor']['values'][0]['value']
             0.0
         """
+        from claasp.cipher_modules import continuous_tests
         return continuous_tests.continuous_avalanche_factor(self, lambda_value, number_of_samples)
 
     def continuous_diffusion_factor(self, beta_number_of_samples, gf_number_samples):
@@ -476,6 +502,7 @@ class Cipher:
             sage: output['plaintext']['cipher_output']['diffusion_factor']['values'][0]['2'] > 0 # long time
             True
         """
+        from claasp.cipher_modules import continuous_tests
         return continuous_tests.continuous_diffusion_factor(self, beta_number_of_samples, gf_number_samples)
 
     def continuous_diffusion_tests(self,
@@ -525,6 +552,7 @@ class Cipher:
             sage: output['plaintext']['round_key_output']['continuous_neutrality_measure']['values'][0]['1'] == 0.0 # long time
             True
         """
+        from claasp.cipher_modules import continuous_tests
         return continuous_tests.continuous_diffusion_tests(self,
                                                            continuous_avalanche_factor_number_of_samples,
                                                            threshold_for_avalanche_factor,
@@ -555,17 +583,46 @@ class Cipher:
             sage: output['plaintext']['cipher_output']['continuous_neutrality_measure']['values'][0]['2'] > 0 # long time
             True
         """
+        from claasp.cipher_modules import continuous_tests
         return continuous_tests.continuous_neutrality_measure_for_bit_j(self, beta_number_of_samples,
                                                                         gf_number_samples, input_bit,
                                                                         output_bits)
 
     def continuous_neutrality_measure_for_bit_j_and_beta(self, input_bit, beta, number_of_samples, output_bits):
+        from claasp.cipher_modules import continuous_tests
         return continuous_tests.continuous_neutrality_measure_for_bit_j_and_beta(self, beta, input_bit,
                                                                                  number_of_samples, output_bits)
 
+    def copy_on_write(self):
+        """
+        Return a copy of the cipher sharing its components with the original one.
+
+        The rounds and the inputs are copied, while a component is copied only before the editor modifies it, in either
+        cipher. This is much cheaper than ``deepcopy`` for large ciphers. See :py:func:`~claasp.editor.copy_on_write`.
+
+        INPUT:
+
+        - None
+
+        EXAMPLES::
+
+            sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+            sage: speck = SpeckBlockCipher(number_of_rounds=4)
+            sage: speck_copy = speck.copy_on_write()
+            sage: speck_copy.get_component_from_id('xor_1_10') is speck.get_component_from_id('xor_1_10')
+            True
+            sage: speck_copy.remove_round_component_from_id(1, 'xor_1_10')
+            sage: speck.get_round_from_component_id('xor_1_10')
+            1
+        """
+        return editor.copy_on_write(self)
+
     def delete_generated_evaluate_c_shared_library(self):
         """
-        Delete the file named <id_cipher>_evaluate.c and the corresponding executable.
+        Delete the C sources, executables and shared libraries of the cipher from the C build cache.
+
+        The shared library loaded by :py:meth:`evaluate_batch_using_c` is forgotten too, so that it is rebuilt by the
+        next call.
 
         INPUT:
 
@@ -573,8 +630,13 @@ class Cipher:
 
         EXAMPLES::
 
+            sage: import os
             sage: from claasp.ciphers.block_ciphers.fancy_block_cipher import FancyBlockCipher as fancy
-            sage: fancy().delete_generated_evaluate_c_shared_library() # doctest: +SKIP
+            sage: cipher = fancy()
+            sage: path = cipher.generate_evaluate_c_code_shared_library(False, False) # doctest: +SKIP
+            sage: cipher.delete_generated_evaluate_c_shared_library()
+            sage: os.path.exists(path) # doctest: +SKIP
+            False
         """
         code_generator.delete_generated_evaluate_c_shared_library(self)
 
@@ -587,7 +649,11 @@ class Cipher:
                         run_avalanche_dependence=True,
                         run_avalanche_dependence_uniform=True,
                         run_avalanche_weight=True,
-                        run_avalanche_entropy=True):
+                        run_avalanche_entropy=True,
+                        confidence_level=None,
+                        result_format="dict",
+                        processes=1,
+                        seed=None):
         """
         Return a python dictionary that contains the dictionaries corresponding to each criterion and their analysis.
 
@@ -617,6 +683,21 @@ class Cipher:
           output dictionary
         - ``run_avalanche_entropy`` -- **boolean** (default: `True`); if True, add the avalanche entropy results to the
           output dictionary
+        - ``confidence_level`` -- **float** (default: `None`); if set, the samples are drawn in growing batches until
+          the outcomes of all the criteria which are run, for all the inputs, differences and outputs, are known
+          together with this confidence, and ``number_of_samples`` is the largest number of samples drawn. The number
+          of samples actually drawn is returned in ``input_parameters["number_of_samples_used"]``. An output bit that
+          never flipped is taken as independent of the difference once its flip probability is below
+          :py:data:`~claasp.cipher_modules.avalanche_tests.AVALANCHE_DEPENDENCE_MINIMUM_PROBABILITY`
+        - ``result_format`` -- **string** (default: `dict`); the format of the results of each criterion, either
+          `dict` for nested dictionaries and lists, or `arrays` for numpy arrays indexed by input bit, occurrence of
+          the output and output bit (see
+          :py:func:`~claasp.cipher_modules.avalanche_tests.convert_avalanche_test_results_to_dictionary`)
+        - ``processes`` -- **integer** (default: `1`); the number of processes among which the sampling of the input
+          differences and the computation of the results of each input and output are split
+        - ``seed`` -- **integer** (default: `None`); if set, the samples are drawn from a generator seeded with it, so
+          that the results only depend on the seed and not on ``processes``; otherwise they are drawn from the global
+          numpy generator, which is only used in the calling process
 
         .. NOTE::
 
@@ -631,7 +712,19 @@ class Cipher:
             sage: d = speck.diffusion_tests(number_of_samples=100)
             sage: d["test_results"]["key"]["round_output"][ # random
             ....: "avalanche_dependence_vectors"]["differences"][0]["output_vectors"][0]["vector"] # random
+            sage: d = speck.diffusion_tests(number_of_samples=100000, confidence_level=0.95,
+            ....:                           run_avalanche_dependence_uniform=False, run_avalanche_weight=False,
+            ....:                           run_avalanche_entropy=False)
+            sage: d["input_parameters"]["number_of_samples_used"] < 100000
+            True
+            sage: d = speck.diffusion_tests(number_of_samples=100, result_format="arrays")
+            sage: d["test_results"]["key"]["round_output"]["avalanche_weight_vectors"]["vectors"].shape
+            (32, 4, 16)
+            sage: d = speck.diffusion_tests(number_of_samples=100, seed=0)
+            sage: d == speck.diffusion_tests(number_of_samples=100, processes=2, seed=0)
+            True
         """
+        from claasp.cipher_modules import avalanche_tests
         return avalanche_tests.avalanche_tests(self,
                                                number_of_samples, avalanche_dependence_uniform_bias,
                                                avalanche_dependence_criterion_threshold,
@@ -639,7 +732,8 @@ class Cipher:
                                                avalanche_weight_criterion_threshold,
                                                avalanche_entropy_criterion_threshold, run_avalanche_dependence,
                                                run_avalanche_dependence_uniform, run_avalanche_weight,
-                                               run_avalanche_entropy)
+                                               run_avalanche_entropy, confidence_level, result_format, processes,
+                                               seed)
 
     def generate_heatmap_graphs_for_avalanche_tests(self, avalanche_results, difference_positions=None, criterion_names=None):
         """
@@ -677,9 +771,10 @@ class Cipher:
             sage: d = cipher.diffusion_tests(number_of_samples=100) # long
             sage: h = cipher.generate_heatmap_graphs_for_avalanche_tests(d, [1,193], ["avalanche_dependence_vectors", "avalanche_entropy_vectors"]) # long
         """
+        from claasp.cipher_modules import avalanche_tests
         return avalanche_tests.generate_heatmap_graphs_for_avalanche_tests(self, avalanche_results, difference_positions, criterion_names)
 
-    def evaluate(self, cipher_input, intermediate_output=False, verbosity=False):
+    def evaluate(self, cipher_input, intermediate_output=False, verbosity=False, backend='bitstring'):
         """
         Return the output of the cipher.
 
@@ -690,14 +785,49 @@ class Cipher:
           each intermediate output
         - ``verbosity`` -- **boolean** (default: `False`); set this flag to True to print the input/output of each
           component
+        - ``backend`` -- **string** (default: `bitstring`); the engine evaluating the cipher, either ``'bitstring'``
+          or ``'int'``; the ``'int'`` engine works on Python integers with precomputed shifts and masks and is much
+          faster, it prints only the output of each component when ``verbosity`` is True
 
         EXAMPLES::
 
             sage: from claasp.ciphers.block_ciphers.identity_block_cipher import IdentityBlockCipher as identity
             sage: identity().evaluate([0x01234567,0x89ABCDEF])
             19088743
+            sage: identity().evaluate([0x01234567,0x89ABCDEF], backend='int')
+            19088743
+        """
+        return evaluator.evaluate(self, cipher_input, intermediate_output, verbosity, backend)
+
+    def evaluate_bitsliced(self, cipher_input, intermediate_outputs=False, verbosity=False):
         """
-        return evaluator.evaluate(self, cipher_input, intermediate_output, verbosity)
+        Return the output of the cipher for multiple inputs, using a bitsliced implementation.
+
+        Each bit of the state is stored in uint64 lanes holding 64 samples each, SBoxes are evaluated through their
+        algebraic normal form and bit permutations are a reindexing of the lanes. This is much faster than
+        :py:meth:`evaluate_vectorized` for bit-oriented ciphers with small SBoxes (e.g. PRESENT, GIFT, Spongent,
+        Ascon, Keccak). The inputs and the outputs have the same format as in :py:meth:`evaluate_vectorized`.
+
+        INPUT:
+
+        - ``cipher_input`` -- **list**; block cipher inputs (ndarray of uint8 representing one byte each, n rows,
+          m columns, with m the number of inputs to evaluate)
+        - ``intermediate_outputs`` -- **boolean** (default: `False`)
+        - ``verbosity`` -- **boolean** (default: `False`); set this flag to True in order to print the output of each
+          component
+
+        EXAMPLES::
+
+            sage: import numpy as np
+            sage: from claasp.ciphers.block_ciphers.present_block_cipher import PresentBlockCipher
+            sage: present = PresentBlockCipher(number_of_rounds=3)
+            sage: X = np.random.randint(256, size=(8, 100), dtype=np.uint8)
+            sage: K = np.random.randint(256, size=(10, 100), dtype=np.uint8)
+            sage: result = present.evaluate_bitsliced([X, K])
+            sage: np.array_equal(result[-1], present.evaluate_vectorized([X, K])[-1])
+            True
+        """
+        return evaluator.evaluate_bitsliced(self, cipher_input, intermediate_outputs, verbosity)
 
     def evaluate_using_c(self, inputs, intermediate_output=False, verbosity=False):
         """
@@ -721,7 +851,33 @@ class Cipher:
         """
         return evaluator.evaluate_using_c(self, inputs, intermediate_output, verbosity)
 
-    def evaluate_vectorized(self, cipher_input, intermediate_outputs=False, verbosity=False):
+    def evaluate_batch_using_c(self, cipher_input):
+        """
+        Return the output of the cipher for multiple inputs, using the compiled C code in-process.
+
+        The C code is built once as a shared library and loaded with ctypes; all the samples are evaluated in a single
+        call. The inputs and the output have the same format as in :py:meth:`evaluate_vectorized` without intermediate
+        outputs.
+
+        INPUT:
+
+        - ``cipher_input`` -- **list**; block cipher inputs (ndarray of uint8 representing one byte each, n rows,
+          m columns, with m the number of inputs to evaluate)
+
+        EXAMPLES::
+
+            sage: import numpy as np
+            sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher as speck
+            sage: speck = speck(block_bit_size=32, key_bit_size=64, number_of_rounds=22)
+            sage: K=np.random.randint(256, size=(8,2), dtype=np.uint8)
+            sage: X=np.random.randint(256, size=(4,2), dtype=np.uint8)
+            sage: result = speck.evaluate_batch_using_c([X, K])
+            sage: np.array_equal(result[-1], speck.evaluate_vectorized([X, K])[-1])
+            True
+        """
+        return evaluator.evaluate_batch_using_c(self, cipher_input)
+
+    def evaluate_vectorized(self, cipher_input, intermediate_outputs=False, verbosity=False, workers=1, outputs=None):
         """
         Return the output of the cipher for multiple inputs.
 
@@ -735,6 +891,8 @@ class Cipher:
 
         This function determines automatically if a bit-based evaluation is required,
         and does the transformation transparently. The inputs and outputs are similar to evaluate_vectorized_byte.
+        Word-based ciphers made only of ARX operations are evaluated with native numpy words (uint8, uint16, uint32
+        or uint64), so that every word operation is a single ufunc call.
 
         INPUT:
 
@@ -743,6 +901,13 @@ class Cipher:
         - ``intermediate_outputs`` -- **boolean** (default: `False`)
         - ``verbosity`` -- **boolean** (default: `False`); set this flag to True in order to print the input/output of
           each component
+        - ``workers`` -- **integer** (default: `1`); the number of processes among which the samples are split; the
+          processes are kept alive between calls and exchange the inputs and the outputs through shared memory
+        - ``outputs`` -- **dict** or **list** (default: `None`); the outputs to return, as a dictionary mapping each
+          tag to the list of the indices to keep (e.g. ``{'round_output': [5]}`` for the output of the sixth round),
+          or to None to keep all of them; a list of tags keeps all the outputs with these tags. The result is a
+          dictionary with the requested arrays only, and the components following the last of them are not
+          evaluated. This flag overrides ``intermediate_outputs``
 
         EXAMPLES::
 
@@ -762,8 +927,47 @@ class Cipher:
             True
             sage: int.from_bytes(result[-1][1].tobytes(), byteorder='big') == C1Lib
             True
+            sage: np.array_equal(speck.evaluate_vectorized([X, K], workers=2)[-1], result[-1])
+            True
+            sage: round_outputs = speck.evaluate_vectorized([X, K], intermediate_outputs=True)['round_output']
+            sage: selected = speck.evaluate_vectorized([X, K], outputs={'round_output': [5]})
+            sage: list(selected), len(selected['round_output'])
+            (['round_output'], 1)
+            sage: np.array_equal(selected['round_output'][0], round_outputs[5])
+            True
+        """
+        return evaluator.evaluate_vectorized(self, cipher_input, intermediate_outputs, verbosity, workers, outputs)
+
+    def evaluate_vectorized_iter(self, input_source, chunk_size=2 ** 16, outputs=None, verbosity=False):
         """
-        return evaluator.evaluate_vectorized(self, cipher_input, intermediate_outputs, verbosity)
+        Evaluate the cipher on the chunks of ``input_source``, yielding the outputs of each chunk.
+
+        This is the streaming version of :py:meth:`evaluate_vectorized`: only one chunk of inputs and of outputs is
+        in memory at a time. See :py:func:`~claasp.cipher_modules.evaluator.evaluate_vectorized_iter`.
+
+        INPUT:
+
+        - ``input_source`` -- **list** or **iterable**; either a list with one array per cipher input, in the format
+          of :py:meth:`evaluate_vectorized` (e.g. memory-mapped arrays), or an iterable yielding such lists
+        - ``chunk_size`` -- **integer** (default: `2 ** 16`); the number of samples in each chunk when
+          ``input_source`` is a list of arrays
+        - ``outputs`` -- **dict** or **list** (default: `None`); the outputs to yield, selected as in
+          :py:meth:`evaluate_vectorized`; if None, only the cipher output is yielded
+        - ``verbosity`` -- **boolean** (default: `False`); set this flag to True in order to print the output of each
+          component
+
+        EXAMPLES::
+
+            sage: import numpy as np
+            sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+            sage: speck = SpeckBlockCipher(block_bit_size=32, key_bit_size=64, number_of_rounds=5)
+            sage: X = np.random.randint(256, size=(4, 1000), dtype=np.uint8)
+            sage: K = np.random.randint(256, size=(8, 1000), dtype=np.uint8)
+            sage: outputs = np.vstack([chunk[-1] for chunk in speck.evaluate_vectorized_iter([X, K], chunk_size=256)])
+            sage: np.array_equal(outputs, speck.evaluate_vectorized([X, K])[-1])
+            True
+        """
+        return evaluator.evaluate_vectorized_iter(self, input_source, chunk_size, outputs, verbosity)
 
     def evaluate_with_intermediate_outputs_continuous_diffusion_analysis(
             self, cipher_input, sbox_precomputations, sbox_precomputations_mix_columns, verbosity=False):
@@ -798,6 +1002,28 @@ class Cipher:
         return evaluator.evaluate_with_intermediate_outputs_continuous_diffusion_analysis(
             self, cipher_input, sbox_precomputations, sbox_precomputations_mix_columns, verbosity)
 
+    @classmethod
+    def from_cache(cls, **parameters):
+        """
+        Return ``cls(**parameters)``, loading it from the on-disk cipher cache if it was already built.
+
+        Building ciphers such as Keccak or LowMC takes seconds, while loading them from the cache takes milliseconds.
+        The cache is keyed by the class, the parameters and the source of the module of the class. See
+        :py:func:`~claasp.cipher_modules.cipher_cache.load_or_build_cipher`.
+
+        INPUT:
+
+        - ``**parameters`` -- the keyword arguments passed to the constructor
+
+        EXAMPLES::
+
+            sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+            sage: speck = SpeckBlockCipher.from_cache(number_of_rounds=4)
+            sage: speck.evaluate([0x6574, 0x0100]) == SpeckBlockCipher(number_of_rounds=4).evaluate([0x6574, 0x0100])
+            True
+        """
+        return cipher_cache.load_or_build_cipher(cls, **parameters)
+
     def find_good_input_difference_for_neural_distinguisher(self, difference_positions,
                                                             initial_population=32, number_of_generations=50,
                                                             nb_samples=10 ** 4, previous_generation=None,
@@ -822,6 +1048,7 @@ class Cipher:
             sage: cipher = SpeckBlockCipher()
             sage: diff, scores, highest_round = find_good_input_difference_for_neural_distinguisher(cipher, [True, False], verbose = False, number_of_generations=5)
         """
+        from claasp.cipher_modules import neural_network_tests
         return neural_network_tests.find_good_input_difference_for_neural_distinguisher(self,
                                                                                         difference_positions,
                                                                                         initial_population,
@@ -879,8 +1106,10 @@ class Cipher:
             sage: import os
             sage: os.remove(f"{tii_dir_path}/{identity.id}_report.csv")
         """
+        from claasp.cipher_modules import avalanche_tests
+        from claasp.utils.templates import TemplateManager, CSVBuilder
 
-        diffusion_tests_results = self.diffusion_tests(nb_samples)
+        diffusion_tests_results = self.diffusion_tests(nb_samples, result_format="arrays")
         first_input_tag = list(diffusion_tests_results['test_results'].keys())[0]
         output_tags = diffusion_tests_results['test_results'][first_input_tag].keys()
         property_values_array = []
@@ -912,7 +1141,9 @@ class Cipher:
 
     def generate_evaluate_c_code_shared_library(self, intermediate_output=False, verbosity=False):
         """
-        Store the C code in a file named <id_cipher>_evaluate.c, and build the corresponding executable.
+        Build the executable evaluating the cipher from its C code and return its path.
+
+        The executable is stored in the C build cache, so an unchanged cipher is compiled only once.
 
         INPUT:
 
@@ -926,7 +1157,7 @@ class Cipher:
             sage: from claasp.ciphers.block_ciphers.fancy_block_cipher import FancyBlockCipher as fancy
             sage: fancy().generate_evaluate_c_code_shared_library() # doctest: +SKIP
         """
-        code_generator.generate_evaluate_c_code_shared_library(self, intermediate_output, verbosity)
+        return code_generator.generate_evaluate_c_code_shared_library(self, intermediate_output, verbosity)
 
     def generate_word_based_c_code(self, word_size, intermediate_output=False, verbosity=False):
         """
@@ -976,6 +1207,28 @@ class Cipher:
         """
         return self._rounds.get_component_from_id(component_id)
 
+    def get_component_fingerprint(self, component_id):
+        """
+        Return a hash of the id, the type, the input links, the input bit positions and the description of a component.
+
+        INPUT:
+
+        - ``component_id`` -- **string**; id of a component
+
+        EXAMPLES::
+
+            sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+            sage: speck = SpeckBlockCipher(number_of_rounds=3)
+            sage: fingerprint = SpeckBlockCipher(number_of_rounds=4).get_component_fingerprint('xor_1_10')
+            sage: speck.get_component_fingerprint('xor_1_10') == fingerprint
+            True
+        """
+        round_number = self.get_round_from_component_id(component_id)
+        if round_number == -1:
+            raise ValueError(f'The component {component_id} does not exist.')
+
+        return self._get_rounds_fingerprints(round_number)[1][component_id]
+
     def get_components_in_round(self, round_number):
         return self._rounds.components_in_round(round_number)
 
@@ -1007,6 +1260,27 @@ class Cipher:
     def get_number_of_components_in_round(self, round_number):
         return self._rounds.number_of_components(round_number)
 
+    def get_optimization_report(self, intermediate_outputs=False, outputs=None):
+        """
+        Return the report of the components eliminated from the code run by :py:meth:`evaluate_vectorized`.
+
+        See :py:func:`~claasp.cipher_modules.evaluator.get_optimization_report`.
+
+        INPUT:
+
+        - ``intermediate_outputs`` -- **boolean** (default: `False`); as in :py:meth:`evaluate_vectorized`
+        - ``outputs`` -- **dict** or **list** (default: `None`); as in :py:meth:`evaluate_vectorized`
+
+        EXAMPLES::
+
+            sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+            sage: speck = SpeckBlockCipher(number_of_rounds=4)
+            sage: report = speck.get_optimization_report()
+            sage: report['components'] == len(speck.get_all_components())
+            True
+        """
+        return evaluator.get_optimization_report(self, intermediate_outputs, outputs)
+
     def get_round_from_component_id(self, component_id):
         """
         Return the round according to the round of the component id given as input.
@@ -1024,6 +1298,59 @@ class Cipher:
         """
         return self._rounds.get_round_from_component_id(component_id)
 
+    def get_round_fingerprint(self, round_number):
+        """
+        Return a hash of the components of a round, in their order.
+
+        INPUT:
+
+        - ``round_number`` -- **integer**; the number of the round
+
+        EXAMPLES::
+
+            sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+            sage: speck = SpeckBlockCipher(number_of_rounds=3)
+            sage: speck.get_round_fingerprint(1) == SpeckBlockCipher(number_of_rounds=4).get_round_fingerprint(1)
+            True
+            sage: speck.get_round_fingerprint(1) == speck.get_round_fingerprint(2)
+            False
+        """
+        return self._get_rounds_fingerprints(round_number)[0]
+
+    def invalidate_caches(self, round_number=None):
+        """
+        Empty the compiled evaluators, the structural fingerprint and the components index of the cipher, and mark
+        it as not sorted.
+
+        The editor calls this method every time it modifies the cipher. The fingerprints of the rounds are kept, except
+        the one of ``round_number``, or all of them if ``round_number`` is None, so that the structural fingerprint is
+        recomputed only for the rounds that changed.
+
+        INPUT:
+
+        - ``round_number`` -- **integer** (default: `None`); the only round that was modified, None if unknown
+
+        EXAMPLES::
+
+            sage: from claasp.ciphers.block_ciphers.identity_block_cipher import IdentityBlockCipher
+            sage: identity = IdentityBlockCipher()
+            sage: identity.evaluate([0x01234567, 0x89ABCDEF])
+            19088743
+            sage: len(identity.compiled_evaluators)
+            1
+            sage: identity.invalidate_caches()
+            sage: len(identity.compiled_evaluators)
+            0
+        """
+        self._compiled_evaluators = {}
+        self._structural_fingerprint = None
+        if round_number is None:
+            self._rounds_fingerprints = {}
+        else:
+            self._rounds_fingerprints.pop(round_number, None)
+        self._is_sorted = False
+        self._rounds.invalidate_components_index()
+
     def is_algebraically_secure(self, timeout):
         """
         Return `True` if the cipher is resistant against algebraic attack.
@@ -1032,6 +1359,7 @@ class Cipher:
 
         - ``timeout`` -- **integer**; the timeout for the Grobner basis computation in seconds
         """
+        from claasp.cipher_modules.models.algebraic.algebraic_model import AlgebraicModel
         algebraic_model = AlgebraicModel(self)
         return algebraic_model.is_algebraically_secure(timeout)
 
@@ -1149,6 +1477,32 @@ class Cipher:
                 return False
         return set_of_components <= spn_components
 
+    def get_structural_fingerprint(self):
+        """
+        Return a hash of the inputs and of the graph of the cipher, used to key the compiled evaluators.
+
+        The hash covers the inputs, the output size and, through the fingerprints of the rounds, the ids, types, input
+        links, input bit positions and descriptions of all the components. Only the rounds modified since the last call
+        are hashed again.
+
+        INPUT:
+
+        - None
+
+        EXAMPLES::
+
+            sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+            sage: fingerprint = SpeckBlockCipher(number_of_rounds=2).get_structural_fingerprint()
+            sage: fingerprint == SpeckBlockCipher(number_of_rounds=2).get_structural_fingerprint()
+            True
+            sage: fingerprint == SpeckBlockCipher(number_of_rounds=3).get_structural_fingerprint()
+            False
+        """
+        if self._structural_fingerprint is None:
+            self._structural_fingerprint = editor.make_structural_fingerprint(self)
+
+        return self._structural_fingerprint
+
     def get_sizes_of_components_by_type(self):
         set_of_sbox_sizes = set()
         set_of_mix_column_sizes = set()
@@ -1167,6 +1521,30 @@ class Cipher:
                 set_of_components.add(component.type)
         return set_of_components, set_of_mix_column_sizes, set_of_rotate_and_shift_values, set_of_sbox_sizes
 
+    @staticmethod
+    def load(file_name):
+        """
+        Return the cipher written to ``file_name`` by :py:meth:`save`.
+
+        The file is unpickled, so it must come from a trusted source.
+
+        INPUT:
+
+        - ``file_name`` -- **string**; the path of the file
+
+        EXAMPLES::
+
+            sage: import os
+            sage: from claasp.cipher import Cipher
+            sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+            sage: speck = SpeckBlockCipher(number_of_rounds=4)
+            sage: speck.save("speck_example.pickle")
+            sage: Cipher.load("speck_example.pickle").as_python_dictionary() == speck.as_python_dictionary()
+            True
+            sage: os.remove("speck_example.pickle")
+        """
+        return cipher_cache.load_cipher(file_name)
+
     def make_cipher_id(self):
         return editor.make_cipher_id(self._family_name, self._inputs, self._inputs_bit_size,
                                      self._output_bit_size, self.number_of_rounds)
@@ -1191,6 +1569,7 @@ class Cipher:
             sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher as speck
             sage: #speck(number_of_rounds=22).neural_network_blackbox_distinguisher_tests(nb_samples = 10) # random
         """
+        from claasp.cipher_modules import neural_network_tests
         return neural_network_tests.neural_network_blackbox_distinguisher_tests(
             self, nb_samples, hidden_layers, number_of_epochs)
 
@@ -1212,6 +1591,7 @@ class Cipher:
             sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher as speck
             sage: #speck(number_of_rounds=22).neural_network_differential_distinguisher_tests(nb_samples = 10) # random
         """
+        from claasp.cipher_modules import neural_network_tests
         return neural_network_tests.neural_network_differential_distinguisher_tests(
             self, nb_samples, hidden_layers, number_of_epochs, diff)
 
@@ -1482,6 +1862,7 @@ class Cipher:
             sage: IdentityBlockCipher().polynomial_system()
             Polynomial Sequence with 128 Polynomials in 256 Variables
         """
+        from claasp.cipher_modules.models.algebraic.algebraic_model import AlgebraicModel
         algebraic_model = AlgebraicModel(self)
         return algebraic_model.polynomial_system()
 
@@ -1499,6 +1880,7 @@ class Cipher:
             sage: FancyBlockCipher(number_of_rounds=1).polynomial_system_at_round(0)
             Polynomial Sequence with 252 Polynomials in 288 Variables
         """
+        from claasp.cipher_modules.models.algebraic.algebraic_model import AlgebraicModel
         algebraic_model = AlgebraicModel(self)
         return algebraic_model.polynomial_system_at_round(r)
 
@@ -1511,6 +1893,26 @@ class Cipher:
     def remove_round_component_from_id(self, round_id, component_id):
         editor.remove_round_component_from_id(self, round_id, component_id)
 
+    def save(self, file_name):
+        """
+        Write the cipher to ``file_name`` in a compact binary format, which :py:meth:`load` reads back.
+
+        INPUT:
+
+        - ``file_name`` -- **string**; the path of the file
+
+        EXAMPLES::
+
+            sage: import os
+            sage: from claasp.cipher import Cipher
+            sage: cipher = Cipher("cipher_name", "block_cipher", ["key", "plaintext"], [32, 32], 32)
+            sage: cipher.save("cipher_example.pickle")
+            sage: Cipher.load("cipher_example.pickle").id
+            'cipher_name_k32_p32_o32_r0'
+            sage: os.remove("cipher_example.pickle")
+        """
+        cipher_cache.save_cipher(self, file_name)
+
     def set_file_name(self, file_name):
         self._file_name = file_name
 
@@ -1520,6 +1922,30 @@ class Cipher:
     def sort_cipher(self):
         return editor.sort_cipher(self)
 
+    def specialize(self, fixed_inputs):
+        """
+        Return a copy of the cipher with the inputs ``fixed_inputs`` fixed and the components depending only on them
+        folded into constants.
+
+        This is useful when the same key is used for many plaintexts, since the key schedule is then evaluated only
+        once. See :py:func:`~claasp.editor.specialize`.
+
+        INPUT:
+
+        - ``fixed_inputs`` -- **dictionary**; the value of each fixed input, keyed by the name of the input
+
+        EXAMPLES::
+
+            sage: import numpy as np
+            sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+            sage: speck = SpeckBlockCipher(block_bit_size=32, key_bit_size=64)
+            sage: fixed_key_speck = speck.specialize({'key': 0x1918111009080100})
+            sage: plaintexts = np.array([[0x65, 0x74, 0x69, 0x4c]], dtype=np.uint8).transpose()
+            sage: fixed_key_speck.evaluate_vectorized([plaintexts])[0].tolist()
+            [[168, 104, 66, 242]]
+        """
+        return editor.specialize(self, fixed_inputs)
+
     def test_against_reference_code(self, number_of_tests=5):
         """
         Test the graph representation against its reference implementation (if available) with random inputs.
@@ -1576,6 +2002,31 @@ class Cipher:
         """
         return tester.test_vector_check(self, list_of_test_vectors_input, list_of_test_vectors_output)
 
+    def truncate(self, number_of_rounds):
+        """
+        Return a copy of the cipher reduced to its first ``number_of_rounds`` rounds, sharing its components.
+
+        This is much cheaper than building the cipher again for each number of rounds in round-sweeping experiments.
+        See :py:func:`~claasp.editor.truncate`.
+
+        INPUT:
+
+        - ``number_of_rounds`` -- **integer**; the number of rounds of the truncated cipher
+
+        EXAMPLES::
+
+            sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+            sage: speck = SpeckBlockCipher(number_of_rounds=22)
+            sage: speck.truncate(3).evaluate([0x6574694c, 0x1918111009080100]) == SpeckBlockCipher(
+            ....:     number_of_rounds=3).evaluate([0x6574694c, 0x1918111009080100])
+            True
+        """
+        return editor.truncate(self, number_of_rounds)
+
+    @property
+    def compiled_evaluators(self):
+        return self._compiled_evaluators
+
     @property
     def current_round(self):
         return self._rounds.current_round
@@ -1600,6 +2051,10 @@ class Cipher:
     def id(self):
         return self._id
 
+    @property
+    def is_sorted(self):
+        return self._is_sorted
+
     @property
     def inputs(self):
         return self._inputs
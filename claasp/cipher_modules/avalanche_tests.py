@@ -21,31 +21,26 @@ import sys
 import math
 import numpy as np
 from math import log
+from statistics import NormalDist
 
 from claasp.cipher_modules import evaluator
 from claasp.name_mappings import INTERMEDIATE_OUTPUT, CIPHER_OUTPUT
 
+MAXIMUM_NUMBER_OF_EVALUATED_SAMPLES = 2 ** 14
+MINIMUM_NUMBER_OF_SAMPLES_PER_BATCH = 100
+AVALANCHE_DEPENDENCE_MINIMUM_PROBABILITY = 0.01
+AVALANCHE_RESULT_FORMATS = ("dict", "arrays")
+
 
 def avalanche_tests(cipher, number_of_samples=5, avalanche_dependence_uniform_bias=0.05,
                     avalanche_dependence_criterion_threshold=0, avalanche_dependence_uniform_criterion_threshold=0,
                     avalanche_weight_criterion_threshold=0.01, avalanche_entropy_criterion_threshold=0.01,
                     run_avalanche_dependence=True, run_avalanche_dependence_uniform=True,
-                    run_avalanche_weight=True, run_avalanche_entropy=True):
-
-    all_avalanche_probability_vectors = avalanche_probability_vectors(cipher, number_of_samples)
-    criterion = compute_criterion_from_avalanche_probability_vectors(cipher, all_avalanche_probability_vectors,
-                                                                     avalanche_dependence_uniform_bias)
-    intermediate_output_names = add_intermediate_output_components_id_to_dictionary(cipher.get_all_components())
-    diffusion_tests = {
-        "input_parameters": {
-            "number_of_samples": number_of_samples,
-            "avalanche_dependence_uniform_bias": avalanche_dependence_uniform_bias,
-            "avalanche_dependence_criterion_threshold": avalanche_dependence_criterion_threshold,
-            "avalanche_dependence_uniform_criterion_threshold": avalanche_dependence_uniform_criterion_threshold,
-            "avalanche_weight_criterion_threshold": avalanche_weight_criterion_threshold,
-            "avalanche_entropy_criterion_threshold": avalanche_entropy_criterion_threshold}}
+                    run_avalanche_weight=True, run_avalanche_entropy=True, confidence_level=None,
+                    result_format="dict", processes=1, seed=None):
 
-    test_results = init_dictionary_test_results(cipher, intermediate_output_names)
+    if result_format not in AVALANCHE_RESULT_FORMATS:
+        raise ValueError(f'result_format must be one of {AVALANCHE_RESULT_FORMATS}, not {result_format!r}')
 
     parameters = {
         "avalanche_dependence_vectors": [run_avalanche_dependence, 1,
@@ -55,25 +50,85 @@ def avalanche_tests(cipher, number_of_samples=5, avalanche_dependence_uniform_bi
         "avalanche_weight_vectors": [run_avalanche_weight, 1 / 2, avalanche_weight_criterion_threshold],
         "avalanche_entropy_vectors": [run_avalanche_entropy, 1, avalanche_entropy_criterion_threshold]}
 
-    for criterion_name in parameters.keys():
-        for index, input_name in enumerate(cipher.inputs):
-            for intermediate_output_name in list(intermediate_output_names.keys()):
-                if parameters[criterion_name][0]:
-                    add_intermediate_output_values_to_dictionary(cipher, criterion_name, intermediate_output_names,
-                                                                 parameters, test_results, index, input_name,
-                                                                 intermediate_output_name)
-                    all_output_vectors, largest_round_criterion_not_satisfied = \
-                        calculate_regular_difference(criterion_name, criterion, intermediate_output_names, parameters,
-                                                     test_results, input_name, intermediate_output_name)
-                    calculate_average_difference(all_output_vectors, criterion_name, parameters, test_results,
-                                                 input_name, intermediate_output_name)
-                    calculate_worst_input_differences(cipher, criterion_name, largest_round_criterion_not_satisfied,
-                                                      test_results, input_name, intermediate_output_name)
+    if confidence_level is None:
+        flip_counts = avalanche_flip_counts(cipher, number_of_samples, processes, seed)
+        number_of_samples_used = number_of_samples
+    else:
+        flip_counts, number_of_samples_used = avalanche_flip_counts_until_decided(
+            cipher, number_of_samples, confidence_level, avalanche_dependence_uniform_bias, parameters, processes,
+            seed)
+    diffusion_tests = {
+        "input_parameters": {
+            "number_of_samples": number_of_samples,
+            "avalanche_dependence_uniform_bias": avalanche_dependence_uniform_bias,
+            "avalanche_dependence_criterion_threshold": avalanche_dependence_criterion_threshold,
+            "avalanche_dependence_uniform_criterion_threshold": avalanche_dependence_uniform_criterion_threshold,
+            "avalanche_weight_criterion_threshold": avalanche_weight_criterion_threshold,
+            "avalanche_entropy_criterion_threshold": avalanche_entropy_criterion_threshold}}
+    if confidence_level is not None:
+        diffusion_tests["input_parameters"]["confidence_level"] = confidence_level
+        diffusion_tests["input_parameters"]["number_of_samples_used"] = number_of_samples_used
+    if seed is not None:
+        diffusion_tests["input_parameters"]["seed"] = seed
+
+    # the results of each input and output are computed independently, and merged in the order of the cipher; each
+    # task receives the few properties of the cipher it needs instead of the cipher
+    outputs = [(input_name, intermediate_output_name) for input_name in cipher.inputs
+               for intermediate_output_name in flip_counts[input_name]]
+    intermediate_output_names = add_intermediate_output_components_id_to_dictionary(cipher.get_all_components())
+    intermediate_output_rounds = add_intermediate_output_rounds_id_to_dictionary(cipher)
+    tasks = [(input_name, cipher.inputs_bit_size[cipher.inputs.index(input_name)], cipher.number_of_rounds,
+              intermediate_output_name, intermediate_output_names[intermediate_output_name],
+              intermediate_output_rounds[intermediate_output_name], flip_counts[input_name][intermediate_output_name],
+              number_of_samples_used, avalanche_dependence_uniform_bias, parameters, result_format)
+             for input_name, intermediate_output_name in outputs]
+    if processes > 1:
+        outputs_test_results = evaluator.get_process_pool(processes).starmap(get_avalanche_test_results_of_output,
+                                                                             tasks)
+    else:
+        outputs_test_results = [get_avalanche_test_results_of_output(*task) for task in tasks]
+    test_results = {input_name: {} for input_name in cipher.inputs}
+    for (input_name, intermediate_output_name), output_test_results in zip(outputs, outputs_test_results):
+        test_results[input_name][intermediate_output_name] = output_test_results
     diffusion_tests["test_results"] = test_results
 
     return diffusion_tests
 
 
+def get_avalanche_test_results_of_output(input_name, input_bit_size, number_of_rounds, intermediate_output_name,
+                                         output_components, output_rounds, flip_counts, number_of_samples,
+                                         avalanche_dependence_uniform_bias, dict_parameters, result_format):
+    # output_components and output_rounds are the values of intermediate_output_name in the dictionaries of
+    # add_intermediate_output_components_id_to_dictionary and add_intermediate_output_rounds_id_to_dictionary
+    if result_format == "arrays":
+        return get_avalanche_test_results_arrays(output_components[2], output_rounds[1], flip_counts,
+                                                 number_of_samples, avalanche_dependence_uniform_bias, dict_parameters)
+
+    avalanche_probability_vectors_of_output = [[list(vector) for vector in vectors]
+                                               for vectors in flip_counts / number_of_samples]
+    all_avalanche_probability_vectors = {input_name: {}}
+    all_avalanche_probability_vectors[input_name][intermediate_output_name] = avalanche_probability_vectors_of_output
+    criterion = compute_criterion_from_avalanche_probability_vectors_and_rounds(
+        {intermediate_output_name: output_rounds}, all_avalanche_probability_vectors,
+        avalanche_dependence_uniform_bias)
+    intermediate_output_names = {intermediate_output_name: output_components}
+    test_results = {input_name: {intermediate_output_name: {}}}
+    for criterion_name in dict_parameters.keys():
+        if dict_parameters[criterion_name][0]:
+            add_intermediate_output_values_to_dictionary(input_bit_size, criterion_name, intermediate_output_names,
+                                                         dict_parameters, test_results, input_name,
+                                                         intermediate_output_name)
+            all_output_vectors, largest_round_criterion_not_satisfied = \
+                calculate_regular_difference(criterion_name, criterion, intermediate_output_names, dict_parameters,
+                                             test_results, input_name, intermediate_output_name)
+            calculate_average_difference(all_output_vectors, criterion_name, dict_parameters, test_results,
+                                         input_name, intermediate_output_name)
+            calculate_worst_input_differences(number_of_rounds, criterion_name, largest_round_criterion_not_satisfied,
+                                              test_results, input_name, intermediate_output_name)
+
+    return test_results[input_name][intermediate_output_name]
+
+
 def init_dictionary_test_results(cipher, dict_intermediate_output_names):
     dict_test_results = {}
     for input_name in cipher.inputs:
@@ -106,12 +161,11 @@ def add_intermediate_output_components_id_to_dictionary(components):
     return intermediate_output_names
 
 
-def add_intermediate_output_values_to_dictionary(cipher, criterion_name, dict_intermediate_output_names,
-                                                 dict_parameters, dict_test_results, index,
+def add_intermediate_output_values_to_dictionary(input_bit_size, criterion_name, dict_intermediate_output_names,
+                                                 dict_parameters, dict_test_results,
                                                  input_name, intermediate_output_name):
     dict_test_results[input_name][intermediate_output_name][criterion_name] = {}
-    dict_test_results[input_name][intermediate_output_name][criterion_name]["input_bit_size"] = \
-        cipher.inputs_bit_size[index]
+    dict_test_results[input_name][intermediate_output_name][criterion_name]["input_bit_size"] = input_bit_size
     output_bit_size = dict_intermediate_output_names[intermediate_output_name][0]
     dict_test_results[input_name][intermediate_output_name][criterion_name]["output_bit_size"] = output_bit_size
     dict_test_results[input_name][intermediate_output_name][criterion_name]["max_possible_value_per_bit"] = 1
@@ -191,10 +245,10 @@ def calculate_average_difference(all_output_vectors, criterion_name, dict_parame
         dict_for_average_diff)
 
 
-def calculate_worst_input_differences(cipher, criterion_name, largest_round_criterion_not_satisfied,
+def calculate_worst_input_differences(number_of_rounds, criterion_name, largest_round_criterion_not_satisfied,
                                       dict_test_results, input_name, intermediate_output_name):
     max_round_criterion_not_satisfied = max(
-        largest_round_criterion_not_satisfied.values(), default=cipher.number_of_rounds)
+        largest_round_criterion_not_satisfied.values(), default=number_of_rounds)
     worst_input_diffs = [input_diff for input_diff, specific_round in
                          largest_round_criterion_not_satisfied.items()
                          if specific_round == max_round_criterion_not_satisfied]
@@ -203,6 +257,113 @@ def calculate_worst_input_differences(cipher, criterion_name, largest_round_crit
 
 def avalanche_probability_vectors(cipher, nb_samples):
 
+    # Structure of all_avalanche_probability_vectors:
+    # Example :
+    # all_avalanche_probability_vectors['key']['round_output'][i] = [apv_round_0,apv_round_1, ... , apv_round_(n-1)]
+    # where the diff has been injected in position i
+    flip_counts = avalanche_flip_counts(cipher, nb_samples)
+
+    return get_avalanche_probability_vectors_from_flip_counts(flip_counts, nb_samples)
+
+
+def avalanche_probability_vectors_until_decided(cipher, maximum_number_of_samples, confidence_level,
+                                                avalanche_dependence_uniform_bias, criteria_parameters):
+    """
+    Return the avalanche probability vectors and the number of samples used to compute them.
+
+    The samples are drawn in the batches returned by :py:func:`get_batch_sizes`, until all the criteria of
+    ``criteria_parameters`` are decided (see :py:func:`are_avalanche_criteria_decided`) or
+    ``maximum_number_of_samples`` samples have been drawn. The criteria are checked after each batch, each time at the
+    confidence ``1 - (1 - confidence_level) / len(get_batch_sizes(maximum_number_of_samples))``, so that all the
+    decisions hold together with probability ``confidence_level`` whichever batch the sampling stops after.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; an instance of the object cipher
+    - ``maximum_number_of_samples`` -- **integer**; the largest number of samples to draw
+    - ``confidence_level`` -- **float**; the confidence required to decide a criterion, e.g. `0.95`
+    - ``avalanche_dependence_uniform_bias`` -- **float**; the bias of the avalanche dependence uniform criterion
+    - ``criteria_parameters`` -- **dictionary**; the list ``[run, expected_value_per_bit, threshold]`` of each
+      criterion, as built in :py:func:`avalanche_tests`
+
+    EXAMPLES::
+
+        sage: from claasp.cipher_modules.avalanche_tests import avalanche_probability_vectors_until_decided
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: speck = SpeckBlockCipher(block_bit_size=16, key_bit_size=32, number_of_rounds=5)
+        sage: criteria_parameters = {"avalanche_dependence_vectors": [True, 1, 0]}
+        sage: apvs, number_of_samples = avalanche_probability_vectors_until_decided(speck, 10000, 0.95, 0.05,
+        ....:                                                                       criteria_parameters)
+        sage: number_of_samples < 10000
+        True
+    """
+    flip_counts, number_of_samples = avalanche_flip_counts_until_decided(
+        cipher, maximum_number_of_samples, confidence_level, avalanche_dependence_uniform_bias, criteria_parameters)
+
+    return get_avalanche_probability_vectors_from_flip_counts(flip_counts, number_of_samples), number_of_samples
+
+
+def avalanche_flip_counts(cipher, nb_samples, processes=1, seed=None):
+    intermediate_output_names = get_intermediate_output_occurrences_and_bit_sizes(cipher)
+    flip_counts = init_avalanche_flip_counts(cipher, intermediate_output_names)
+    random_generator = None if seed is None else np.random.default_rng(seed)
+    update_avalanche_flip_counts(cipher, intermediate_output_names, flip_counts, nb_samples, processes,
+                                 random_generator)
+
+    return flip_counts
+
+
+def avalanche_flip_counts_until_decided(cipher, maximum_number_of_samples, confidence_level,
+                                        avalanche_dependence_uniform_bias, criteria_parameters, processes=1,
+                                        seed=None):
+    intermediate_output_names = get_intermediate_output_occurrences_and_bit_sizes(cipher)
+    flip_counts = init_avalanche_flip_counts(cipher, intermediate_output_names)
+    random_generator = None if seed is None else np.random.default_rng(seed)
+    batch_sizes = get_batch_sizes(maximum_number_of_samples)
+    # the error probability is split between the checks done after each batch (Bonferroni over the looks)
+    confidence_level_of_each_batch = 1 - (1 - confidence_level) / len(batch_sizes)
+    number_of_samples = 0
+    for batch_size in batch_sizes:
+        update_avalanche_flip_counts(cipher, intermediate_output_names, flip_counts, batch_size, processes,
+                                     random_generator)
+        number_of_samples += batch_size
+        if are_avalanche_criteria_decided(flip_counts, number_of_samples, confidence_level_of_each_batch,
+                                          avalanche_dependence_uniform_bias, criteria_parameters):
+            break
+
+    return flip_counts, number_of_samples
+
+
+def get_batch_sizes(maximum_number_of_samples):
+    """
+    Return the sizes of the batches of samples drawn until ``maximum_number_of_samples`` samples have been drawn.
+
+    The first batch has ``MINIMUM_NUMBER_OF_SAMPLES_PER_BATCH`` samples and each following one is as large as all the
+    previous ones together, so that there are ``1 + ceil(log2(maximum_number_of_samples / 100))`` batches when at least
+    100 samples are drawn.
+
+    INPUT:
+
+    - ``maximum_number_of_samples`` -- **integer**; the largest number of samples to draw
+
+    EXAMPLES::
+
+        sage: from claasp.cipher_modules.avalanche_tests import get_batch_sizes
+        sage: get_batch_sizes(1000)
+        [100, 100, 200, 400, 200]
+    """
+    batch_sizes = []
+    number_of_samples = 0
+    batch_size = min(MINIMUM_NUMBER_OF_SAMPLES_PER_BATCH, maximum_number_of_samples)
+    while batch_size > 0:
+        batch_sizes.append(batch_size)
+        number_of_samples += batch_size
+        batch_size = min(number_of_samples, maximum_number_of_samples - number_of_samples)
+
+    return batch_sizes
+
+
+def get_intermediate_output_occurrences_and_bit_sizes(cipher):
     intermediate_output_names = {}
     for component in cipher.get_all_components():
         if is_output(component):
@@ -210,80 +371,267 @@ def avalanche_probability_vectors(cipher, nb_samples):
                 intermediate_output_names[component.description[0]] = [0, component.output_bit_size]
             intermediate_output_names[component.description[0]][0] += 1
 
-    # Structure of all_avalanche_probability_vectors:
-    # Example :
-    # all_avalanche_probability_vectors['key']['round_output'][i] = [apv_round_0,apv_round_1, ... , apv_round_(n-1)]
-    # where the diff has been injected in position i
-    all_avalanche_probability_vectors = {}
+    return intermediate_output_names
+
+
+def init_avalanche_flip_counts(cipher, dict_intermediate_output_names):
+    # flip_counts[input][output][i, j, k] is the number of samples where the bit k of the occurrence j of the output
+    # flipped when the diff was injected in position i of the input
+    flip_counts = {}
+    input_bits_to_analyse = cipher.get_all_inputs_bit_positions()
     for cipher_input in cipher.inputs:
-        all_avalanche_probability_vectors[cipher_input] = {}
-        for intermediate_output_name in list(intermediate_output_names.keys()):
-            all_avalanche_probability_vectors[cipher_input][intermediate_output_name] = []
+        flip_counts[cipher_input] = {}
+        for intermediate_output_name, (number_of_occurrences, output_bit_size) in \
+                dict_intermediate_output_names.items():
+            flip_counts[cipher_input][intermediate_output_name] = np.zeros(
+                (len(input_bits_to_analyse[cipher_input]), number_of_occurrences, output_bit_size), dtype=np.int64)
+
+    return flip_counts
+
 
-    inputs = generate_random_inputs(cipher, nb_samples)
+def update_avalanche_flip_counts(cipher, dict_intermediate_output_names, flip_counts, nb_samples, processes=1,
+                                 random_generator=None):
+    inputs = generate_random_inputs(cipher, nb_samples, random_generator)
     evaluated_inputs = evaluator.evaluate_vectorized(cipher, inputs, intermediate_outputs=True, verbosity=False)
     input_bits_to_analyse = cipher.get_all_inputs_bit_positions()
+    number_of_input_diffs_per_evaluation = max(1, MAXIMUM_NUMBER_OF_EVALUATED_SAMPLES // nb_samples)
+    if processes > 1:
+        number_of_input_diffs = sum(len(input_diffs) for input_diffs in input_bits_to_analyse.values())
+        number_of_input_diffs_per_evaluation = min(number_of_input_diffs_per_evaluation,
+                                                   math.ceil(number_of_input_diffs / processes))
+    tasks = []
     for index_of_specific_input, specific_input in enumerate(cipher.inputs):  # where the diff is injected
-        for input_diff in input_bits_to_analyse[specific_input]:
-            intermediate_avalanche_probability_vectors = generate_avalanche_probability_vectors(
-                cipher, intermediate_output_names, inputs, evaluated_inputs, input_diff, index_of_specific_input)
-            for intermediate_output_name in list(intermediate_output_names.keys()):
-                all_avalanche_probability_vectors[specific_input][intermediate_output_name].append(
-                    intermediate_avalanche_probability_vectors[intermediate_output_name])
+        input_diffs = list(input_bits_to_analyse[specific_input])
+        for start in range(0, len(input_diffs), number_of_input_diffs_per_evaluation):
+            tasks.append((index_of_specific_input, start,
+                          input_diffs[start:start + number_of_input_diffs_per_evaluation]))
+
+    if processes > 1:
+        evaluate_function, input_format = evaluator.get_vectorized_evaluator(cipher, intermediate_outputs=True)
+        # the inputs and their evaluations are shared with the workers instead of being pickled for each shard
+        shared_memories = []
+        try:
+            inputs_description = [evaluator.share_array(values, shared_memories) for values in inputs]
+            evaluated_inputs_description = {
+                intermediate_output_name: [evaluator.share_array(state, shared_memories)
+                                           for state in evaluated_inputs[intermediate_output_name]]
+                for intermediate_output_name in dict_intermediate_output_names}
+            all_intermediate_flip_counts = evaluator.get_process_pool(processes).starmap(
+                _count_avalanche_flips_shard,
+                [(evaluate_function.python_code_digest, evaluate_function.python_code_string, input_format,
+                  cipher.inputs_bit_size, dict_intermediate_output_names, inputs_description,
+                  evaluated_inputs_description, input_diffs, index_of_specific_input)
+                 for index_of_specific_input, _, input_diffs in tasks])
+        finally:
+            for shared_memory in shared_memories:
+                shared_memory.close()
+                shared_memory.unlink()
+    else:
+        all_intermediate_flip_counts = (
+            count_avalanche_flips(cipher, dict_intermediate_output_names, inputs, evaluated_inputs, input_diffs,
+                                  index_of_specific_input) for index_of_specific_input, _, input_diffs in tasks)
+
+    # the counters are integers, so that the sums do not depend on how the diffs were split
+    for (index_of_specific_input, start, input_diffs), intermediate_flip_counts in zip(
+            tasks, all_intermediate_flip_counts):
+        specific_input = cipher.inputs[index_of_specific_input]
+        for intermediate_output_name in list(dict_intermediate_output_names.keys()):
+            flip_counts[specific_input][intermediate_output_name][start:start + len(input_diffs)] += \
+                intermediate_flip_counts[intermediate_output_name]
+
+
+def get_avalanche_probability_vectors_from_flip_counts(flip_counts, number_of_samples):
+    all_avalanche_probability_vectors = {}
+    for cipher_input, input_flip_counts in flip_counts.items():
+        all_avalanche_probability_vectors[cipher_input] = {}
+        for intermediate_output_name, counts in input_flip_counts.items():
+            all_avalanche_probability_vectors[cipher_input][intermediate_output_name] = \
+                [[list(vector) for vector in vectors] for vectors in counts / number_of_samples]
 
     return all_avalanche_probability_vectors
 
 
-def generate_random_inputs(cipher, nb_samples):
+def are_avalanche_criteria_decided(flip_counts, number_of_samples, confidence_level,
+                                   avalanche_dependence_uniform_bias, criteria_parameters):
+    """
+    Return whether the outcome of every criterion is known at ``confidence_level``, for every output and diff.
+
+    The flip probability of each output bit is bounded by a Wilson score interval, for every input, diff, output and
+    occurrence of the output. The confidence of each interval is raised (Bonferroni correction) so that all these
+    intervals hold together with probability ``confidence_level``. The bounds on the flip probabilities give bounds on
+    the total of each criterion vector. The outcome of the criterion is decided if these bounds are both inside or
+    both outside the range where the criterion is satisfied. All the criteria are derived from the same intervals, so
+    that their outcomes are all right together with probability ``confidence_level`` as well.
+
+    A bit that never flipped is taken as independent of the diff once its flip probability is below
+    ``AVALANCHE_DEPENDENCE_MINIMUM_PROBABILITY``.
+
+    INPUT:
+
+    - ``flip_counts`` -- **dictionary**; the counters built by :py:func:`init_avalanche_flip_counts`
+    - ``number_of_samples`` -- **integer**; the number of samples accumulated in ``flip_counts``
+    - ``confidence_level`` -- **float**; the confidence required to decide a criterion
+    - ``avalanche_dependence_uniform_bias`` -- **float**; the bias of the avalanche dependence uniform criterion
+    - ``criteria_parameters`` -- **dictionary**; the list ``[run, expected_value_per_bit, threshold]`` of each
+      criterion
+    """
+    number_of_intervals = sum(counts.size for input_flip_counts in flip_counts.values()
+                              for counts in input_flip_counts.values())
+    z = NormalDist().inv_cdf(1 - (1 - confidence_level) / (2 * number_of_intervals))
+    for input_flip_counts in flip_counts.values():
+        for counts in input_flip_counts.values():
+            output_bit_size = counts.shape[2]
+            lower_bounds, upper_bounds = get_flip_probability_bounds(counts, number_of_samples, z)
+            for criterion_name, (run_criterion, expected_value_per_bit, threshold) in criteria_parameters.items():
+                if not run_criterion:
+                    continue
+                minimum_vectors, maximum_vectors = get_criterion_bounds(
+                    criterion_name, counts, lower_bounds, upper_bounds, avalanche_dependence_uniform_bias)
+                minimum_totals = minimum_vectors.sum(axis=2)
+                maximum_totals = maximum_vectors.sum(axis=2)
+                expected_value_per_output_block = output_bit_size * expected_value_per_bit
+                satisfied = (expected_value_per_output_block - threshold <= minimum_totals) & \
+                    (maximum_totals <= expected_value_per_output_block + threshold)
+                not_satisfied = (maximum_totals < expected_value_per_output_block - threshold) | \
+                    (minimum_totals > expected_value_per_output_block + threshold)
+                if not np.all(satisfied | not_satisfied):
+                    return False
+
+    return True
+
+
+def get_flip_probability_bounds(flip_counts, number_of_samples, z):
+    probabilities = flip_counts / number_of_samples
+    denominator = 1 + z ** 2 / number_of_samples
+    center = (probabilities + z ** 2 / (2 * number_of_samples)) / denominator
+    half_width = z * np.sqrt(probabilities * (1 - probabilities) / number_of_samples +
+                             z ** 2 / (4 * number_of_samples ** 2)) / denominator
+
+    return np.maximum(center - half_width, 0), np.minimum(center + half_width, 1)
+
+
+def get_criterion_bounds(criterion_name, flip_counts, lower_bounds, upper_bounds, avalanche_dependence_uniform_bias):
+    if criterion_name == "avalanche_dependence_vectors":
+        flipped = flip_counts > 0
+        return flipped, flipped | (upper_bounds >= AVALANCHE_DEPENDENCE_MINIMUM_PROBABILITY)
+    if criterion_name == "avalanche_dependence_uniform_vectors":
+        lowest, highest = 1 / 2 - avalanche_dependence_uniform_bias, 1 / 2 + avalanche_dependence_uniform_bias
+        return (lowest <= lower_bounds) & (upper_bounds <= highest), \
+            (lowest <= upper_bounds) & (lower_bounds <= highest)
+    if criterion_name == "avalanche_weight_vectors":
+        return lower_bounds, upper_bounds
+    lower_entropies = binary_entropy(lower_bounds)
+    upper_entropies = binary_entropy(upper_bounds)
+    contains_one_half = (lower_bounds <= 1 / 2) & (1 / 2 <= upper_bounds)
+
+    return np.minimum(lower_entropies, upper_entropies), \
+        np.where(contains_one_half, 1, np.maximum(lower_entropies, upper_entropies))
+
+
+def binary_entropy(probabilities):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        entropies = -probabilities * np.log2(probabilities) - (1 - probabilities) * np.log2(1 - probabilities)
+
+    return np.where((probabilities == 0) | (probabilities == 1), 0, entropies)
+
+
+def generate_random_inputs(cipher, nb_samples, random_generator=None):
     inputs = []
     for i in range(len(cipher.inputs)):
-        inputs.append(np.random.randint(256,
-                                        size=(math.ceil(cipher.inputs_bit_size[i] / 8), nb_samples),
-                                        dtype=np.uint8))
+        size = (math.ceil(cipher.inputs_bit_size[i] / 8), nb_samples)
+        if random_generator is None:
+            inputs.append(np.random.randint(256, size=size, dtype=np.uint8))
+        else:
+            inputs.append(random_generator.integers(256, size=size, dtype=np.uint8))
 
     return inputs
 
 
-def generate_avalanche_probability_vectors(cipher, dict_intermediate_output_names, inputs,
-                                           evaluated_inputs, input_diff, index_of_specific_input):
-    inputs_prime = generate_inputs_prime(cipher, index_of_specific_input, input_diff, inputs)
+def count_avalanche_flips(cipher, dict_intermediate_output_names, inputs,
+                          evaluated_inputs, input_diffs, index_of_specific_input):
+    # All the differences are evaluated at once: the samples of input_diffs[i] are the columns
+    # i * nb_samples to (i + 1) * nb_samples - 1 of the evaluated inputs prime
+    inputs_prime = generate_inputs_prime(cipher, index_of_specific_input, input_diffs, inputs)
     evaluated_inputs_prime = evaluator.evaluate_vectorized(cipher, inputs_prime,
                                                            intermediate_outputs=True, verbosity=False)
-    intermediate_avalanche_probability_vectors = {}
+
+    return count_avalanche_flips_from_evaluations(dict_intermediate_output_names, evaluated_inputs,
+                                                  evaluated_inputs_prime, len(input_diffs))
+
+
+def _count_avalanche_flips_shard(python_code_digest, python_code_string, input_format, inputs_bit_size,
+                                 dict_intermediate_output_names, inputs_description, evaluated_inputs_description,
+                                 input_diffs, index_of_specific_input):
+    evaluate_function = evaluator.get_worker_evaluator(python_code_digest, python_code_string)
+    shared_memories = []
+    try:
+        inputs = [evaluator.attach_shared_array(description, shared_memories) for description in inputs_description]
+        evaluated_inputs = {
+            intermediate_output_name: [evaluator.attach_shared_array(description, shared_memories)
+                                       for description in descriptions]
+            for intermediate_output_name, descriptions in evaluated_inputs_description.items()}
+        inputs_prime = generate_inputs_prime_from_bit_sizes(inputs_bit_size, index_of_specific_input, input_diffs,
+                                                            inputs)
+        evaluated_inputs_prime = evaluate_function(evaluator.convert_vectorized_input(inputs_prime, input_format),
+                                                   True)
+        return count_avalanche_flips_from_evaluations(dict_intermediate_output_names, evaluated_inputs,
+                                                      evaluated_inputs_prime, len(input_diffs))
+    finally:
+        for shared_memory in shared_memories:
+            shared_memory.close()
+
+
+def count_avalanche_flips_from_evaluations(dict_intermediate_output_names, evaluated_inputs, evaluated_inputs_prime,
+                                           number_of_input_diffs):
+    intermediate_flip_counts = {}
     for intermediate_output_name in list(dict_intermediate_output_names.keys()):
-        intermediate_avalanche_probability_vectors[intermediate_output_name] = \
-            [[0] * dict_intermediate_output_names[intermediate_output_name][1] for _ in range(
-                dict_intermediate_output_names[intermediate_output_name][0])]
+        number_of_occurrences, output_bit_size = dict_intermediate_output_names[intermediate_output_name]
         state = evaluated_inputs[intermediate_output_name]
         state_prime = evaluated_inputs_prime[intermediate_output_name]
-        for occurence_index in range(dict_intermediate_output_names[intermediate_output_name][0]):
-            c_diff = state[occurence_index] ^ state_prime[occurence_index]
-            for position in list(range(dict_intermediate_output_names[intermediate_output_name][1])):
-                temporary_position = np.average((c_diff[:, position // 8] >> (7 - position % 8)) & 1)
-                intermediate_avalanche_probability_vectors[intermediate_output_name][occurence_index][position] = \
-                    temporary_position
+        counts = np.empty((number_of_input_diffs, number_of_occurrences, output_bit_size), dtype=np.int64)
+        for occurence_index in range(number_of_occurrences):
+            number_of_bytes = state[occurence_index].shape[1]
+            c_diff = state_prime[occurence_index].reshape(number_of_input_diffs, -1, number_of_bytes) ^ \
+                state[occurence_index]
+            counts[:, occurence_index] = np.unpackbits(c_diff, axis=2)[:, :, :output_bit_size].sum(axis=1)
+        intermediate_flip_counts[intermediate_output_name] = counts
+
+    return intermediate_flip_counts
+
 
-    return intermediate_avalanche_probability_vectors
+def generate_inputs_prime(cipher, index_of_specific_input, input_diffs, inputs):
+    return generate_inputs_prime_from_bit_sizes(cipher.inputs_bit_size, index_of_specific_input, input_diffs, inputs)
 
 
-def generate_inputs_prime(cipher, index_of_specific_input, input_diff, inputs):
+def generate_inputs_prime_from_bit_sizes(inputs_bit_size, index_of_specific_input, input_diffs, inputs):
+    nb_samples = inputs[0].shape[1]
     inputs_prime = []
-    for input_index in range(len(cipher.inputs)):
+    for input_index in range(len(inputs_bit_size)):
+        tiled_input = np.tile(inputs[input_index], len(input_diffs))
         if input_index == index_of_specific_input:
-            diff = (1 << (cipher.inputs_bit_size[input_index] - 1 - input_diff))
-            diff_vectorized = np.array(
-                np.frombuffer(int.to_bytes(diff, math.ceil(cipher.inputs_bit_size[input_index] / 8), byteorder='big'),
-                              dtype=np.uint8)).reshape((-1, 1))
-            inputs_prime.append(inputs[input_index] ^ diff_vectorized)
-        else:
-            inputs_prime.append(inputs[input_index])
+            input_bit_size = inputs_bit_size[input_index]
+            number_of_bytes = math.ceil(input_bit_size / 8)
+            diff_vectorized = np.zeros((number_of_bytes, len(input_diffs)), dtype=np.uint8)
+            for i, input_diff in enumerate(input_diffs):
+                bit_position = input_bit_size - 1 - input_diff
+                diff_vectorized[number_of_bytes - 1 - bit_position // 8, i] = 1 << (bit_position % 8)
+            tiled_input ^= np.repeat(diff_vectorized, nb_samples, axis=1)
+        inputs_prime.append(tiled_input)
 
     return inputs_prime
 
 
 def compute_criterion_from_avalanche_probability_vectors(cipher, all_avalanche_probability_vectors,
                                                          avalanche_dependence_uniform_bias):
-    intermediate_output_names = add_intermediate_output_rounds_id_to_dictionary(cipher)
+    return compute_criterion_from_avalanche_probability_vectors_and_rounds(
+        add_intermediate_output_rounds_id_to_dictionary(cipher), all_avalanche_probability_vectors,
+        avalanche_dependence_uniform_bias)
+
+
+def compute_criterion_from_avalanche_probability_vectors_and_rounds(intermediate_output_names,
+                                                                    all_avalanche_probability_vectors,
+                                                                    avalanche_dependence_uniform_bias):
+    # intermediate_output_names is the dictionary returned by add_intermediate_output_rounds_id_to_dictionary
     criterion = {}
     for input_tag in all_avalanche_probability_vectors.keys():
         criterion[input_tag] = {}
@@ -348,14 +696,194 @@ def add_intermediate_output_rounds_id_to_dictionary(cipher):
     return dict_intermediate_output_names
 
 
+def compute_criteria_from_avalanche_probability_arrays(probabilities, avalanche_dependence_uniform_bias):
+    """
+    Return the vectors of each criterion computed from the array of the avalanche probabilities.
+
+    This is the array counterpart of :py:func:`compute_criterion_from_avalanche_probability_vectors`: the vectors of
+    every criterion have the shape of ``probabilities``.
+
+    INPUT:
+
+    - ``probabilities`` -- **np.array**; the flip probabilities, of shape (input bits, occurrences, output bits)
+    - ``avalanche_dependence_uniform_bias`` -- **float**; define the range where the probability of flipping should be
+
+    EXAMPLES::
+
+        sage: import numpy as np
+        sage: from claasp.cipher_modules.avalanche_tests import compute_criteria_from_avalanche_probability_arrays
+        sage: criteria = compute_criteria_from_avalanche_probability_arrays(np.array([[[0, 0.5, 1]]]), 0.05)
+        sage: criteria["avalanche_dependence_vectors"].tolist()
+        [[[0, 1, 1]]]
+        sage: criteria["avalanche_entropy_vectors"].tolist()
+        [[[0.0, 1.0, 0.0]]]
+    """
+    bias = avalanche_dependence_uniform_bias
+
+    return {"avalanche_dependence_vectors": (probabilities != 0).astype(np.uint8),
+            "avalanche_dependence_uniform_vectors":
+                ((1 / 2 - bias <= probabilities) & (probabilities <= 1 / 2 + bias)).astype(np.uint8),
+            "avalanche_weight_vectors": probabilities,
+            "avalanche_entropy_vectors": np.round(binary_entropy(probabilities), 5)}
+
+
+def get_avalanche_test_results_arrays(components_id, rounds, flip_counts, number_of_samples,
+                                      avalanche_dependence_uniform_bias, dict_parameters):
+    rounds = np.array(rounds)
+    criteria = compute_criteria_from_avalanche_probability_arrays(flip_counts / number_of_samples,
+                                                                  avalanche_dependence_uniform_bias)
+    test_results = {}
+    for criterion_name, (run_criterion, expected_value_per_bit, threshold) in dict_parameters.items():
+        if run_criterion:
+            test_results[criterion_name] = get_criterion_results_arrays(criteria[criterion_name], rounds,
+                                                                        components_id, expected_value_per_bit,
+                                                                        threshold)
+
+    return test_results
+
+
+def get_criterion_results_arrays(vectors, rounds, components_id, expected_value_per_bit, threshold):
+    input_bit_size, _, output_bit_size = vectors.shape
+    expected_value_per_output_block = output_bit_size * expected_value_per_bit
+    lowest_total = expected_value_per_output_block - threshold
+    highest_total = expected_value_per_output_block + threshold
+    totals = vectors.sum(axis=2)
+    criterion_satisfied = (lowest_total <= totals) & (totals <= highest_total)
+    # the average of the vectors of all the diffs and all the occurrences of each round, in order of appearance
+    average_rounds = np.array(list(dict.fromkeys(rounds.tolist())), dtype=rounds.dtype)
+    average_vectors = np.array([vectors[:, rounds == current_round].sum(axis=(0, 1))
+                                for current_round in average_rounds]) / input_bit_size
+    average_totals = average_vectors.sum(axis=1)
+
+    return {"input_bit_size": input_bit_size,
+            "output_bit_size": output_bit_size,
+            "max_possible_value_per_bit": 1,
+            "min_possible_value_per_bit": 0,
+            "expected_value_per_bit": expected_value_per_bit,
+            "max_possible_value_per_output_block": output_bit_size,
+            "min_possible_value_per_output_block": 0,
+            "expected_value_per_output_block": expected_value_per_output_block,
+            "rounds": rounds,
+            "output_component_ids": list(components_id),
+            "vectors": vectors,
+            "totals": totals,
+            "criterion_satisfied": criterion_satisfied,
+            "average_rounds": average_rounds,
+            "average_vectors": average_vectors,
+            "average_totals": average_totals,
+            "average_criterion_satisfied": (lowest_total <= average_totals) & (average_totals <= highest_total),
+            "worst_differences": get_worst_input_differences(criterion_satisfied, rounds)}
+
+
+def get_worst_input_differences(criterion_satisfied, rounds):
+    # the worst diffs are the ones whose last occurrence not satisfying the criterion is in the largest round
+    criterion_not_satisfied = ~criterion_satisfied
+    input_diffs = np.flatnonzero(criterion_not_satisfied.any(axis=1))
+    if input_diffs.size == 0:
+        return []
+    number_of_occurrences = criterion_not_satisfied.shape[1]
+    last_occurrences = number_of_occurrences - 1 - np.argmax(criterion_not_satisfied[input_diffs, ::-1], axis=1)
+    largest_rounds = rounds[last_occurrences]
+
+    return input_diffs[largest_rounds == largest_rounds.max()].tolist()
+
+
+def is_criterion_results_arrays(criterion_results):
+    return "vectors" in criterion_results
+
+
+def convert_avalanche_test_results_to_dictionary(avalanche_results):
+    """
+    Return the results of the avalanche tests in the format of nested dictionaries and lists.
+
+    The results computed with ``result_format="arrays"`` are converted, the others are returned unchanged.
+
+    INPUT:
+
+    - ``avalanche_results`` -- **dictionary**; the results of :py:meth:`~claasp.cipher.Cipher.diffusion_tests`
+
+    EXAMPLES::
+
+        sage: from claasp.cipher_modules.avalanche_tests import convert_avalanche_test_results_to_dictionary
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: speck = SpeckBlockCipher(block_bit_size=16, key_bit_size=32, number_of_rounds=5)
+        sage: d = speck.diffusion_tests(number_of_samples=100, result_format="arrays")
+        sage: d["test_results"]["key"]["round_output"]["avalanche_dependence_vectors"]["vectors"].shape
+        (32, 4, 16)
+        sage: d = convert_avalanche_test_results_to_dictionary(d)
+        sage: d["test_results"]["key"]["round_output"]["avalanche_dependence_vectors"]["differences"][0][
+        ....: "output_vectors"][0]["vector"]
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+    """
+    test_results = {}
+    for input_name, input_results in avalanche_results["test_results"].items():
+        test_results[input_name] = {}
+        for intermediate_output_name, output_results in input_results.items():
+            test_results[input_name][intermediate_output_name] = {}
+            for criterion_name, criterion_results in output_results.items():
+                if not is_criterion_results_arrays(criterion_results):
+                    test_results[input_name][intermediate_output_name][criterion_name] = criterion_results
+                    continue
+                test_results[input_name][intermediate_output_name][criterion_name] = \
+                    convert_criterion_results_to_dictionary(criterion_results)
+
+    return {**avalanche_results, "test_results": test_results}
+
+
+def convert_criterion_results_to_dictionary(criterion_results):
+    keys = ["input_bit_size", "output_bit_size", "max_possible_value_per_bit", "min_possible_value_per_bit",
+            "expected_value_per_bit", "max_possible_value_per_output_block", "min_possible_value_per_output_block",
+            "expected_value_per_output_block"]
+    dict_criterion_results = {key: criterion_results[key] for key in keys}
+    rounds = criterion_results["rounds"].tolist()
+    differences = []
+    for index_input_diff, (vectors, totals, criterion_satisfied) in enumerate(zip(
+            criterion_results["vectors"].tolist(), criterion_results["totals"].tolist(),
+            criterion_results["criterion_satisfied"].tolist())):
+        output_vectors = [{"vector": vector, "round": current_round, "total": total,
+                           "criterion_satisfied": satisfied, "output_component_id": component_id}
+                          for vector, current_round, total, satisfied, component_id in zip(
+                              vectors, rounds, totals, criterion_satisfied, criterion_results["output_component_ids"])]
+        differences.append({"input_difference_type": "regular", "input_difference_value": hex(1 << index_input_diff),
+                            "output_vectors": output_vectors})
+    output_vectors = [{"vector": vector, "total": total, "criterion_satisfied": satisfied, "round": current_round,
+                       "output_component_id": "None"}
+                      for vector, total, satisfied, current_round in zip(
+                          criterion_results["average_vectors"].tolist(), criterion_results["average_totals"].tolist(),
+                          criterion_results["average_criterion_satisfied"].tolist(),
+                          criterion_results["average_rounds"].tolist())]
+    differences.append({"input_difference_type": "average", "input_difference_value": 0,
+                        "output_vectors": output_vectors})
+    dict_criterion_results["differences"] = differences
+    dict_criterion_results["worst_differences"] = list(criterion_results["worst_differences"])
+
+    return dict_criterion_results
+
+
+def get_criterion_output_vectors(criterion_results, difference):
+    # the (vector, round) pairs of a diff, -1 standing for the average over all the diffs
+    if not is_criterion_results_arrays(criterion_results):
+        return [(output_vector["vector"], output_vector["round"])
+                for output_vector in criterion_results["differences"][difference]["output_vectors"]]
+    if difference == -1:
+        return list(zip(criterion_results["average_vectors"], criterion_results["average_rounds"].tolist()))
+
+    return list(zip(criterion_results["vectors"][difference], criterion_results["rounds"].tolist()))
+
+
+def get_average_criterion(criterion_results, round_i):
+    if not is_criterion_results_arrays(criterion_results):
+        return criterion_results['differences'][-1]['output_vectors'][round_i]
+
+    return {"total": criterion_results["average_totals"][round_i].item(),
+            "round": criterion_results["average_rounds"][round_i].item()}
+
+
 def get_average_criteria_by_round_input_output(diffusion_tests_results, round_i, input_tag, output_tag):
     output_tag_dict = diffusion_tests_results['test_results'][input_tag][output_tag]
-    avalanche_criterion = \
-        output_tag_dict['avalanche_dependence_vectors']['differences'][-1]['output_vectors'][round_i]
-    weight_criterion = \
-        output_tag_dict['avalanche_weight_vectors']['differences'][-1]['output_vectors'][round_i]
-    entropy_criterion = \
-        output_tag_dict['avalanche_entropy_vectors']['differences'][-1]['output_vectors'][round_i]
+    avalanche_criterion = get_average_criterion(output_tag_dict['avalanche_dependence_vectors'], round_i)
+    weight_criterion = get_average_criterion(output_tag_dict['avalanche_weight_vectors'], round_i)
+    entropy_criterion = get_average_criterion(output_tag_dict['avalanche_entropy_vectors'], round_i)
 
     return avalanche_criterion, weight_criterion, entropy_criterion
 
@@ -363,9 +891,7 @@ def get_average_criteria_by_round_input_output(diffusion_tests_results, round_i,
 def get_average_criteria_list_by_output_tag(diffusion_tests_results, output_tag):
     first_input_tag = list(diffusion_tests_results['test_results'].keys())[0]
     test_results_by_output_tag = diffusion_tests_results['test_results'][first_input_tag][output_tag]
-    vectors_size = len(
-        test_results_by_output_tag['avalanche_dependence_vectors']['differences'][-1]['output_vectors']
-    )
+    vectors_size = len(get_criterion_output_vectors(test_results_by_output_tag['avalanche_dependence_vectors'], -1))
     property_values_array = []
     for round_i in range(vectors_size):
         property_values = {}
@@ -473,8 +999,8 @@ def generate_graph_by_differences_positions(avalanche_results, code, criterion,
     for diff in differences:
         output_bit_size = avalanche_results["test_results"][input][intermediate_output][criterion][
             "output_bit_size"]
-        nb_occ = len(avalanche_results[
-                         "test_results"][input][intermediate_output][criterion]["differences"][diff]["output_vectors"])
+        nb_occ = len(get_criterion_output_vectors(
+            avalanche_results["test_results"][input][intermediate_output][criterion], diff))
         code.append("\t\\begin{table}[h!]")
         code.append("\t\t\\begin{center}")
         code.append("\t\t\t\\scalebox{0.34}{")
@@ -510,20 +1036,15 @@ def add_multicolumns_to_graph(avalanche_results, code, criterion, diff, input, i
         tmp = ["\t\t\t\\\\[0.5em]\\multicolumn{1}{c|}{rounds}"] + tmp + ["\\\\[0.5em]"]
         code.append(" ".join(tmp))
         float_format = "&{:0.2f}"
-        for occ in range(nb_occ):
-            vector = avalanche_results[
-                "test_results"][input][intermediate_output][criterion]["differences"][
-                diff]["output_vectors"][occ]["vector"]
-            round_index = avalanche_results[
-                "test_results"][input][intermediate_output][criterion]["differences"][
-                diff]["output_vectors"][occ]["round"]
+        output_vectors = get_criterion_output_vectors(
+            avalanche_results["test_results"][input][intermediate_output][criterion], diff)
+        for vector, round_index in output_vectors[:nb_occ]:
             s = [float_format.format(float(n)) if n != float
                  else float_format.format(n) for n in vector[i:i + step]]
             s = [f"{round_index + 1}"] + s
             code.append(" ".join(s) + "\\\\")
-        vector = avalanche_results[
-            "test_results"][input]["cipher_output"][criterion]["differences"][
-            diff]["output_vectors"][0]["vector"]
+        vector = get_criterion_output_vectors(
+            avalanche_results["test_results"][input]["cipher_output"][criterion], diff)[0][0]
         s = [float_format.format(float(n)) if n != float
              else float_format.format(n) for n in vector[i:i + step]]
         s = [f"{round_index + 2}"] + s
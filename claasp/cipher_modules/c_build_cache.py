@@ -0,0 +1,172 @@
+# ****************************************************************************
+# Copyright 2023 Technology Innovation Institute
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ****************************************************************************
+
+
+import os
+import re
+import fcntl
+import hashlib
+import tempfile
+from subprocess import call
+
+C_BUILD_CACHE_ENVIRONMENT_VARIABLE = 'CLAASP_C_BUILD_CACHE_DIR'
+
+
+def get_c_build_cache_directory():
+    """
+    Return the directory storing the compiled C artifacts, creating it if needed.
+
+    The directory is read from the environment variable ``CLAASP_C_BUILD_CACHE_DIR``; if it is not set, it is
+    ``claasp/c_build`` inside the user cache directory (``$XDG_CACHE_HOME`` or ``~/.cache``).
+
+    EXAMPLES::
+
+        sage: import os
+        sage: from claasp.cipher_modules.c_build_cache import get_c_build_cache_directory
+        sage: os.path.isdir(get_c_build_cache_directory())
+        True
+    """
+    directory = os.environ.get(C_BUILD_CACHE_ENVIRONMENT_VARIABLE)
+    if not directory:
+        user_cache_directory = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        directory = os.path.join(user_cache_directory, 'claasp', 'c_build')
+    os.makedirs(directory, exist_ok=True)
+
+    return directory
+
+
+def get_c_build_key(c_code, dependencies, compiler_flags):
+    """
+    Return the SHA-256 of the C source, the content of the files it depends on and the compiler flags.
+
+    INPUT:
+
+    - ``c_code`` -- **string**; the generated C source
+    - ``dependencies`` -- **list**; paths of the C sources and headers compiled together with ``c_code``
+    - ``compiler_flags`` -- **list**; the flags passed to the compiler
+
+    EXAMPLES::
+
+        sage: from claasp.cipher_modules.c_build_cache import get_c_build_key
+        sage: get_c_build_key('int main() {}', [], ['-O3']) == get_c_build_key('int main() {}', [], ['-O3'])
+        True
+        sage: get_c_build_key('int main() {}', [], ['-O3']) == get_c_build_key('int main() {}', [], ['-O2'])
+        False
+    """
+    digest = hashlib.sha256()
+    digest.update(c_code.encode())
+    for dependency in dependencies:
+        digest.update(b'\0' + os.path.basename(dependency).encode() + b'\0')
+        with open(dependency, 'rb') as f:
+            digest.update(f.read())
+    digest.update(b'\0' + '\0'.join(compiler_flags).encode())
+
+    return digest.hexdigest()
+
+
+def write_atomically(path, content):
+    directory, name = os.path.split(path)
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=f'.{name}.', suffix='.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'wb' if isinstance(content, bytes) else 'w') as f:
+            f.write(content)
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def build_c_artifact(name, c_code, dependencies, compiler_flags, suffix):
+    """
+    Return the path of the artifact compiled from ``c_code``, compiling it only if it is not already in the cache.
+
+    Artifacts are stored in the directory returned by :py:func:`get_c_build_cache_directory` under a name containing
+    the hash of the C source, of its dependencies and of the compiler flags, so that an unchanged cipher is never
+    rebuilt. The build is serialised across processes by an exclusive lock on a file named after the hash, and the
+    artifact is compiled to a temporary file and then renamed, so that concurrent jobs never see a partial artifact.
+
+    INPUT:
+
+    - ``name`` -- **string**; a readable prefix for the artifact (e.g. the id of the cipher)
+    - ``c_code`` -- **string**; the generated C source
+    - ``dependencies`` -- **list**; paths of the C sources compiled together with ``c_code``; headers included by
+      the source can be listed here too so that they are part of the hash
+    - ``compiler_flags`` -- **list**; the flags passed to ``gcc``
+    - ``suffix`` -- **string**; the extension of the artifact (e.g. ``.so``)
+
+    EXAMPLES::
+
+        sage: from claasp.cipher_modules.c_build_cache import build_c_artifact
+        sage: path = build_c_artifact('empty', 'int main() { return 0; }', [], ['-w'], '.o') # doctest: +SKIP
+        sage: path == build_c_artifact('empty', 'int main() { return 0; }', [], ['-w'], '.o') # doctest: +SKIP
+        True
+    """
+    directory = get_c_build_cache_directory()
+    key = get_c_build_key(c_code, dependencies, compiler_flags)
+    artifact_path = os.path.join(directory, f'{name}_{key}{suffix}')
+    if os.path.exists(artifact_path):
+        return artifact_path
+
+    with open(os.path.join(directory, f'{name}_{key}.lock'), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if os.path.exists(artifact_path):
+                return artifact_path
+            c_file_path = os.path.join(directory, f'{name}_{key}.c')
+            write_atomically(c_file_path, c_code)
+            temporary_artifact_path = os.path.join(directory, f'.{name}_{key}.{os.getpid()}{suffix}')
+            c_files = [c_file_path] + [dependency for dependency in dependencies if dependency.endswith('.c')]
+            return_code = call(['gcc'] + compiler_flags + c_files + ['-o', temporary_artifact_path])
+            if return_code != 0:
+                if os.path.exists(temporary_artifact_path):
+                    os.remove(temporary_artifact_path)
+                raise RuntimeError(f'gcc failed with exit status {return_code} while compiling {c_file_path}')
+            os.replace(temporary_artifact_path, artifact_path)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    return artifact_path
+
+
+def delete_c_artifacts(name):
+    """
+    Delete from the cache every artifact built by :py:func:`build_c_artifact` with the prefix ``name``.
+
+    The C sources and the lock files of these artifacts are deleted too, whatever the hash they were built for.
+
+    INPUT:
+
+    - ``name`` -- **string**; the prefix given to :py:func:`build_c_artifact`
+
+    EXAMPLES::
+
+        sage: import os
+        sage: from claasp.cipher_modules.c_build_cache import build_c_artifact, delete_c_artifacts
+        sage: path = build_c_artifact('empty', 'int main() { return 0; }', [], ['-w'], '.o') # doctest: +SKIP
+        sage: delete_c_artifacts('empty')
+        sage: os.path.exists(path) # doctest: +SKIP
+        False
+    """
+    directory = get_c_build_cache_directory()
+    artifact_name_pattern = re.compile(rf'\.?{re.escape(name)}_[0-9a-f]{{64}}(\..*)?')
+    for file_name in os.listdir(directory):
+        if artifact_name_pattern.fullmatch(file_name):
+            try:
+                os.remove(os.path.join(directory, file_name))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,213 @@
+
+# ****************************************************************************
+# Copyright 2023 Technology Innovation Institute
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ****************************************************************************
+
+
+import os
+import fcntl
+import pickle
+import hashlib
+import inspect
+from functools import lru_cache
+from importlib import metadata
+
+from claasp.cipher_modules.c_build_cache import write_atomically
+
+CIPHER_CACHE_ENVIRONMENT_VARIABLE = 'CLAASP_CIPHER_CACHE_DIR'
+CIPHER_FILE_FORMAT_VERSION = 1
+CLAASP_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_cipher_cache_directory():
+    """
+    Return the directory storing the prebuilt ciphers, creating it if needed.
+
+    The directory is read from the environment variable ``CLAASP_CIPHER_CACHE_DIR``; if it is not set, it is
+    ``claasp/ciphers`` inside the user cache directory (``$XDG_CACHE_HOME`` or ``~/.cache``).
+
+    EXAMPLES::
+
+        sage: import os
+        sage: from claasp.cipher_modules.cipher_cache import get_cipher_cache_directory
+        sage: os.path.isdir(get_cipher_cache_directory())
+        True
+    """
+    directory = os.environ.get(CIPHER_CACHE_ENVIRONMENT_VARIABLE)
+    if not directory:
+        user_cache_directory = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        directory = os.path.join(user_cache_directory, 'claasp', 'ciphers')
+    os.makedirs(directory, exist_ok=True)
+
+    return directory
+
+
+@lru_cache(maxsize=None)
+def get_claasp_digest():
+    """
+    Return the SHA-256 of the installed version of CLAASP and of all the files of the ``claasp`` package.
+
+    A cipher depends on much more than the module defining it: the components, the editor, the cipher itself, the
+    pickled form of the inputs and the data files read by some constructors (e.g. the matrices of LowMC). Hashing the
+    whole package makes a cached cipher stale whenever any of them changes. The digest is computed once per process.
+
+    EXAMPLES::
+
+        sage: from claasp.cipher_modules.cipher_cache import get_claasp_digest
+        sage: len(get_claasp_digest())
+        64
+    """
+    try:
+        version = metadata.version('claasp')
+    except metadata.PackageNotFoundError:
+        version = ''
+    digest = hashlib.sha256(f'{version}\0'.encode())
+    for directory, subdirectories, file_names in os.walk(CLAASP_DIRECTORY):
+        subdirectories[:] = sorted(subdirectory for subdirectory in subdirectories if subdirectory != '__pycache__')
+        for file_name in sorted(file_names):
+            file_path = os.path.join(directory, file_name)
+            digest.update(f'{os.path.relpath(file_path, CLAASP_DIRECTORY)}\0'.encode())
+            with open(file_path, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+
+    return digest.hexdigest()
+
+
+def get_cipher_key(cipher_class, parameters):
+    """
+    Return the SHA-256 of the constructor of a cipher, of its parameters and of the CLAASP package.
+
+    The key contains the format version of the cipher files and the digest returned by :py:func:`get_claasp_digest`,
+    so that it changes whenever CLAASP is upgraded or edited. The parameters are compared by name:
+    :py:func:`load_or_build_cipher` passes all the arguments of the constructor, positional ones included, by name and
+    with their default values.
+
+    INPUT:
+
+    - ``cipher_class`` -- **type**; the class constructing the cipher
+    - ``parameters`` -- **dictionary**; the keyword arguments passed to the constructor
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.cipher_modules.cipher_cache import get_cipher_key
+        sage: get_cipher_key(SpeckBlockCipher, {'number_of_rounds': 4}) == get_cipher_key(SpeckBlockCipher,
+        ....:                                                                             {'number_of_rounds': 4})
+        True
+        sage: get_cipher_key(SpeckBlockCipher, {'number_of_rounds': 4}) == get_cipher_key(SpeckBlockCipher,
+        ....:                                                                             {'number_of_rounds': 5})
+        False
+    """
+    digest = hashlib.sha256()
+    digest.update(f'{CIPHER_FILE_FORMAT_VERSION}\0{get_claasp_digest()}\0'
+                  f'{cipher_class.__module__}.{cipher_class.__qualname__}\0'.encode())
+    digest.update(repr(sorted(parameters.items())).encode())
+
+    return digest.hexdigest()
+
+
+def save_cipher(cipher, file_name):
+    """
+    Write the cipher to ``file_name`` in the binary format read by :py:func:`load_cipher`.
+
+    The cipher is pickled with the highest protocol: the bit positions of the inputs of the components are stored as
+    ranges (see :py:attr:`claasp.input.Input.compact_bit_positions`) and the compiled evaluators are left out. The
+    file is written to a temporary file and then renamed, so that a concurrent reader never sees a partial cipher.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; an instance of the object cipher
+    - ``file_name`` -- **string**; the path of the file
+    """
+    content = pickle.dumps((CIPHER_FILE_FORMAT_VERSION, cipher), protocol=pickle.HIGHEST_PROTOCOL)
+    write_atomically(os.path.abspath(file_name), content)
+
+
+def load_cipher(file_name):
+    """
+    Return the cipher written to ``file_name`` by :py:func:`save_cipher`.
+
+    .. WARNING::
+
+        The file is unpickled, so it must come from a trusted source.
+
+    INPUT:
+
+    - ``file_name`` -- **string**; the path of the file
+    """
+    with open(file_name, 'rb') as f:
+        content = pickle.load(f)
+    if not isinstance(content, tuple) or len(content) != 2 or content[0] != CIPHER_FILE_FORMAT_VERSION:
+        raise ValueError(f'{file_name} is not a cipher file of version {CIPHER_FILE_FORMAT_VERSION}.')
+
+    return content[1]
+
+
+def load_cached_cipher(cipher_path):
+    if not os.path.exists(cipher_path):
+        return None
+    try:
+        return load_cipher(cipher_path)
+    except Exception:
+        return None
+
+
+def load_or_build_cipher(cipher_class, *arguments, **parameters):
+    """
+    Return ``cipher_class(*arguments, **parameters)``, loading it from the cipher cache if it was already built.
+
+    Ciphers are stored in the directory returned by :py:func:`get_cipher_cache_directory` under a name containing the
+    key returned by :py:func:`get_cipher_key`. The build is serialised across processes by an exclusive lock on a file
+    named after the key, so that concurrent workers build each cipher only once. A cached file that cannot be loaded
+    (e.g. because it was written by an older version of the library) is rebuilt.
+
+    The arguments are bound to the signature of the constructor, so that passing an argument by position or by name,
+    or omitting an argument with its default value, gives the same cached cipher.
+
+    INPUT:
+
+    - ``cipher_class`` -- **type**; the class constructing the cipher
+    - ``*arguments`` -- the positional arguments passed to the constructor
+    - ``**parameters`` -- the keyword arguments passed to the constructor
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.cipher_modules.cipher_cache import load_or_build_cipher
+        sage: speck = load_or_build_cipher(SpeckBlockCipher, number_of_rounds=4)
+        sage: speck.as_python_dictionary() == SpeckBlockCipher(number_of_rounds=4).as_python_dictionary()
+        True
+    """
+    bound_arguments = inspect.signature(cipher_class).bind(*arguments, **parameters)
+    bound_arguments.apply_defaults()
+    directory = get_cipher_cache_directory()
+    key = get_cipher_key(cipher_class, bound_arguments.arguments)
+    cipher_path = os.path.join(directory, f'{cipher_class.__name__}_{key}.pickle')
+    cipher = load_cached_cipher(cipher_path)
+    if cipher is not None:
+        return cipher
+
+    with open(os.path.join(directory, f'{cipher_class.__name__}_{key}.lock'), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            cipher = load_cached_cipher(cipher_path)
+            if cipher is None:
+                cipher = cipher_class(*bound_arguments.args, **bound_arguments.kwargs)
+                save_cipher(cipher, cipher_path)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    return cipher
@@ -20,10 +20,11 @@
 import os
 import math
 import inspect
-from subprocess import call
+from copy import copy
 
 import claasp
 from claasp.component import free_input
+from claasp.cipher_modules.c_build_cache import build_c_artifact, delete_c_artifacts
 from claasp.name_mappings import (SBOX, LINEAR_LAYER, MIX_COLUMN, WORD_OPERATION, CONSTANT,
                                   CONCATENATE, PADDING, INTERMEDIATE_OUTPUT, CIPHER_OUTPUT)
 
@@ -34,14 +35,15 @@ TII_C_LIB_PATH = f'{tii_dir_path}/cipher_modules/'
 
 
 def delete_generated_evaluate_c_shared_library(cipher):
-    name = cipher.id + "_evaluate"
-    call(["rm", TII_C_LIB_PATH + name + ".c"])
-    call(["rm", TII_C_LIB_PATH + name + ".o"])
-    call(["rm", TII_C_LIB_PATH + "generic_bit_based_c_functions.o"])
+    for name in (cipher.id + "_evaluate", cipher.id + "_evaluate_batch"):
+        delete_c_artifacts(name)
+    compiled_evaluators = cipher.compiled_evaluators
+    for key in [key for key in compiled_evaluators if key[1] == 'c_shared_library']:
+        del compiled_evaluators[key]
 
 
-def generate_bit_based_c_code(cipher, intermediate_output, verbosity):
-    code = ['#include <stdio.h>', '#include <stdbool.h>', '#include <stdlib.h>',
+def generate_bit_based_c_code(cipher, intermediate_output, verbosity, batch_entry_point=False):
+    code = ['#include <stdio.h>', '#include <stdbool.h>', '#include <stdlib.h>', '#include <string.h>',
             '#include "generic_bit_based_c_functions.h"\n']
     function_args = []
     for cipher_input in cipher.inputs:
@@ -57,6 +59,9 @@ def generate_bit_based_c_code(cipher, intermediate_output, verbosity):
     code.append('\tuint8_t **linear_transformation;\n')
     code.extend(get_rounds_bit_based_c_code(cipher, intermediate_output, verbosity))
     code.append('}')
+    if batch_entry_point:
+        code.extend(get_evaluate_batch_bit_based_c_code(cipher))
+        return '\n'.join(code)
     code.append('int main(int argc, char *argv[]) {')
     evaluate_args = []
     for i in range(len(cipher.inputs)):
@@ -74,6 +79,26 @@ def generate_bit_based_c_code(cipher, intermediate_output, verbosity):
     return '\n'.join(code)
 
 
+def get_evaluate_batch_bit_based_c_code(cipher):
+    input_byte_sizes = [math.ceil(bit_size / 8) for bit_size in cipher.inputs_bit_size]
+    output_byte_size = math.ceil(cipher.output_bit_size / 8)
+    code = ['void evaluate_batch(const uint8_t *in, uint8_t *out, size_t n) {',
+            '\tfor (size_t sample = 0; sample < n; sample++) {',
+            f'\t\tconst uint8_t *sample_in = in + sample * {sum(input_byte_sizes)};']
+    offset = 0
+    for cipher_input, bit_size, byte_size in zip(cipher.inputs, cipher.inputs_bit_size, input_byte_sizes):
+        code.append(f'\t\tBitString *{cipher_input} = zero_bitstring({bit_size});')
+        code.append(f'\t\tmemcpy({cipher_input} -> list, sample_in + {offset}, {byte_size});')
+        offset += byte_size
+    code.append(f'\t\tBitString *output = evaluate({", ".join(cipher.inputs)});')
+    code.append(f'\t\tmemcpy(out + sample * {output_byte_size}, output -> list, {output_byte_size});')
+    code.append(f'\t\tdelete({", ".join(cipher.inputs)}, output);')
+    code.append('\t}')
+    code.append('}')
+
+    return code
+
+
 def get_rounds_bit_based_c_code(cipher, intermediate_output, verbosity):
     c_variables = []
     string_dictionary = {}
@@ -219,7 +244,8 @@ def get_word_operation_component_bit_based_c_code(component, verbosity):
 
 
 def generate_bit_based_vectorized_python_code_string(cipher, store_intermediate_outputs=False,
-                                                     verbosity=False, convert_output_to_bytes=False):
+                                                     verbosity=False, convert_output_to_bytes=False,
+                                                     selected_outputs=None):
     """
     Return string python code needed to evaluate a cipher using a vectorized implementation bit based oriented.
 
@@ -231,6 +257,9 @@ def generate_bit_based_vectorized_python_code_string(cipher, store_intermediate_
     - ``verbosity`` -- **boolean** (default: `False`); set to True to make the Python code print the input/output of
       each component
     - ``convert_output_to_bytes`` -- **boolean** (default: `False`)
+    - ``selected_outputs`` -- **tuple** (default: `None`); the outputs to store, as returned by
+      :py:func:`get_selected_outputs`; if given, the code returns a dictionary with only these outputs and stops
+      after the last of them
 
     EXAMPLES::
 
@@ -245,7 +274,8 @@ def generate_bit_based_vectorized_python_code_string(cipher, store_intermediate_
             'def evaluate(input, store_intermediate_outputs):', '  intermediateOutputs={}']
 
     code.extend([f'  {cipher.inputs[i]}=input[{i}]' for i in range(len(cipher.inputs))])
-    for component in cipher.get_all_components():
+    components, report = optimize_components(cipher, store_intermediate_outputs, selected_outputs)
+    for component in components:
         params = prepare_input_bit_based_vectorized_python_code_string(component)
         component_types_allowed = ['constant', 'linear_layer', 'concatenate', 'mix_column',
                                    'sbox', 'cipher_output', 'intermediate_output']
@@ -257,10 +287,11 @@ def generate_bit_based_vectorized_python_code_string(cipher, store_intermediate_
         name = component.id
         if verbosity and component.type != 'constant':
             code.append(f'  bit_vector_print_as_hex_values("{name}_output", {name})')
-    if store_intermediate_outputs:
+    if store_intermediate_outputs or selected_outputs is not None:
         code.append('  return intermediateOutputs')
     else:
         code.append('  return intermediateOutputs["cipher_output"]')
+    code.append(get_optimization_report_python_code_string(report))
 
     return '\n'.join(code)
 
@@ -282,7 +313,233 @@ def constant_to_bitstring(val, output_size):
     return ret
 
 
-def generate_byte_based_vectorized_python_code_string(cipher, store_intermediate_outputs=False, verbosity=False):
+def generate_bitsliced_python_code_string(cipher, store_intermediate_outputs=False, verbosity=False,
+                                          selected_outputs=None):
+    """
+    Return string python code needed to evaluate a cipher using a bitsliced implementation.
+
+    Each bit of the state is a row of uint64 lanes, each lane holding 64 samples; SBoxes are evaluated through their
+    algebraic normal form and bit permutations are reindexing of the rows.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; a cipher instance
+    - ``store_intermediate_outputs`` -- **boolean** (default: `False`); set this flag to True in order to return a list
+      with each round output
+    - ``verbosity`` -- **boolean** (default: `False`); set to True to make the Python code print the output of each
+      component
+    - ``selected_outputs`` -- **tuple** (default: `None`); the outputs to store, as returned by
+      :py:func:`get_selected_outputs`; if given, the code returns a dictionary with only these outputs and stops
+      after the last of them
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.present_block_cipher import PresentBlockCipher
+        sage: from claasp.cipher_modules import code_generator
+        sage: present = PresentBlockCipher()
+        sage: string_python_code = code_generator.generate_bitsliced_python_code_string(present)
+        sage: string_python_code.split("\n")[0]
+        'from claasp.cipher_modules.generic_functions_bitsliced import *'
+    """
+    code = ['from claasp.cipher_modules.generic_functions_bitsliced import *\n',
+            'def evaluate(input, number_of_samples, store_intermediate_outputs):', '  intermediateOutputs={}']
+
+    code.extend([f'  {cipher.inputs[i]}=input[{i}]' for i in range(len(cipher.inputs))])
+    components, report = optimize_components(cipher, store_intermediate_outputs, selected_outputs)
+    for component in components:
+        params = [f'bitsliced_select_word({component.input_id_links[i]}, {component.input_bit_positions[i]})'
+                  for i in range(len(component.input_id_links))]
+        component_types_allowed = ['constant', 'linear_layer', 'concatenate', 'mix_column',
+                                   'sbox', 'cipher_output', 'intermediate_output']
+        component_descriptions_allowed = ['ROTATE', 'SHIFT', 'SHIFT_BY_VARIABLE_AMOUNT', 'NOT', 'XOR',
+                                          'MODADD', 'MODSUB', 'OR', 'AND']
+        if component.type in component_types_allowed or (component.type == 'word_operation' and
+                                                         component.description[0] in component_descriptions_allowed):
+            code.extend(component.get_bitsliced_python_code(params))
+        if verbosity and component.type != 'constant':
+            code.append(f'  bitsliced_print_as_hex_values("{component.id}_output", {component.id})')
+    if store_intermediate_outputs or selected_outputs is not None:
+        code.append('  return intermediateOutputs')
+    else:
+        code.append('  return intermediateOutputs["cipher_output"]')
+    code.append(get_optimization_report_python_code_string(report))
+
+    return '\n'.join(code)
+
+
+def linear_layer_to_xor_indices(matrix):
+    """
+    Return, for each output bit of a linear layer, the list of the input bits to be XORed.
+
+    INPUT:
+
+    - ``matrix`` -- **list**; the binary matrix of the linear layer, with one row per input bit
+
+    EXAMPLES::
+
+        sage: from claasp.cipher_modules.code_generator import linear_layer_to_xor_indices
+        sage: linear_layer_to_xor_indices([[0, 1, 1], [1, 0, 1], [0, 0, 1]])
+        [[1], [0], [0, 1, 2]]
+    """
+    return [[i for i in range(len(matrix)) if matrix[i][j]] for j in range(len(matrix[0]))]
+
+
+def gf2n_multiply(a, b, polynomial, word_size):
+    product = 0
+    while b:
+        if b & 1:
+            product ^= a
+        b >>= 1
+        a <<= 1
+        if (a >> word_size) & 1:
+            a ^= polynomial
+
+    return product
+
+
+def mix_column_to_xor_indices(matrix, polynomial, word_size):
+    """
+    Return, for each output bit of a mix column, the list of the input bits to be XORed.
+
+    INPUT:
+
+    - ``matrix`` -- **list**; the matrix of the mix column, with entries in GF(2^word_size)
+    - ``polynomial`` -- **integer**; the modulus of GF(2^word_size), including the leading term; if it is 0 or 257,
+      the entries of the matrix are 0 or 1
+    - ``word_size`` -- **integer**; the bit size of the words
+
+    EXAMPLES::
+
+        sage: from claasp.cipher_modules.code_generator import mix_column_to_xor_indices
+        sage: mix_column_to_xor_indices([[1, 1], [0, 1]], 0, 2)
+        [[0, 2], [1, 3], [2], [3]]
+    """
+    xor_indices = [[] for _ in range(len(matrix) * word_size)]
+    for j in range(len(matrix[0])):
+        for bit in range(word_size):
+            word = 1 << (word_size - 1 - bit)
+            for i in range(len(matrix)):
+                if polynomial > 0 and polynomial != 257:
+                    output_word = gf2n_multiply(word, matrix[i][j], polynomial, word_size)
+                else:
+                    output_word = word if matrix[i][j] else 0
+                for output_bit in range(word_size):
+                    if (output_word >> (word_size - 1 - output_bit)) & 1:
+                        xor_indices[i * word_size + output_bit].append(j * word_size + bit)
+
+    return xor_indices
+
+
+def get_word_based_vectorized_word_size(cipher):
+    """
+    Return the word size if the cipher can be evaluated with native numpy words, False otherwise.
+
+    The cipher must be word based (see :py:meth:`~claasp.cipher.Cipher.is_power_of_2_word_based`) and contain only
+    word operations that map to numpy ufuncs.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; a cipher instance
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.ciphers.block_ciphers.present_block_cipher import PresentBlockCipher
+        sage: from claasp.cipher_modules import code_generator
+        sage: code_generator.get_word_based_vectorized_word_size(SpeckBlockCipher())
+        16
+        sage: code_generator.get_word_based_vectorized_word_size(PresentBlockCipher())
+        False
+    """
+    word_size = cipher.is_power_of_2_word_based()
+    if not word_size or any(bit_size % word_size for bit_size in cipher.inputs_bit_size):
+        return False
+    component_types_allowed = ['constant', 'concatenate', 'cipher_output', 'intermediate_output']
+    component_descriptions_allowed = ['ROTATE', 'SHIFT', 'SHIFT_BY_VARIABLE_AMOUNT', 'NOT', 'XOR',
+                                      'MODADD', 'MODSUB', 'OR', 'AND']
+    for component in cipher.get_all_components():
+        if component.output_bit_size % word_size:
+            return False
+        if component.type == 'word_operation':
+            if component.description[0] not in component_descriptions_allowed:
+                return False
+        elif component.type not in component_types_allowed:
+            return False
+
+    return word_size
+
+
+def generate_word_based_vectorized_python_code_string(cipher, word_size, store_intermediate_outputs=False,
+                                                      verbosity=False, selected_outputs=None):
+    """
+    Return string python code needed to evaluate a cipher using a vectorized implementation word based oriented.
+
+    Each word is stored as a native numpy unsigned integer, so that every word operation is a single ufunc call.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; a cipher instance
+    - ``word_size`` -- **integer**; the word size of the cipher (8, 16, 32 or 64)
+    - ``store_intermediate_outputs`` -- **boolean** (default: `False`); set this flag to True in order to return a list
+      with each round output
+    - ``verbosity`` -- **boolean** (default: `False`); set to True to make the Python code print the output of each
+      component
+    - ``selected_outputs`` -- **tuple** (default: `None`); the outputs to store, as returned by
+      :py:func:`get_selected_outputs`; if given, the code returns a dictionary with only these outputs and stops
+      after the last of them
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.cipher_modules import code_generator
+        sage: speck = SpeckBlockCipher()
+        sage: string_python_code = code_generator.generate_word_based_vectorized_python_code_string(speck, 16)
+        sage: string_python_code.split("\n")[0]
+        'from claasp.cipher_modules.generic_functions_vectorized_word import *'
+    """
+    cipher.sort_cipher()
+
+    code = ['from claasp.cipher_modules.generic_functions_vectorized_word import *\n',
+            'def evaluate(input, store_intermediate_outputs):', '  intermediateOutputs={}']
+    bit_sizes = {}
+    for i in range(len(cipher.inputs)):
+        code.append(f'  {cipher.inputs[i]}=input[{i}]')
+        bit_sizes[cipher.inputs[i]] = cipher.inputs_bit_size[i]
+    components, report = optimize_components(cipher, store_intermediate_outputs, selected_outputs)
+    for component in components:
+        params = prepare_input_word_based_vectorized_python_code_string(bit_sizes, component, word_size)
+        bit_sizes[component.id] = component.output_bit_size
+        code.extend(component.get_word_based_vectorized_python_code(params, word_size))
+        if verbosity and component.type != 'constant':
+            code.append(f'  word_vector_print_as_hex_values("{component.id}_output", {component.id})')
+    if store_intermediate_outputs or selected_outputs is not None:
+        code.append('  return intermediateOutputs')
+    else:
+        code.append('  return intermediateOutputs["cipher_output"]')
+    code.append(get_optimization_report_python_code_string(report))
+
+    return '\n'.join(code)
+
+
+def prepare_input_word_based_vectorized_python_code_string(bit_sizes, component, word_size):
+    if component.type == 'constant':
+        return None
+
+    params = []
+    for input_id_link, bit_positions in zip(component.input_id_links, component.input_bit_positions):
+        words = [bit_positions[i] // word_size for i in range(0, len(bit_positions), word_size)]
+        if words == list(range(bit_sizes[input_id_link] // word_size)):
+            params.append(input_id_link)
+        else:
+            params.append(f'{input_id_link}[{words}]')
+    if len(params) == 1:
+        return params[0]
+
+    return f'word_vector_CONCAT([{", ".join(params)}])'
+
+
+def generate_byte_based_vectorized_python_code_string(cipher, store_intermediate_outputs=False, verbosity=False,
+                                                      selected_outputs=None):
     r"""
     Return string python code needed to evaluate a cipher using a vectorized implementation byte based oriented.
 
@@ -293,6 +550,9 @@ def generate_byte_based_vectorized_python_code_string(cipher, store_intermediate
       with each round output
     - ``verbosity`` -- **boolean** (default: `False`); set to True to make the Python code print the input/output of
       each component
+    - ``selected_outputs`` -- **tuple** (default: `None`); the outputs to store, as returned by
+      :py:func:`get_selected_outputs`; if given, the code returns a dictionary with only these outputs and stops
+      after the last of them
 
     EXAMPLES::
 
@@ -311,7 +571,8 @@ def generate_byte_based_vectorized_python_code_string(cipher, store_intermediate
     for i in range(len(cipher.inputs)):
         code.append(f'  {cipher.inputs[i]}=input[{i}]')
         bit_sizes[cipher.inputs[i]] = cipher.inputs_bit_size[i]
-    for component in cipher.get_all_components():
+    components, report = optimize_components(cipher, store_intermediate_outputs, selected_outputs)
+    for component in components:
         params = prepare_input_byte_based_vectorized_python_code_string(bit_sizes, component)
         bit_sizes[component.id] = component.output_bit_size
         component_types_allowed = ['constant', 'linear_layer', 'concatenate', 'mix_column',
@@ -327,10 +588,11 @@ def generate_byte_based_vectorized_python_code_string(cipher, store_intermediate
         if verbosity and component.type != 'constant':
             code.append(f'  byte_vector_print_as_hex_values("{name}_input", {params})')
             code.append(f'  byte_vector_print_as_hex_values("{name}_output", {name})')
-    if store_intermediate_outputs:
+    if store_intermediate_outputs or selected_outputs is not None:
         code.append('  return intermediateOutputs')
     else:
         code.append('  return intermediateOutputs["cipher_output"]')
+    code.append(get_optimization_report_python_code_string(report))
 
     return '\n'.join(code)
 
@@ -425,39 +687,82 @@ def constant_to_repr(val, output_size):
     return ret
 
 
-def generate_evaluate_c_code_shared_library(cipher, intermediate_output, verbosity):
-    name = cipher.id + "_evaluate"
+def get_c_build_arguments(cipher):
     cipher_word_size = cipher.is_power_of_2_word_based()
     if cipher_word_size:
-        if not os.path.exists(TII_C_LIB_PATH + f"generic_word_{cipher_word_size}_based_c_functions.o"):
-            call(["gcc", "-w", "-c", TII_C_LIB_PATH + "generic_word_based_c_functions.c", "-o", TII_C_LIB_PATH +
-                  f"generic_word_{cipher_word_size}_based_c_functions.o", "-D", f"word_size={cipher_word_size}"])
-
-        f = open(TII_C_LIB_PATH + name + ".c", "w+")
-        f.write(cipher.generate_word_based_c_code(cipher_word_size, intermediate_output, verbosity))
-        f.close()
-
-        call(["gcc",
-              "-w",
-              TII_C_LIB_PATH + f"generic_word_{cipher_word_size}_based_c_functions.o",
-              TII_C_LIB_PATH + name + ".c",
-              "-o",
-              TII_C_LIB_PATH + name + ".o",
-              "-D",
-              f"word_size={cipher_word_size}"])
+        generic_functions_file = "generic_word_based_c_functions"
+        word_size_flags = ["-D", f"word_size={cipher_word_size}"]
+    else:
+        generic_functions_file = "generic_bit_based_c_functions"
+        word_size_flags = []
+    dependencies = [TII_C_LIB_PATH + generic_functions_file + ".c", TII_C_LIB_PATH + generic_functions_file + ".h"]
+
+    return cipher_word_size, dependencies, ["-w", "-I", TII_C_LIB_PATH] + word_size_flags
+
+
+def generate_evaluate_c_code_shared_library(cipher, intermediate_output, verbosity):
+    """
+    Build the executable evaluating the cipher from the command line and return its path.
+
+    The executable is stored in the C build cache (see :py:mod:`claasp.cipher_modules.c_build_cache`), keyed by the
+    hash of the generated C code and of the compiler flags, so that an unchanged cipher is compiled only once, even
+    across processes.
 
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; a cipher instance
+    - ``intermediate_output`` -- **boolean**; set this flag to True in order to make the C code print a dictionary
+      with each intermediate output
+    - ``verbosity`` -- **boolean**; set this flag to True in order to make the C code print the input/output of each
+      component
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.cipher_modules import code_generator
+        sage: speck = SpeckBlockCipher(number_of_rounds=2)
+        sage: code_generator.generate_evaluate_c_code_shared_library(speck, True, False).endswith('.o') # doctest: +SKIP
+        True
+    """
+    cipher_word_size, dependencies, compiler_flags = get_c_build_arguments(cipher)
+    if cipher_word_size:
+        c_code = cipher.generate_word_based_c_code(cipher_word_size, intermediate_output, verbosity)
     else:
-        generic_bit_based_c_functions_o_file = "generic_bit_based_c_functions.o"
-        if not os.path.exists(TII_C_LIB_PATH + generic_bit_based_c_functions_o_file):
-            call(["gcc", "-w", "-c", TII_C_LIB_PATH + "generic_bit_based_c_functions.c",
-                  "-o", TII_C_LIB_PATH + generic_bit_based_c_functions_o_file])
+        c_code = cipher.generate_bit_based_c_code(intermediate_output, verbosity)
+
+    return build_c_artifact(cipher.id + "_evaluate", c_code, dependencies, compiler_flags, ".o")
+
+
+def generate_evaluate_batch_c_shared_library(cipher):
+    """
+    Build a shared library exporting ``void evaluate_batch(const uint8_t *in, uint8_t *out, size_t n)``.
 
-        f = open(TII_C_LIB_PATH + name + ".c", "w+")
-        f.write(cipher.generate_bit_based_c_code(intermediate_output, verbosity))
-        f.close()
+    The function evaluates ``n`` samples in a single call. Each sample of ``in`` is the concatenation of the cipher
+    inputs, each one stored big-endian on the minimum number of bytes; each sample of ``out`` is the cipher output,
+    stored in the same way. The library is stored in the C build cache, keyed by the hash of the generated C code and
+    of the compiler flags, so that a modified cipher never reuses a library that is already loaded in the process and
+    an unchanged one is compiled only once. Return the path of the library.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; a cipher instance
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.cipher_modules import code_generator
+        sage: speck = SpeckBlockCipher(number_of_rounds=2)
+        sage: code_generator.generate_evaluate_batch_c_shared_library(speck).endswith('.so') # doctest: +SKIP
+        True
+    """
+    cipher_word_size, dependencies, compiler_flags = get_c_build_arguments(cipher)
+    if cipher_word_size:
+        c_code = generate_word_based_c_code(cipher, cipher_word_size, False, False, batch_entry_point=True)
+    else:
+        c_code = generate_bit_based_c_code(cipher, False, False, batch_entry_point=True)
 
-        call(["gcc", "-w", TII_C_LIB_PATH + generic_bit_based_c_functions_o_file,
-              TII_C_LIB_PATH + name + ".c", "-o", TII_C_LIB_PATH + name + ".o"])
+    return build_c_artifact(cipher.id + "_evaluate_batch", c_code, dependencies,
+                            compiler_flags + ["-O3", "-shared", "-fPIC"], ".so")
 
 
 def generate_python_code_string(cipher, verbosity=False):
@@ -639,6 +944,434 @@ def build_function_call(component):
         raise NotImplementedError("Component not implemented yet")
 
 
+def generate_int_based_python_code_string(cipher, store_components_io=False, verbosity=False):
+    """
+    Return string python code needed to evaluate a cipher on Python integers.
+
+    Every component output is a Python integer; the bits selected by ``input_bit_positions`` are extracted with a plan
+    of shifts and masks computed once from the graph, one per run of consecutive bits, and binary linear layers and
+    mix columns are evaluated through lookup tables built when the code is compiled. The generated ``evaluate``
+    returns the same tuple as the one of :py:func:`generate_python_code_string`, but ``components_io`` is only
+    filled if ``store_components_io`` is True; otherwise the components are first simplified by
+    :py:func:`optimize_components`.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; a cipher instance
+    - ``store_components_io`` -- **boolean** (default: `False`); set this flag to True in order to record the input
+      and the output of each component
+    - ``verbosity`` -- **boolean** (default: `False`); set to True to make the Python code print the output of each
+      component
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.cipher_modules import code_generator
+        sage: speck = SpeckBlockCipher(number_of_rounds=2)
+        sage: string_python_code = code_generator.generate_int_based_python_code_string(speck)
+        sage: string_python_code.split("\\n")[0]
+        'from claasp.cipher_modules.generic_functions_int import *'
+        sage: "    rot_0_0_output = plaintext_output >> 16" in string_python_code
+        True
+    """
+    if store_components_io:
+        cipher.sort_cipher()
+        components = cipher.get_all_components()
+        report = None
+    else:
+        components, report = optimize_components(cipher)
+
+    tables_code = []
+    tables_names = {}
+    code = ['def evaluate(input):']
+    bit_sizes = {}
+    for i in range(len(cipher.inputs)):
+        code.append(f'    {cipher.inputs[i]}_output = int(input[{i}])')
+        bit_sizes[cipher.inputs[i]] = cipher.inputs_bit_size[i]
+    code.append('    intermediate_output = {}')
+    tags = []
+    for component in components:
+        if component.type in (INTERMEDIATE_OUTPUT, CIPHER_OUTPUT) and component.description[0] not in tags:
+            tags.append(component.description[0])
+    code.extend(f"    intermediate_output['{tag}'] = []" for tag in tags)
+    code.append('    components_io = {}')
+
+    for component in components:
+        input_bits = get_int_based_input_bits(component, bit_sizes)
+        code.extend(get_int_based_component_code(component, input_bits, bit_sizes, tables_code, tables_names))
+        bit_sizes[component.id] = component.output_bit_size
+        component_id_output = f'{component.id}_output'
+        if component.type in (INTERMEDIATE_OUTPUT, CIPHER_OUTPUT):
+            code.append(f"    intermediate_output['{component.description[0]}'].append({component_id_output})")
+        if component.type == CIPHER_OUTPUT:
+            code.append(f'    cipher_output = {component_id_output}')
+        if store_components_io:
+            component_input = select_bits_int_expression(input_bits, bit_sizes) if input_bits else '0'
+            code.append(f"    components_io['{component.id}'] = [{component_input}, {component_id_output}]")
+        if verbosity:
+            code.append(f"    int_print_as_hex_value('{component_id_output}', {component_id_output}, "
+                        f"{component.output_bit_size})")
+    code.append('    return cipher_output, intermediate_output, components_io')
+    code.append(get_optimization_report_python_code_string(report))
+
+    return '\n'.join(['from claasp.cipher_modules.generic_functions_int import *\n'] + tables_code + [''] + code)
+
+
+def get_int_based_input_bits(component, bit_sizes):
+    if component.type == CONSTANT:
+        return []
+    input_bits = []
+    for input_id_link, bit_positions in zip(component.input_id_links, component.input_bit_positions):
+        if bit_positions == [-1]:
+            bit_positions = range(bit_sizes[input_id_link])
+        input_bits.extend((input_id_link, position) for position in bit_positions)
+
+    return input_bits
+
+
+def select_bits_int_expression(input_bits, bit_sizes):
+    """
+    Return the Python expression extracting the bits ``input_bits`` from the integer outputs of the components.
+
+    Consecutive bits of the same component are extracted with a single shift and mask.
+
+    INPUT:
+
+    - ``input_bits`` -- **list**; the (component id, bit position) of each bit, most significant first
+    - ``bit_sizes`` -- **dictionary**; the output bit size of each component and cipher input
+
+    EXAMPLES::
+
+        sage: from claasp.cipher_modules.code_generator import select_bits_int_expression
+        sage: select_bits_int_expression([('x', 0), ('x', 1), ('y', 6), ('y', 7)], {'x': 4, 'y': 8})
+        '((x_output >> 2) << 2) | (y_output & 0x3)'
+    """
+    runs = []
+    for input_id_link, position in input_bits:
+        if runs and runs[-1][0] == input_id_link and runs[-1][2] == position - 1:
+            runs[-1][2] = position
+        else:
+            runs.append([input_id_link, position, position])
+
+    terms = []
+    offset = len(input_bits)
+    for input_id_link, first_position, last_position in runs:
+        run_bit_size = last_position - first_position + 1
+        offset -= run_bit_size
+        term = f'{input_id_link}_output'
+        shift_amount = bit_sizes[input_id_link] - 1 - last_position
+        if shift_amount:
+            term = f'({term} >> {shift_amount})'
+        if first_position:
+            term = f'({term} & {hex((1 << run_bit_size) - 1)})'
+        if offset:
+            term = f'({term} << {offset})'
+        terms.append(term)
+    if len(terms) == 1 and terms[0].startswith('('):
+        return terms[0][1:-1]
+
+    return ' | '.join(terms)
+
+
+def get_int_based_linear_layer_tables_name(input_masks, tables_code, tables_names):
+    chunk_bit_size = 8 if len(input_masks) <= 256 else 4
+    key = (tuple(input_masks), chunk_bit_size)
+    if key not in tables_names:
+        tables_names[key] = f'linear_layer_tables_{len(tables_names)}'
+        tables_code.append(f'{tables_names[key]} = int_linear_layer_tables('
+                           f'[{", ".join(hex(mask) for mask in input_masks)}], {chunk_bit_size})')
+
+    return f'{tables_names[key]}, {chunk_bit_size}'
+
+
+def get_int_based_component_code(component, input_bits, bit_sizes, tables_code, tables_names):
+    output = f'{component.id}_output'
+    output_bit_size = component.output_bit_size
+    if component.type == CONSTANT:
+        return [f'    {output} = {hex(int(component.description[0], 0))}']
+    component_input = select_bits_int_expression(input_bits, bit_sizes)
+    if component.type in (CONCATENATE, INTERMEDIATE_OUTPUT, CIPHER_OUTPUT):
+        return [f'    {output} = {component_input}']
+    if component.type == SBOX:
+        return [f'    {output} = {tuple(component.description)}[{component_input}]']
+    if component.type == LINEAR_LAYER:
+        matrix = component.description
+        input_masks = [sum(1 << (output_bit_size - 1 - j) for j in range(len(matrix[i])) if matrix[i][j])
+                       for i in reversed(range(len(matrix)))]
+        tables = get_int_based_linear_layer_tables_name(input_masks, tables_code, tables_names)
+        return [f'    {output} = int_linear_layer({component_input}, {tables})']
+    if component.type == MIX_COLUMN:
+        matrix, polynomial, word_size = component.description[:3]
+        if polynomial == 0:
+            return [f'    {output} = int_mix_column_over_integers({component_input}, {matrix}, {word_size})']
+        input_masks = []
+        for j in reversed(range(len(matrix[0]))):
+            for bit in range(word_size):
+                input_masks.append(sum(gf2n_multiply(1 << bit, matrix[i][j], polynomial, word_size)
+                                       << (word_size * (len(matrix) - 1 - i)) for i in range(len(matrix))))
+        tables = get_int_based_linear_layer_tables_name(input_masks, tables_code, tables_names)
+        return [f'    {output} = int_linear_layer({component_input}, {tables})']
+    if component.type == PADDING:
+        input_bit_size = len(input_bits) + (-len(input_bits)) % 4
+        distance_from_m512 = 512 - (input_bit_size % 512) - 1
+        zeros = distance_from_m512 - 64 if distance_from_m512 > 64 else distance_from_m512 + 448
+        return [f'    {output} = ((({component_input}) << 1 | 1) << {zeros + 64}) | {input_bit_size}']
+    if component.type == WORD_OPERATION:
+        return get_int_based_word_operation_code(component, input_bits, bit_sizes)
+
+    raise NotImplementedError("Component not implemented yet")
+
+
+def get_int_based_word_operation_code(component, input_bits, bit_sizes):
+    output = f'{component.id}_output'
+    output_bit_size = component.output_bit_size
+    output_mask = hex((1 << output_bit_size) - 1)
+    operation, parameter = component.description[:2]
+    if operation in ('XOR', 'AND', 'OR', 'MODADD', 'MODSUB'):
+        block_bit_size = len(input_bits) // parameter
+        operands = [select_bits_int_expression(input_bits[i * block_bit_size:(i + 1) * block_bit_size], bit_sizes)
+                    for i in range(parameter)]
+        operands = [f'({operand})' if ' ' in operand else operand for operand in operands]
+        if operation in ('XOR', 'AND', 'OR'):
+            symbol = {'XOR': ' ^ ', 'AND': ' & ', 'OR': ' | '}[operation]
+            return [f'    {output} = {symbol.join(operands)}']
+        symbol = ' + ' if operation == 'MODADD' else ' - '
+        return [f'    {output} = ({symbol.join(operands)}) & {output_mask}']
+    component_input = select_bits_int_expression(input_bits, bit_sizes)
+    if operation == 'NOT':
+        return [f'    {output} = ({component_input}) ^ {output_mask}']
+    if operation == 'ROTATE':
+        rotation_amount = parameter % output_bit_size
+        code = [f'    {output} = {component_input}']
+        if rotation_amount:
+            code.append(f'    {output} = (({output} >> {rotation_amount}) | '
+                        f'({output} << {output_bit_size - rotation_amount})) & {output_mask}')
+        return code
+    if operation == 'SHIFT':
+        if abs(parameter) >= output_bit_size:
+            return [f'    {output} = 0']
+        if parameter < 0:
+            return [f'    {output} = (({component_input}) << {-parameter}) & {output_mask}']
+        return [f'    {output} = ({component_input}) >> {parameter}']
+    if operation in ('SHIFT_BY_VARIABLE_AMOUNT', 'ROTATE_BY_VARIABLE_AMOUNT'):
+        word = select_bits_int_expression(input_bits[:output_bit_size], bit_sizes)
+        amount = select_bits_int_expression(input_bits[output_bit_size:], bit_sizes)
+        code = [f'    {output} = {word}']
+        if operation == 'SHIFT_BY_VARIABLE_AMOUNT':
+            code.append(f'    amount = ({amount}) % {output_bit_size}')
+            if parameter > 0:
+                code.append(f'    {output} = {output} >> amount')
+            else:
+                code.append(f'    {output} = ({output} << amount) & {output_mask}')
+        else:
+            code.append(f'    amount = (({amount}) * {parameter}) % {output_bit_size}')
+            code.append(f'    {output} = (({output} >> amount) | ({output} << ({output_bit_size} - amount))) & '
+                        f'{output_mask}')
+        return code
+
+    raise NotImplementedError(f"Word operation {operation} not implemented yet")
+
+
+def get_selected_outputs(cipher, outputs):
+    """
+    Return the outputs selected by ``outputs`` as a tuple of pairs ``(tag, indices)``, sorted by tag.
+
+    The index of an output component is its position among the output components of the cipher with the same tag
+    (e.g. the index of the ``round_output`` of the sixth round is 5); negative indices count from the last one.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; a cipher instance
+    - ``outputs`` -- **dict** or **list**; a dictionary mapping each tag (e.g. ``'round_output'``) to the list of the
+      indices to keep, or to None to keep all of them; a list of tags is a shortcut for a dictionary mapping them to
+      None
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.cipher_modules import code_generator
+        sage: speck = SpeckBlockCipher(number_of_rounds=4)
+        sage: code_generator.get_selected_outputs(speck, {'round_output': [-1, 1], 'cipher_output': None})
+        (('cipher_output', (0,)), ('round_output', (1, 2)))
+    """
+    cipher.sort_cipher()
+    number_of_outputs = {}
+    for component in cipher.get_all_components():
+        if component.type in (INTERMEDIATE_OUTPUT, CIPHER_OUTPUT):
+            tag = component.description[0]
+            number_of_outputs[tag] = number_of_outputs.get(tag, 0) + 1
+    if not isinstance(outputs, dict):
+        outputs = dict.fromkeys(outputs)
+
+    selected_outputs = []
+    for tag, indices in sorted(outputs.items()):
+        if tag not in number_of_outputs:
+            raise ValueError(f"The cipher has no output tagged {tag!r}; available tags: {sorted(number_of_outputs)}")
+        if indices is None:
+            indices = range(number_of_outputs[tag])
+        normalized_indices = set()
+        for index in indices:
+            if not -number_of_outputs[tag] <= index < number_of_outputs[tag]:
+                raise ValueError(f"Index {index} out of range for the {number_of_outputs[tag]} outputs "
+                                 f"tagged {tag!r}")
+            normalized_indices.add(index % number_of_outputs[tag])
+        selected_outputs.append((tag, tuple(sorted(normalized_indices))))
+
+    return tuple(selected_outputs)
+
+
+def get_optimization_report_python_code_string(report):
+    """
+    Return the line of generated code storing the report of :py:func:`optimize_components` in the module.
+
+    The report is attached to the compiled function as its ``optimization_report`` attribute (see
+    :py:func:`~claasp.cipher_modules.evaluator.compile_python_code_string`).
+
+    INPUT:
+
+    - ``report`` -- **dictionary**; the report returned by :py:func:`optimize_components`, or None
+
+    EXAMPLES::
+
+        sage: from claasp.cipher_modules import code_generator
+        sage: code_generator.get_optimization_report_python_code_string({'components': 3})
+        "\\nOPTIMIZATION_REPORT = {'components': 3}"
+    """
+    return f'\nOPTIMIZATION_REPORT = {report!r}'
+
+
+def optimize_components(cipher, store_intermediate_outputs=True, selected_outputs=None):
+    """
+    Return the components from which the code generators emit code, and a report of the eliminated components.
+
+    The pass runs over the sorted components of the cipher, without modifying it:
+
+    - every component whose inputs are all constants is evaluated and folded into a constant with the same id;
+    - the inputs taken from a ``concatenate`` or an ``intermediate_output`` component are forwarded to the components
+      feeding it;
+    - the components whose output does not reach a ``cipher_output`` (or an ``intermediate_output`` if
+      ``store_intermediate_outputs`` is True) are removed; if ``selected_outputs`` is given, only the selected output
+      components are kept, so that nothing after the last of them is evaluated.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; a cipher instance
+    - ``store_intermediate_outputs`` -- **boolean** (default: `True`); set this flag to False to remove the
+      ``intermediate_output`` components
+    - ``selected_outputs`` -- **tuple** (default: `None`); the output components to keep, as returned by
+      :py:func:`get_selected_outputs`
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.cipher_modules import code_generator
+        sage: speck = SpeckBlockCipher(number_of_rounds=4)
+        sage: components, report = code_generator.optimize_components(speck, store_intermediate_outputs=False)
+        sage: report['eliminated_components'] > 0
+        True
+        sage: report['components'] - report['eliminated_components'] == len(components)
+        True
+        sage: selected_outputs = code_generator.get_selected_outputs(speck, {'round_output': [1]})
+        sage: components, _ = code_generator.optimize_components(speck, selected_outputs=selected_outputs)
+        sage: components[-1].id
+        'intermediate_output_1_12'
+    """
+    from claasp.components.constant_component import Constant
+
+    cipher.sort_cipher()
+    all_components = cipher.get_all_components()
+    bit_sizes = dict(zip(cipher.inputs, cipher.inputs_bit_size))
+    for component in all_components:
+        bit_sizes[component.id] = component.output_bit_size
+
+    constants_values = {}
+    forwarded_bits = {}
+    folded_components = 0
+    forwarded_links = 0
+    components = []
+    for component in all_components:
+        input_bits = []
+        for input_id_link, position in get_int_based_input_bits(component, bit_sizes):
+            if input_id_link in forwarded_bits:
+                input_bits.append(forwarded_bits[input_id_link][position])
+            else:
+                input_bits.append((input_id_link, position))
+        if any(input_id_link in forwarded_bits for input_id_link in component.input_id_links):
+            forwarded_links += sum(input_id_link in forwarded_bits for input_id_link in component.input_id_links)
+            component = get_component_with_input_bits(component, input_bits)
+
+        if component.type == CONSTANT:
+            constants_values[component.id] = int(component.description[0], 0)
+        elif component.type not in (INTERMEDIATE_OUTPUT, CIPHER_OUTPUT) and input_bits and \
+                all(input_id_link in constants_values for input_id_link, _ in input_bits):
+            value = evaluate_int_based_component(component, input_bits, bit_sizes, constants_values)
+            if value is not None:
+                constant = Constant(0, 0, component.output_bit_size, value)
+                constant._id = component.id
+                component = constant
+                constants_values[component.id] = value
+                folded_components += 1
+        if component.type in (CONCATENATE, INTERMEDIATE_OUTPUT):
+            forwarded_bits[component.id] = input_bits
+        components.append(component)
+
+    if selected_outputs is None:
+        output_ids = {component.id for component in components if component.type == CIPHER_OUTPUT or
+                      (component.type == INTERMEDIATE_OUTPUT and store_intermediate_outputs)}
+    else:
+        selected_indices = dict(selected_outputs)
+        output_ids = set()
+        number_of_outputs = {}
+        for component in components:
+            if component.type in (INTERMEDIATE_OUTPUT, CIPHER_OUTPUT):
+                tag = component.description[0]
+                if number_of_outputs.get(tag, 0) in selected_indices.get(tag, ()):
+                    output_ids.add(component.id)
+                number_of_outputs[tag] = number_of_outputs.get(tag, 0) + 1
+
+    kept_components = []
+    needed_ids = set()
+    for component in reversed(components):
+        if component.id in output_ids or component.id in needed_ids:
+            needed_ids.update(component.input_id_links)
+            kept_components.append(component)
+    kept_components.reverse()
+    report = {'components': len(all_components), 'folded_components': folded_components,
+              'forwarded_links': forwarded_links, 'eliminated_components': len(all_components) - len(kept_components)}
+
+    return kept_components, report
+
+
+def get_component_with_input_bits(component, input_bits):
+    input_id_links = []
+    input_bit_positions = []
+    for input_id_link, position in input_bits:
+        if input_id_links and input_id_links[-1] == input_id_link:
+            input_bit_positions[-1].append(position)
+        else:
+            input_id_links.append(input_id_link)
+            input_bit_positions.append([position])
+    forwarded_component = copy(component)
+    forwarded_component._input = copy(component._input)
+    forwarded_component.set_input_id_links(input_id_links)
+    forwarded_component.set_input_bit_positions(input_bit_positions)
+
+    return forwarded_component
+
+
+def evaluate_int_based_component(component, input_bits, bit_sizes, constants_values):
+    tables_code = []
+    try:
+        code = get_int_based_component_code(component, input_bits, bit_sizes, tables_code, {})
+    except NotImplementedError:
+        return None
+    namespace = {f'{input_id_link}_output': value for input_id_link, value in constants_values.items()}
+    exec('\n'.join(['from claasp.cipher_modules.generic_functions_int import *'] + tables_code +
+                   [line.strip() for line in code]), namespace)
+
+    return namespace[f'{component.id}_output']
+
+
 def generate_python_code_string_for_continuous_diffusion_analysis(cipher, verbosity=False):
     """
     Return a string containing the python code that defines a self.evaluate_continuous_diffusion_analysis() method.
@@ -762,7 +1495,7 @@ def build_continuous_diffusion_analysis_function_call(component):
         raise NotImplementedError("Continuous Diffusion Analysis component not implemented yet")
 
 
-def generate_word_based_c_code(cipher, word_size, intermediate_output, verbosity):
+def generate_word_based_c_code(cipher, word_size, intermediate_output, verbosity, batch_entry_point=False):
     code = ['#include <stdio.h>', '#include <stdbool.h>', '#include <stdlib.h>',
             '#include "generic_word_based_c_functions.h"\n']
     function_args = []
@@ -779,7 +1512,10 @@ def generate_word_based_c_code(cipher, word_size, intermediate_output, verbosity
         code.append('\tchar *str;')
     code.extend(get_rounds_word_based_c_code(cipher, intermediate_output, verbosity, word_size))
     code.append('}')
-    code.append('int main(int argc, char *argv[]) {{')
+    if batch_entry_point:
+        code.extend(get_evaluate_batch_word_based_c_code(cipher, word_size))
+        return '\n'.join(code)
+    code.append('int main(int argc, char *argv[]) {')
     evaluate_args = []
     for i in range(len(cipher.inputs)):
         evaluate_args.append(cipher.inputs[i])
@@ -796,6 +1532,42 @@ def generate_word_based_c_code(cipher, word_size, intermediate_output, verbosity
     return '\n'.join(code)
 
 
+def get_evaluate_batch_word_based_c_code(cipher, word_size):
+    word_byte_size = word_size // 8
+    input_byte_sizes = [bit_size // 8 for bit_size in cipher.inputs_bit_size]
+    output_byte_size = cipher.output_bit_size // 8
+    code = ['static Word load_word(const uint8_t *bytes) {',
+            '\tWord word = 0;',
+            f'\tfor (int i = 0; i < {word_byte_size}; i++)',
+            '\t\tword = (word << 8) | bytes[i];',
+            '\treturn word;',
+            '}',
+            'static void store_word(uint8_t *bytes, Word word) {',
+            f'\tfor (int i = {word_byte_size - 1}; i >= 0; i--) {{',
+            '\t\tbytes[i] = word & 0xff;',
+            '\t\tword >>= 8;',
+            '\t}',
+            '}',
+            'void evaluate_batch(const uint8_t *in, uint8_t *out, size_t n) {',
+            '\tfor (size_t sample = 0; sample < n; sample++) {',
+            f'\t\tconst uint8_t *sample_in = in + sample * {sum(input_byte_sizes)};',
+            f'\t\tuint8_t *sample_out = out + sample * {output_byte_size};']
+    offset = 0
+    for cipher_input, bit_size, byte_size in zip(cipher.inputs, cipher.inputs_bit_size, input_byte_sizes):
+        code.append(f'\t\tWordString *{cipher_input} = create_wordstring({bit_size // word_size}, false);')
+        code.append(f'\t\tfor (int i = 0; i < {bit_size // word_size}; i++)')
+        code.append(f'\t\t\t{cipher_input} -> list[i] = load_word(sample_in + {offset} + i * {word_byte_size});')
+        offset += byte_size
+    code.append(f'\t\tWordString *output = evaluate({", ".join(cipher.inputs)});')
+    code.append('\t\tfor (int i = 0; i < output -> string_size; i++)')
+    code.append(f'\t\t\tstore_word(sample_out + i * {word_byte_size}, output -> list[i]);')
+    code.append(f'\t\tdelete({", ".join(cipher.inputs)}, output);')
+    code.append('\t}')
+    code.append('}')
+
+    return code
+
+
 def get_rounds_word_based_c_code(cipher, intermediate_output, verbosity, word_size):
     rounds_code = []
     wordstring_variables = []
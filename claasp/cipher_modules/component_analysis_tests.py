@@ -29,7 +29,6 @@ from claasp.cipher_modules.generic_functions import (SHIFT, ROTATE, mix_column_g
 from claasp.name_mappings import (SBOX, LINEAR_LAYER, MIX_COLUMN, WORD_OPERATION, INTERMEDIATE_OUTPUT, CIPHER_OUTPUT,
                                   CONSTANT)
 
-import matplotlib.pyplot as plt
 from math import pi, log2
 
 
@@ -734,6 +733,8 @@ def select_boolean_function(component, boolean_polynomial_ring):
 
 
 def print_component_analysis_as_radar_charts(results):
+    import matplotlib.pyplot as plt
+
     SMALL_SIZE = 10
     MEDIUM_SIZE = 11
     BIG_SIZE = 12
@@ -811,6 +812,8 @@ def print_component_analysis_as_radar_charts(results):
 
 
 def fill_area(ax, categories, plot_number, positions, results):
+    import matplotlib.pyplot as plt
+
     text = ""
     for category in categories:
         if category in ["boomerang_uniformity", "differential_uniformity"]:
@@ -825,6 +828,8 @@ def fill_area(ax, categories, plot_number, positions, results):
 
 
 def initialise_spider_plot(plot_number, results):
+    import matplotlib.pyplot as plt
+
     is_component_word_operation = results[plot_number]["type"] == "word_operation"
     is_component_rotate_or_shift = results[plot_number]["description"][0] in ["ROTATE", "SHIFT"]
     if is_component_word_operation and is_component_rotate_or_shift:
@@ -17,30 +17,186 @@
 # ****************************************************************************
 
 
+import math
+import atexit
+import ctypes
+import hashlib
 import numpy as np
 from types import ModuleType
+from multiprocessing import Pool, resource_tracker
 from subprocess import Popen, PIPE
+from multiprocessing.shared_memory import SharedMemory
 
 from claasp.cipher_modules import code_generator
+from claasp.cipher_modules.generic_functions_bitsliced import bitsliced_from_byte_vector
+from claasp.cipher_modules.generic_functions_vectorized_word import word_vector_from_byte_vector
 
 
-def evaluate(cipher, cipher_input, intermediate_output=False, verbosity=False):
-    python_code_string = code_generator.generate_python_code_string(cipher, verbosity)
+PROCESS_POOLS = {}
+WORKER_EVALUATORS = {}
+MAXIMUM_NUMBER_OF_WORKER_EVALUATORS = 32
 
-    f_module = ModuleType("evaluate")
+
+def compile_python_code_string(python_code_string, module_name="evaluate"):
+    f_module = ModuleType(module_name)
     exec(python_code_string, f_module.__dict__)
+    evaluate_function = f_module.evaluate
+    evaluate_function.python_code_string = python_code_string
+    evaluate_function.python_code_digest = hashlib.sha256(python_code_string.encode()).hexdigest()
+    evaluate_function.optimization_report = f_module.__dict__.get('OPTIMIZATION_REPORT')
+
+    return evaluate_function
+
+
+def get_compiled_evaluator(cipher, evaluator_type, generate_python_code_string, **flags):
+    """
+    Return the compiled ``evaluate`` function of the cipher, generating it only if it is not already cached.
+
+    The compiled functions are stored in the cipher and keyed by its structural fingerprint, the type of the evaluator
+    and the flags used to generate the code. The editor empties the cache every time it modifies the cipher.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; a cipher instance
+    - ``evaluator_type`` -- **string**; name of the evaluator (e.g. python, bit_vectorized, byte_vectorized)
+    - ``generate_python_code_string`` -- **function**; the code generator called as
+      ``generate_python_code_string(cipher, **flags)``
+    - ``**flags`` -- keyword arguments for the code generator
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.cipher_modules import code_generator, evaluator
+        sage: speck = SpeckBlockCipher(number_of_rounds=2)
+        sage: f = evaluator.get_compiled_evaluator(speck, 'python', code_generator.generate_python_code_string,
+        ....:                                      verbosity=False)
+        sage: f is evaluator.get_compiled_evaluator(speck, 'python', code_generator.generate_python_code_string,
+        ....:                                       verbosity=False)
+        True
+    """
+    key = (cipher.get_structural_fingerprint(), evaluator_type, tuple(sorted(flags.items())))
+    compiled_evaluators = cipher.compiled_evaluators
+    if key not in compiled_evaluators:
+        python_code_string = generate_python_code_string(cipher, **flags)
+        compiled_evaluators[key] = compile_python_code_string(python_code_string)
+
+    return compiled_evaluators[key]
+
+
+def get_cached_cipher_property(cipher, property_name, compute_property, *arguments):
+    """
+    Return ``compute_property(cipher, *arguments)``, computing it only if it is not already cached.
+
+    The values are stored next to the compiled evaluators of the cipher, with the same kind of key, so that the
+    properties walking the whole cipher (e.g. its word size) are not computed again by every evaluation and are
+    dropped as soon as the editor modifies the cipher.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; a cipher instance
+    - ``property_name`` -- **string**; the name of the property
+    - ``compute_property`` -- **function**; the function computing the property
+    - ``*arguments`` -- hashable arguments passed to ``compute_property`` after the cipher
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.cipher_modules import code_generator, evaluator
+        sage: speck = SpeckBlockCipher(number_of_rounds=2)
+        sage: word_size_function = code_generator.get_word_based_vectorized_word_size
+        sage: evaluator.get_cached_cipher_property(speck, 'word_size', word_size_function)
+        16
+        sage: len(speck.compiled_evaluators)
+        1
+    """
+    key = (cipher.get_structural_fingerprint(), property_name, arguments)
+    compiled_evaluators = cipher.compiled_evaluators
+    if key not in compiled_evaluators:
+        compiled_evaluators[key] = compute_property(cipher, *arguments)
+
+    return compiled_evaluators[key]
+
+
+def evaluate(cipher, cipher_input, intermediate_output=False, verbosity=False, backend='bitstring'):
+    if backend == 'bitstring':
+        evaluate_function = get_compiled_evaluator(cipher, 'python', code_generator.generate_python_code_string,
+                                                   verbosity=verbosity)
+    elif backend == 'int':
+        evaluate_function = get_compiled_evaluator(cipher, 'python_int',
+                                                   code_generator.generate_int_based_python_code_string,
+                                                   store_components_io=intermediate_output, verbosity=verbosity)
+    else:
+        raise ValueError(f"backend must be 'bitstring' or 'int', not {backend!r}")
 
     if intermediate_output:
-        return f_module.evaluate(cipher_input)
+        return evaluate_function(cipher_input)
+
+    return evaluate_function(cipher_input)[0]
+
+
+def get_evaluate_batch_c_function(cipher):
+    """
+    Return the ``evaluate_batch`` function of the C shared library of the cipher, building and loading it only once.
+
+    The loaded function is stored together with the compiled Python evaluators of the cipher, so that it is dropped
+    as soon as the editor modifies the cipher.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; a cipher instance
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.cipher_modules import evaluator
+        sage: speck = SpeckBlockCipher(number_of_rounds=2)
+        sage: f = evaluator.get_evaluate_batch_c_function(speck) # doctest: +SKIP
+        sage: f is evaluator.get_evaluate_batch_c_function(speck) # doctest: +SKIP
+        True
+    """
+    key = (cipher.get_structural_fingerprint(), 'c_shared_library', ())
+    compiled_evaluators = cipher.compiled_evaluators
+    if key not in compiled_evaluators:
+        library_path = code_generator.generate_evaluate_batch_c_shared_library(cipher)
+        evaluate_batch_function = ctypes.CDLL(library_path).evaluate_batch
+        evaluate_batch_function.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t]
+        evaluate_batch_function.restype = None
+        compiled_evaluators[key] = evaluate_batch_function
+
+    return compiled_evaluators[key]
 
-    return f_module.evaluate(cipher_input)[0]
+
+def evaluate_batch_using_c(cipher, cipher_input):
+    evaluate_batch_function = get_evaluate_batch_c_function(cipher)
+    number_of_samples = cipher_input[0].shape[1]
+    right_aligned_inputs = []
+    for values, bit_size in zip(cipher_input, cipher.inputs_bit_size):
+        if bit_size % 8:
+            bits = np.unpackbits(values, axis=0)[:bit_size]
+            padding = np.zeros((8 - bit_size % 8, number_of_samples), dtype=np.uint8)
+            values = np.packbits(np.vstack([padding, bits]), axis=0)
+        right_aligned_inputs.append(values)
+    samples = np.ascontiguousarray(np.vstack(right_aligned_inputs).transpose(), dtype=np.uint8)
+    output = np.empty((number_of_samples, math.ceil(cipher.output_bit_size / 8)), dtype=np.uint8)
+    evaluate_batch_function(samples.ctypes.data, output.ctypes.data, number_of_samples)
+    if cipher.output_bit_size % 8:
+        output = np.packbits(np.unpackbits(output, axis=1)[:, 8 - cipher.output_bit_size % 8:], axis=1)
+
+    return [output]
 
 
 def evaluate_using_c(cipher, inputs, intermediate_output, verbosity):
-    cipher.generate_evaluate_c_code_shared_library(intermediate_output, verbosity)
-    name = cipher.id + "_evaluate"
+    if not intermediate_output and not verbosity:
+        evaluate_batch_function = get_evaluate_batch_c_function(cipher)
+        sample = b''.join(value.to_bytes(math.ceil(bit_size / 8), byteorder='big')
+                          for value, bit_size in zip(inputs, cipher.inputs_bit_size))
+        output = ctypes.create_string_buffer(math.ceil(cipher.output_bit_size / 8))
+        evaluate_batch_function(sample, output, 1)
+        return int.from_bytes(output.raw, byteorder='big')
+
+    executable_path = cipher.generate_evaluate_c_code_shared_library(intermediate_output, verbosity)
     c_cipher_inputs = [hex(value) for value in inputs]
-    process = Popen([code_generator.TII_C_LIB_PATH + name + ".o"] + c_cipher_inputs, stdout=PIPE)
+    process = Popen([executable_path] + c_cipher_inputs, stdout=PIPE)
     output = process.stdout
 
     if verbosity and intermediate_output:
@@ -69,42 +225,370 @@ def evaluate_using_c(cipher, inputs, intermediate_output, verbosity):
             dict_str += line.decode('utf-8')
 
         function_output = eval(dict_str)
-    else:
-        function_output = int(output.read().decode('utf-8')[:-1], 16)
-
-    code_generator.delete_generated_evaluate_c_shared_library(cipher)
 
     return function_output
 
 
-def evaluate_vectorized(cipher, cipher_input, intermediate_outputs=False, verbosity=False):
+def get_vectorized_evaluator(cipher, intermediate_outputs=False, verbosity=False, selected_outputs=None):
+    """
+    Return the compiled vectorized ``evaluate`` function of the cipher and the format of its inputs.
+
+    The format is ``('bit', inputs_bit_size)``, ``('word', word_size)`` or ``('byte',)``, see
+    :py:func:`convert_vectorized_input`.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; a cipher instance
+    - ``intermediate_outputs`` -- **boolean** (default: `False`)
+    - ``verbosity`` -- **boolean** (default: `False`)
+    - ``selected_outputs`` -- **tuple** (default: `None`); the outputs to return, as returned by
+      :py:func:`~claasp.cipher_modules.code_generator.get_selected_outputs`
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.cipher_modules import evaluator
+        sage: evaluator.get_vectorized_evaluator(SpeckBlockCipher())[1]
+        ('word', 16)
+    """
+    word_size = get_cached_cipher_property(cipher, 'word_based_vectorized_word_size',
+                                           code_generator.get_word_based_vectorized_word_size)
     if np.any(np.array(cipher.inputs_bit_size) % 8 != 0):
-        python_code_string = code_generator \
-            .generate_bit_based_vectorized_python_code_string(cipher,
-                                                              store_intermediate_outputs=intermediate_outputs,
-                                                              verbosity=verbosity,
-                                                              convert_output_to_bytes=True)
-        cipher_input = [np.unpackbits(cipher_input[i], axis=0)[:x, ]
-                        for i, x in enumerate(cipher.inputs_bit_size)]
+        evaluate_function = get_compiled_evaluator(
+            cipher, 'bit_vectorized', code_generator.generate_bit_based_vectorized_python_code_string,
+            store_intermediate_outputs=intermediate_outputs, verbosity=verbosity, convert_output_to_bytes=True,
+            selected_outputs=selected_outputs)
+        return evaluate_function, ('bit', tuple(cipher.inputs_bit_size))
+    if word_size:
+        evaluate_function = get_compiled_evaluator(
+            cipher, 'word_vectorized', code_generator.generate_word_based_vectorized_python_code_string,
+            word_size=word_size, store_intermediate_outputs=intermediate_outputs, verbosity=verbosity,
+            selected_outputs=selected_outputs)
+        return evaluate_function, ('word', word_size)
+    evaluate_function = get_compiled_evaluator(
+        cipher, 'byte_vectorized', code_generator.generate_byte_based_vectorized_python_code_string,
+        store_intermediate_outputs=intermediate_outputs, verbosity=verbosity, selected_outputs=selected_outputs)
+
+    return evaluate_function, ('byte',)
+
+
+def convert_vectorized_input(cipher_input, input_format):
+    if input_format[0] == 'bit':
+        return [np.unpackbits(values, axis=0)[:bit_size, ] for values, bit_size in zip(cipher_input, input_format[1])]
+    if input_format[0] == 'word':
+        return [word_vector_from_byte_vector(values, input_format[1]) for values in cipher_input]
+
+    return cipher_input
+
+
+def evaluate_vectorized(cipher, cipher_input, intermediate_outputs=False, verbosity=False, workers=1, outputs=None):
+    if outputs is not None:
+        selected_outputs = get_selected_outputs(cipher, outputs)
+        evaluate_function, input_format = get_vectorized_evaluator(cipher, False, verbosity, selected_outputs)
+        intermediate_outputs = True
     else:
-        python_code_string = code_generator \
-            .generate_byte_based_vectorized_python_code_string(
-                cipher,
-                store_intermediate_outputs=intermediate_outputs, verbosity=verbosity)
+        evaluate_function, input_format = get_vectorized_evaluator(cipher, intermediate_outputs, verbosity)
+    number_of_samples = max(values.shape[1] for values in cipher_input)
+    if workers > 1 and not verbosity and number_of_samples >= 2 * workers:
+        return evaluate_vectorized_in_parallel(evaluate_function, input_format, cipher_input, intermediate_outputs,
+                                               workers)
 
-    f_module = ModuleType("evaluate")
-    exec(python_code_string, f_module.__dict__)
+    return evaluate_function(convert_vectorized_input(cipher_input, input_format), intermediate_outputs)
+
+
+def get_selected_outputs(cipher, outputs):
+    if not isinstance(outputs, dict):
+        outputs = dict.fromkeys(outputs)
+    outputs_key = tuple((tag, None if indices is None else tuple(indices)) for tag, indices in outputs.items())
+
+    return get_cached_cipher_property(
+        cipher, 'selected_outputs',
+        lambda cipher, outputs_key: code_generator.get_selected_outputs(cipher, dict(outputs_key)), outputs_key)
+
+
+def get_optimization_report(cipher, intermediate_outputs=False, outputs=None):
+    """
+    Return the report of the components eliminated from the code run by :py:func:`evaluate_vectorized`.
+
+    The report is the one returned by :py:func:`~claasp.cipher_modules.code_generator.optimize_components` when the
+    evaluator was generated: the number of components of the cipher, of folded components, of forwarded links and of
+    eliminated components.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; a cipher instance
+    - ``intermediate_outputs`` -- **boolean** (default: `False`); as in :py:func:`evaluate_vectorized`
+    - ``outputs`` -- **dict** or **list** (default: `None`); as in :py:func:`evaluate_vectorized`
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.cipher_modules import evaluator
+        sage: speck = SpeckBlockCipher(number_of_rounds=4)
+        sage: report = evaluator.get_optimization_report(speck)
+        sage: report['eliminated_components'] > 0
+        True
+    """
+    if outputs is not None:
+        evaluate_function, _ = get_vectorized_evaluator(cipher, False, False, get_selected_outputs(cipher, outputs))
+    else:
+        evaluate_function, _ = get_vectorized_evaluator(cipher, intermediate_outputs)
+
+    return evaluate_function.optimization_report
 
-    return f_module.evaluate(cipher_input, intermediate_outputs)
+
+def get_process_pool(workers):
+    """
+    Return a pool of ``workers`` processes, creating it only the first time.
+
+    The pool is kept alive across calls, so that each worker compiles the evaluators it receives only once. The
+    resource tracker is started before the workers, so that they share it with the calling process: the shared memory
+    buffers attached by the workers are then released when the calling process unlinks them.
+
+    INPUT:
+
+    - ``workers`` -- **integer**; the number of processes
+    """
+    if not PROCESS_POOLS:
+        atexit.register(terminate_process_pools)
+    if workers not in PROCESS_POOLS:
+        resource_tracker.ensure_running()
+        PROCESS_POOLS[workers] = Pool(workers)
+
+    return PROCESS_POOLS[workers]
+
+
+def terminate_process_pools():
+    for pool in PROCESS_POOLS.values():
+        pool.terminate()
+    PROCESS_POOLS.clear()
+
+
+def evaluate_vectorized_in_parallel(evaluate_function, input_format, cipher_input, intermediate_outputs, workers):
+    """
+    Evaluate the columns of ``cipher_input`` split across ``workers`` processes.
+
+    The inputs and the outputs are exchanged through shared memory buffers, and only the code of the evaluator is
+    sent to the workers, which compile it once and keep it for the next calls. The outputs that depend only on the
+    broadcast (single-column) inputs, such as the round keys for a single key, are computed once in the parent and
+    keep the shape they have in a single process evaluation.
+
+    INPUT:
+
+    - ``evaluate_function`` -- **function**; the function returned by :py:func:`get_vectorized_evaluator`
+    - ``input_format`` -- **tuple**; the format returned by :py:func:`get_vectorized_evaluator`
+    - ``cipher_input`` -- **list**; the inputs, in the format of :py:meth:`~claasp.cipher.Cipher.evaluate_vectorized`
+    - ``intermediate_outputs`` -- **boolean**; the value used to generate ``evaluate_function``
+    - ``workers`` -- **integer**; the number of processes
+    """
+    number_of_samples = max(values.shape[1] for values in cipher_input)
+    # the outputs of the probe that do not have two rows depend only on the broadcast inputs: they are returned as
+    # they are, and the workers only compute the other ones
+    probe_input = [values[:, :2] for values in cipher_input]
+    probe_output = evaluate_function(convert_vectorized_input(probe_input, input_format), intermediate_outputs)
+    if intermediate_outputs:
+        all_output_keys = [(tag, index) for tag in probe_output for index in range(len(probe_output[tag]))]
+    else:
+        all_output_keys = [(None, index) for index in range(len(probe_output))]
+    probe_outputs = [probe_output[tag][index] if intermediate_outputs else probe_output[index]
+                     for tag, index in all_output_keys]
+    output_keys = [key for key, output in zip(all_output_keys, probe_outputs) if output.shape[0] == 2]
+
+    shared_memories = []
+    try:
+        inputs_description = [share_array(values, shared_memories) if values.shape[1] == number_of_samples else values
+                              for values in cipher_input]
+        outputs_description = []
+        outputs_shared_memories = []
+        for tag, index in output_keys:
+            output = probe_output[tag][index] if intermediate_outputs else probe_output[index]
+            shape = (number_of_samples,) + output.shape[1:]
+            shared_memory = SharedMemory(create=True, size=max(int(np.prod(shape)) * output.itemsize, 1))
+            shared_memories.append(shared_memory)
+            outputs_shared_memories.append(shared_memory)
+            outputs_description.append((shared_memory.name, shape, output.dtype.str))
+
+        bounds = np.linspace(0, number_of_samples, workers + 1, dtype=int)
+        get_process_pool(workers).starmap(
+            _evaluate_vectorized_shard,
+            [(evaluate_function.python_code_digest, evaluate_function.python_code_string, input_format,
+              inputs_description, outputs_description, output_keys, intermediate_outputs, start, end)
+             for start, end in zip(bounds[:-1], bounds[1:])])
+
+        sharded_outputs = {key: np.ndarray(shape, dtype=dtype, buffer=shared_memory.buf).copy()
+                           for key, shared_memory, (_, shape, dtype)
+                           in zip(output_keys, outputs_shared_memories, outputs_description)}
+    finally:
+        for shared_memory in shared_memories:
+            shared_memory.close()
+            shared_memory.unlink()
+
+    outputs = [sharded_outputs.get(key, output) for key, output in zip(all_output_keys, probe_outputs)]
+    if not intermediate_outputs:
+        return outputs
+    result = {tag: [] for tag in probe_output}
+    for (tag, _), output in zip(all_output_keys, outputs):
+        result[tag].append(output)
+
+    return result
+
+
+def share_array(values, shared_memories):
+    """
+    Return the description of a new shared memory buffer holding a copy of ``values``.
+
+    The buffer is appended to ``shared_memories``: the caller closes and unlinks it once the workers are done. A
+    worker reads the array with :py:func:`attach_shared_array`, so that it is not pickled.
+
+    INPUT:
+
+    - ``values`` -- **np.array**; the array to share
+    - ``shared_memories`` -- **list**; the shared memory buffers of the caller
+
+    EXAMPLES::
+
+        sage: import numpy as np
+        sage: from claasp.cipher_modules.evaluator import attach_shared_array, share_array
+        sage: shared_memories = []
+        sage: description = share_array(np.arange(6, dtype=np.uint8).reshape(2, 3), shared_memories)
+        sage: attach_shared_array(description, [])
+        array([[0, 1, 2],
+               [3, 4, 5]], dtype=uint8)
+        sage: for shared_memory in shared_memories:
+        ....:     shared_memory.close()
+        ....:     shared_memory.unlink()
+    """
+    shared_memory = SharedMemory(create=True, size=max(values.nbytes, 1))
+    shared_memories.append(shared_memory)
+    np.ndarray(values.shape, dtype=values.dtype, buffer=shared_memory.buf)[:] = values
+
+    return shared_memory.name, values.shape, values.dtype.str
+
+
+def attach_shared_array(description, shared_memories):
+    """
+    Return the array described by ``description``, as returned by :py:func:`share_array`, without copying it.
+
+    The buffer is appended to ``shared_memories``: the caller closes it once it no longer uses the array.
+
+    INPUT:
+
+    - ``description`` -- **tuple**; the name, the shape and the dtype of the shared array
+    - ``shared_memories`` -- **list**; the shared memory buffers of the caller
+    """
+    name, shape, dtype = description
+    shared_memories.append(SharedMemory(name=name))
+
+    return np.ndarray(shape, dtype=dtype, buffer=shared_memories[-1].buf)
+
+
+def get_worker_evaluator(python_code_digest, python_code_string):
+    """
+    Return the evaluator compiled from ``python_code_string`` in a worker process, compiling it only once.
+
+    INPUT:
+
+    - ``python_code_digest`` -- **string**; the ``python_code_digest`` attribute of the evaluator
+    - ``python_code_string`` -- **string**; the ``python_code_string`` attribute of the evaluator
+    """
+    if python_code_digest not in WORKER_EVALUATORS:
+        if len(WORKER_EVALUATORS) >= MAXIMUM_NUMBER_OF_WORKER_EVALUATORS:
+            WORKER_EVALUATORS.clear()
+        WORKER_EVALUATORS[python_code_digest] = compile_python_code_string(python_code_string)
+
+    return WORKER_EVALUATORS[python_code_digest]
+
+
+def _evaluate_vectorized_shard(python_code_digest, python_code_string, input_format, inputs_description,
+                               outputs_description, output_keys, intermediate_outputs, start, end):
+    evaluate_function = get_worker_evaluator(python_code_digest, python_code_string)
+
+    shared_memories = []
+    try:
+        cipher_input = []
+        for description in inputs_description:
+            if isinstance(description, np.ndarray):
+                cipher_input.append(description)
+            else:
+                values = attach_shared_array(description, shared_memories)
+                cipher_input.append(np.ascontiguousarray(values[:, start:end]))
+        result = evaluate_function(convert_vectorized_input(cipher_input, input_format), intermediate_outputs)
+        for (tag, index), description in zip(output_keys, outputs_description):
+            output = result[tag][index] if intermediate_outputs else result[index]
+            attach_shared_array(description, shared_memories)[start:end] = output
+    finally:
+        for shared_memory in shared_memories:
+            shared_memory.close()
+
+
+def evaluate_vectorized_iter(cipher, input_source, chunk_size=2 ** 16, outputs=None, verbosity=False):
+    """
+    Evaluate the cipher on the chunks of ``input_source``, yielding the outputs of each chunk.
+
+    Only one chunk of inputs and of outputs is in memory at a time, so that the peak memory is bounded by the chunk
+    size and not by the total number of samples.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; a cipher instance
+    - ``input_source`` -- **list** or **iterable**; either a list with one array per cipher input (in the format of
+      :py:meth:`~claasp.cipher.Cipher.evaluate_vectorized`, e.g. memory-mapped arrays), split in chunks of
+      ``chunk_size`` columns, or an iterable (e.g. a generator) yielding such lists, one per chunk
+    - ``chunk_size`` -- **integer** (default: `2 ** 16`); the number of samples in each chunk when ``input_source`` is
+      a list of arrays
+    - ``outputs`` -- **dict** or **list** (default: `None`); the outputs to yield, selected by tag and index as in
+      :py:meth:`~claasp.cipher.Cipher.evaluate_vectorized` (e.g. ``{'round_output': [4]}`` or ``['round_output']``);
+      if None, only the cipher output is yielded
+    - ``verbosity`` -- **boolean** (default: `False`); set this flag to True in order to print the output of each
+      component
+
+    EXAMPLES::
+
+        sage: import numpy as np
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.cipher_modules import evaluator
+        sage: speck = SpeckBlockCipher(block_bit_size=32, key_bit_size=64, number_of_rounds=5)
+        sage: X = np.random.randint(256, size=(4, 1000), dtype=np.uint8)
+        sage: K = np.random.randint(256, size=(8, 1000), dtype=np.uint8)
+        sage: chunks = evaluator.evaluate_vectorized_iter(speck, [X, K], chunk_size=300, outputs=['round_output'])
+        sage: [len(chunk['round_output'][-1]) for chunk in chunks]
+        [300, 300, 300, 100]
+    """
+    if isinstance(input_source, (list, tuple)):
+        number_of_samples = max(values.shape[1] for values in input_source)
+        chunks = ([values[:, start:start + chunk_size] if values.shape[1] == number_of_samples else values
+                   for values in input_source] for start in range(0, number_of_samples, chunk_size))
+    else:
+        chunks = input_source
+
+    for chunk in chunks:
+        chunk = [np.ascontiguousarray(values) for values in chunk]
+        yield evaluate_vectorized(cipher, chunk, False, verbosity, outputs=outputs)
+
+
+def evaluate_bitsliced(cipher, cipher_input, intermediate_outputs=False, verbosity=False):
+    evaluate_function = get_compiled_evaluator(
+        cipher, 'bitsliced', code_generator.generate_bitsliced_python_code_string,
+        store_intermediate_outputs=intermediate_outputs, verbosity=verbosity)
+    number_of_samples = max(values.shape[1] for values in cipher_input)
+    bitsliced_input = [
+        bitsliced_from_byte_vector(np.broadcast_to(values, (values.shape[0], number_of_samples)), bit_size)
+        for values, bit_size in zip(cipher_input, cipher.inputs_bit_size)]
+
+    return evaluate_function(bitsliced_input, number_of_samples, intermediate_outputs)
 
 
 def evaluate_with_intermediate_outputs_continuous_diffusion_analysis(cipher, cipher_input, sbox_precomputations,
                                                                      sbox_precomputations_mix_columns, verbosity=False):
-    python_code_string = code_generator.generate_python_code_string_for_continuous_diffusion_analysis(cipher, verbosity)
-    python_code_string = python_code_string.replace(
-        "def evaluate(input):", "def evaluate(input, sbox_precomputations, sbox_precomputations_mix_columns):")
+    evaluate_function = get_compiled_evaluator(cipher, 'continuous_diffusion_analysis',
+                                               generate_python_code_string_for_continuous_diffusion_analysis,
+                                               verbosity=verbosity)
+
+    return evaluate_function(cipher_input, sbox_precomputations, sbox_precomputations_mix_columns)
 
-    f_module = ModuleType("evaluate_continuous_diffusion_analysis")
-    exec(python_code_string, f_module.__dict__)
 
-    return f_module.evaluate(cipher_input, sbox_precomputations, sbox_precomputations_mix_columns)
+def generate_python_code_string_for_continuous_diffusion_analysis(cipher, verbosity=False):
+    python_code_string = code_generator.generate_python_code_string_for_continuous_diffusion_analysis(cipher, verbosity)
+
+    return python_code_string.replace(
+        "def evaluate(input):", "def evaluate(input, sbox_precomputations, sbox_precomputations_mix_columns):")
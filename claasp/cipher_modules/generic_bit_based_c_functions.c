@@ -246,7 +246,7 @@ BitString* bitstring_from_binary_string(char *bits, uint16_t bit_size) {
 BitString* bitstring_from_hex_string(char *hex_digits, uint16_t bit_size) {
     BitString *result = zero_bitstring(bit_size);
     uint16_t hex_length = strlen(hex_digits), j = byte_size(bit_size) - 1;;
-    char app[2];
+    char app[3] = {'\0', '\0', '\0'};
 
     for (int i = hex_length - 1; i >= 3; i -= 2) {
         app[0] = hex_digits[i - 1];
@@ -692,7 +692,7 @@ BitString* left_shift(BitString *b, uint16_t shift_amount) {
     uint16_t last_shift = shift_amount % 8, bytes_to_shift = shift_amount / 8;
     uint8_t bits_to_shift, shifted_bits = 0;
 
-    for (int i = byte_size(b -> bit_size) - bytes_to_shift; i >= 0; i--) {
+    for (int i = byte_size(b -> bit_size) - bytes_to_shift - 1; i >= 0; i--) {
         bits_to_shift = b -> list[i + bytes_to_shift] >> (8 - last_shift);
         result -> list[i] = (b -> list[i + bytes_to_shift] << last_shift) + shifted_bits;
         shifted_bits = bits_to_shift;
@@ -720,7 +720,7 @@ BitString* right_rotate(BitString *b, uint16_t rotation_amount) {
     uint16_t last_shift = (b -> bit_size - rotation_amount) % 8, bytes_to_shift = (b -> bit_size - rotation_amount) / 8;
     uint8_t bits_to_shift, shifted_bits = 0;
 
-    for (int i = byte_size(b -> bit_size) - bytes_to_shift; i >= 0; i--) {
+    for (int i = byte_size(b -> bit_size) - bytes_to_shift - 1; i >= 0; i--) {
         bits_to_shift = b -> list[i + bytes_to_shift] >> (8 - last_shift);
         result -> list[i] = (b -> list[i + bytes_to_shift] << last_shift) + shifted_bits;
         shifted_bits = bits_to_shift;
@@ -749,7 +749,7 @@ BitString* left_rotate(BitString *b, uint16_t rotation_amount) {
     uint16_t last_shift = rotation_amount % 8, bytes_to_shift = rotation_amount / 8;
     uint8_t bits_to_shift, shifted_bits = 0;
 
-    for (int i = byte_size(b -> bit_size) - bytes_to_shift; i >= 0; i--) {
+    for (int i = byte_size(b -> bit_size) - bytes_to_shift - 1; i >= 0; i--) {
         bits_to_shift = b -> list[i + bytes_to_shift] >> (8 - last_shift);
         result -> list[i] = (b -> list[i + bytes_to_shift] << last_shift) + shifted_bits;
         shifted_bits = bits_to_shift;
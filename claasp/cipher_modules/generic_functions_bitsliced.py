@@ -0,0 +1,374 @@
+
+# ****************************************************************************
+# Copyright 2023 Technology Innovation Institute
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ****************************************************************************
+
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from claasp.cipher_modules.generic_functions_vectorized_bit import bit_vector_print_as_hex_values
+
+LANE_BIT_SIZE = 64
+ALL_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+
+
+def bitsliced_from_byte_vector(input, bit_size):
+    """
+    Converts a byte matrix to a bitsliced matrix.
+
+    Bit ``s % 64`` of the lane ``[i, s // 64]`` of the output is the bit ``i`` of the sample ``s``, so that every
+    bitwise numpy operation on the output evaluates 64 samples at once.
+
+    INPUT:
+
+    - ``input`` -- **np.array(dtype = np.uint8)** A numpy matrix with one row per byte, and one column per sample.
+    - ``bit_size`` -- **integer**; the number of bits to keep, counting from the most significant bit of the first byte
+    """
+    bits = np.unpackbits(input, axis=0)[:bit_size]
+    number_of_lanes = math.ceil(bits.shape[1] / LANE_BIT_SIZE)
+    padded_bits = np.zeros(shape=(bit_size, number_of_lanes * LANE_BIT_SIZE), dtype=np.uint8)
+    padded_bits[:, :bits.shape[1]] = bits
+
+    return np.packbits(padded_bits, axis=1, bitorder='little').view('<u8').astype(np.uint64, copy=False)
+
+
+def bitsliced_to_bit_vector(input, number_of_samples):
+    """
+    Converts a bitsliced matrix to a binary matrix with one row per bit, and one column per sample.
+
+    INPUT:
+
+    - ``input`` -- **np.array(dtype = np.uint64)** A bitsliced numpy matrix with one row per bit, and one column per
+      lane of 64 samples.
+    - ``number_of_samples`` -- **integer**; the number of samples to keep
+    """
+    number_of_lanes = math.ceil(number_of_samples / LANE_BIT_SIZE)
+    lanes = np.ascontiguousarray(np.broadcast_to(input, (input.shape[0], number_of_lanes)), dtype='<u8')
+
+    return np.unpackbits(lanes.view(np.uint8), axis=1, bitorder='little')[:, :number_of_samples]
+
+
+def bitsliced_to_byte_vector(input, number_of_samples):
+    """
+    Converts a bitsliced matrix to a byte matrix with one row per byte, and one column per sample.
+
+    INPUT:
+
+    - ``input`` -- **np.array(dtype = np.uint64)** A bitsliced numpy matrix with one row per bit, and one column per
+      lane of 64 samples.
+    - ``number_of_samples`` -- **integer**; the number of samples to keep
+    """
+    return np.packbits(bitsliced_to_bit_vector(input, number_of_samples), axis=0)
+
+
+def bitsliced_print_as_hex_values(name, x):
+    """
+    Prints a bitsliced matrix x as hex values, one per sample (including the padding samples) - used for debugging
+
+    INPUT:
+
+    - ``name`` -- **string** The name of the vector, for display purposes
+    - ``x`` -- **np.array(dtype = np.uint64)** A bitsliced numpy matrix with one row per bit, and one column per lane.
+    """
+    bit_vector_print_as_hex_values(name, bitsliced_to_bit_vector(x, x.shape[1] * LANE_BIT_SIZE))
+
+
+def bitsliced_select_word(input, bits):
+    """
+    Returns the bits indexed in the bits list from the bitsliced matrix input.
+
+    INPUT:
+
+    - ``input`` -- **np.array(dtype = np.uint64)** A bitsliced numpy matrix with one row per bit.
+    - ``bits`` -- **list**; is the array representing the indexes of the bits to extract
+    """
+    if bits == list(range(len(input))):
+        return input
+
+    return input[bits]
+
+
+def bitsliced_CONCAT(input):
+    """
+    Concatenates bitsliced values.
+
+    INPUT:
+
+    - ``input`` -- **list**; A list of bitsliced numpy matrices to be concatenated, each with one row per bit.
+    """
+    if len(input) == 1:
+        return input[0]
+    max_cols = max(x.shape[1] for x in input)
+    output = np.empty(shape=(sum(x.shape[0] for x in input), max_cols), dtype=np.uint64)
+    pos = 0
+    for x in input:
+        output[pos:pos + x.shape[0]] = x
+        pos += x.shape[0]
+
+    return output
+
+
+def split_inputs(input, number_of_inputs, output_bit_size):
+    if number_of_inputs == len(input) and all(x.shape[0] == output_bit_size for x in input):
+        return input
+    input_concatenated = bitsliced_CONCAT(input)
+
+    return [input_concatenated[i * output_bit_size:(i + 1) * output_bit_size] for i in range(number_of_inputs)]
+
+
+def bitsliced_XOR(input, number_of_inputs, output_bit_size):
+    """
+    Computes the XOR operation on bitsliced values.
+
+    INPUT:
+
+    - ``input`` -- **list**; A list of bitsliced numpy matrices to be XORed, each with one row per bit.
+    - ``number_of_inputs`` -- **integer**; is an integer representing the number of values to be xored together
+    - ``output_bit_size`` -- **integer**; is an integer representing the bit size of the output
+    """
+    inputs = split_inputs(input, number_of_inputs, output_bit_size)
+    output = inputs[0]
+    for x in inputs[1:]:
+        output = output ^ x
+
+    return output
+
+
+def bitsliced_AND(input, number_of_inputs, output_bit_size):
+    """
+    Computes the AND operation on bitsliced values.
+
+    INPUT:
+
+    - ``input`` -- **list**; A list of bitsliced numpy matrices to be ANDed, each with one row per bit.
+    - ``number_of_inputs`` -- **integer**; is an integer representing the number of values to be ANDed together
+    - ``output_bit_size`` -- **integer**; is an integer representing the bit size of the output
+    """
+    inputs = split_inputs(input, number_of_inputs, output_bit_size)
+    output = inputs[0]
+    for x in inputs[1:]:
+        output = output & x
+
+    return output
+
+
+def bitsliced_OR(input, number_of_inputs, output_bit_size):
+    """
+    Computes the OR operation on bitsliced values.
+
+    INPUT:
+
+    - ``input`` -- **list**; A list of bitsliced numpy matrices to be ORed, each with one row per bit.
+    - ``number_of_inputs`` -- **integer**; is an integer representing the number of values to be ORed together
+    - ``output_bit_size`` -- **integer**; is an integer representing the bit size of the output
+    """
+    inputs = split_inputs(input, number_of_inputs, output_bit_size)
+    output = inputs[0]
+    for x in inputs[1:]:
+        output = output | x
+
+    return output
+
+
+def bitsliced_NOT(input):
+    """
+    Computes the NOT operation on bitsliced values.
+
+    INPUT:
+
+    - ``input`` -- **list**; A list of bitsliced numpy matrices, each with one row per bit.
+    """
+    return bitsliced_CONCAT(input) ^ ALL_ONES
+
+
+def bitsliced_ROTATE(input, rotation_amount):
+    """
+    Computes the rotation of bitsliced values; this is a reindexing of the rows.
+
+    INPUT:
+
+    - ``input`` -- **list**; A list of bitsliced numpy matrices, each with one row per bit.
+    - ``rotation_amount`` -- **integer**; the value of the rotation, positive for right rotation,
+        negative for left rotation
+    """
+    return np.roll(bitsliced_CONCAT(input), rotation_amount, axis=0)
+
+
+def shift_rows(input, shift_amount):
+    output = np.zeros(shape=input.shape, dtype=np.uint64)
+    if shift_amount < 0:
+        output[:shift_amount] = input[-shift_amount:]
+    elif shift_amount > 0:
+        output[shift_amount:] = input[:-shift_amount]
+    else:
+        output[:] = input
+
+    return output
+
+
+def bitsliced_SHIFT(input, shift_amount):
+    """
+    Computes the shift of bitsliced values; this is a reindexing of the rows.
+
+    INPUT:
+
+    - ``input`` -- **list**; A list of bitsliced numpy matrices, each with one row per bit.
+    - ``shift_amount`` -- **integer**; the value of the shift, positive for right shift,
+        negative for left shift
+    """
+    return shift_rows(bitsliced_CONCAT(input), shift_amount)
+
+
+def bitsliced_SHIFT_BY_VARIABLE_AMOUNT(input, input_size, shift_direction):
+    """
+    Computes the shift by variable amount of bitsliced values, using a barrel shifter.
+
+    INPUT:
+
+    - ``input`` -- **list**; the bitsliced value to shift and the bitsliced shift amount
+    - ``input_size`` -- **integer**; number of bits of the input string
+    - ``shift_direction`` -- **integer**; the value of the shift, positive for right and
+        negative for left
+    """
+    output = input[0]
+    amount = input[1]
+    for i in range(int(math.log2(input_size))):
+        control = amount[-1 - i]
+        shifted = shift_rows(output, shift_direction * 2 ** i)
+        output = (shifted & control) | (output & (control ^ ALL_ONES))
+
+    return output
+
+
+def add_with_carry(a, b, carry):
+    output = np.empty(shape=np.broadcast_shapes(a.shape, b.shape), dtype=np.uint64)
+    for pos in range(output.shape[0] - 1, -1, -1):
+        a_xor_b = a[pos] ^ b[pos]
+        output[pos] = a_xor_b ^ carry
+        carry = (a[pos] & b[pos]) | (carry & a_xor_b)
+
+    return output
+
+
+def bitsliced_MODADD(input, number_of_inputs, output_bit_size):
+    """
+    Computes the modular addition of bitsliced values with a ripple-carry adder.
+
+    INPUT:
+
+    - ``input`` -- **list**; A list of bitsliced numpy matrices to be added, each with one row per bit.
+    - ``number_of_inputs`` -- **integer**; is an integer representing the number of values to be added together
+    - ``output_bit_size`` -- **integer**; is an integer representing the bit size of the output
+    """
+    inputs = split_inputs(input, number_of_inputs, output_bit_size)
+    output = inputs[0]
+    for x in inputs[1:]:
+        output = add_with_carry(output, x, np.uint64(0))
+
+    return output
+
+
+def bitsliced_MODSUB(input, number_of_inputs, output_bit_size):
+    """
+    Computes the modular subtraction of 2 bitsliced values, as the addition of the complement plus one.
+
+    INPUT:
+
+    - ``input`` -- **list**; A list of bitsliced numpy matrices to be subtracted, each with one row per bit.
+    - ``number_of_inputs`` -- **integer**; is an integer representing the number of values to be subtracted
+    - ``output_bit_size`` -- **integer**; is an integer representing the bit size of the output
+    """
+    assert number_of_inputs == 2  # Other cases not implemented
+    minuend, subtrahend = split_inputs(input, number_of_inputs, output_bit_size)
+
+    return add_with_carry(minuend, subtrahend ^ ALL_ONES, ALL_ONES)
+
+
+def bitsliced_linear_layer(input, xor_indices):
+    """
+    Computes a linear layer on bitsliced values.
+
+    Each output bit is the XOR of the input bits listed in ``xor_indices``; bit permutations are pure reindexing.
+
+    INPUT:
+
+    - ``input`` -- **np.array(dtype = np.uint64)** A bitsliced numpy matrix with one row per bit.
+    - ``xor_indices`` -- **list**; for each output bit, the list of the input bits to be XORed
+    """
+    if all(len(indices) == 1 for indices in xor_indices):
+        return input[[indices[0] for indices in xor_indices]]
+    output = np.zeros(shape=(len(xor_indices), input.shape[1]), dtype=np.uint64)
+    for i, indices in enumerate(xor_indices):
+        if indices:
+            output[i] = np.bitwise_xor.reduce(input[indices], axis=0)
+
+    return output
+
+
+@lru_cache(maxsize=None)
+def get_sbox_algebraic_normal_form(sbox, input_bit_size, output_bit_size):
+    """
+    Return, for each output bit of the SBox, the list of the monomials of its algebraic normal form.
+
+    A monomial is an integer whose bit ``k`` is set if it contains the input bit ``input_bit_size - 1 - k`` (input
+    bits are numbered from the most significant one, as the rows of a bitsliced matrix).
+
+    INPUT:
+
+    - ``sbox`` -- **tuple**; the lookup table of the SBox
+    - ``input_bit_size`` -- **integer**; the bit size of the input of the SBox
+    - ``output_bit_size`` -- **integer**; the bit size of the output of the SBox
+    """
+    algebraic_normal_form = []
+    for output_bit in range(output_bit_size):
+        coefficients = [(value >> (output_bit_size - 1 - output_bit)) & 1 for value in sbox]
+        for k in range(input_bit_size):
+            for x in range(len(coefficients)):
+                if x & (1 << k):
+                    coefficients[x] ^= coefficients[x ^ (1 << k)]
+        algebraic_normal_form.append([monomial for monomial, coefficient in enumerate(coefficients) if coefficient])
+
+    return algebraic_normal_form
+
+
+def bitsliced_SBOX(input, sbox, output_bit_size):
+    """
+    Computes the SBox operation on bitsliced values, evaluating the algebraic normal form of each output bit.
+
+    The algebraic normal form is computed once per SBox. All the monomials are evaluated with one AND per input bit,
+    by doubling the table of the monomials that do not depend on the remaining input bits.
+
+    INPUT:
+
+    - ``input`` -- **np.array(dtype = np.uint64)** A bitsliced numpy matrix with one row per bit.
+    - ``sbox`` -- **tuple**; the lookup table of the SBox
+    - ``output_bit_size`` -- **integer**; the bit size of the output of the SBox
+    """
+    input_bit_size = input.shape[0]
+    algebraic_normal_form = get_sbox_algebraic_normal_form(sbox, input_bit_size, output_bit_size)
+    monomials = np.full(shape=(1, input.shape[1]), fill_value=ALL_ONES, dtype=np.uint64)
+    for k in range(input_bit_size):
+        monomials = np.concatenate((monomials, monomials & input[input_bit_size - 1 - k]))
+
+    output = np.zeros(shape=(output_bit_size, input.shape[1]), dtype=np.uint64)
+    for i, output_bit_monomials in enumerate(algebraic_normal_form):
+        if output_bit_monomials:
+            output[i] = np.bitwise_xor.reduce(monomials[output_bit_monomials], axis=0)
+
+    return output
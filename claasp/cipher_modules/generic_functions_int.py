@@ -0,0 +1,108 @@
+
+# ****************************************************************************
+# Copyright 2023 Technology Innovation Institute
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ****************************************************************************
+
+
+def int_linear_layer_tables(input_masks, chunk_bit_size):
+    """
+    Return the lookup tables evaluating a binary linear layer on chunks of ``chunk_bit_size`` input bits.
+
+    INPUT:
+
+    - ``input_masks`` -- **list**; the output mask of each input bit, starting from the least significant one
+    - ``chunk_bit_size`` -- **integer**; the number of input bits handled by each table
+
+    EXAMPLES::
+
+        sage: from claasp.cipher_modules.generic_functions_int import int_linear_layer_tables
+        sage: int_linear_layer_tables([0b01, 0b11], 2)
+        [(0, 1, 3, 2)]
+    """
+    tables = []
+    for start in range(0, len(input_masks), chunk_bit_size):
+        table = [0]
+        for mask in input_masks[start:start + chunk_bit_size]:
+            table += [entry ^ mask for entry in table]
+        tables.append(tuple(table))
+
+    return tables
+
+
+def int_linear_layer(input, tables, chunk_bit_size):
+    """
+    Computes a binary linear layer using the tables returned by :py:func:`int_linear_layer_tables`.
+
+    INPUT:
+
+    - ``input`` -- **integer**; the input of the linear layer
+    - ``tables`` -- **list**; the lookup tables of the linear layer
+    - ``chunk_bit_size`` -- **integer**; the number of input bits handled by each table
+
+    EXAMPLES::
+
+        sage: from claasp.cipher_modules.generic_functions_int import int_linear_layer, int_linear_layer_tables
+        sage: int_linear_layer(0b10, int_linear_layer_tables([0b01, 0b11], 2), 2)
+        3
+    """
+    output = 0
+    chunk_mask = (1 << chunk_bit_size) - 1
+    for table in tables:
+        output ^= table[input & chunk_mask]
+        input >>= chunk_bit_size
+
+    return output
+
+
+def int_mix_column_over_integers(input, matrix, word_size):
+    """
+    Computes the product of an integer matrix by the vector of the words of the input, modulo 2^word_size.
+
+    This is the mix column with polynomial 0.
+
+    INPUT:
+
+    - ``input`` -- **integer**; the input of the mix column
+    - ``matrix`` -- **list**; the matrix of the mix column
+    - ``word_size`` -- **integer**; the bit size of the words
+
+    EXAMPLES::
+
+        sage: from claasp.cipher_modules.generic_functions_int import int_mix_column_over_integers
+        sage: hex(int_mix_column_over_integers(0x12, [[0, 1], [1, 0]], 4))
+        '0x21'
+    """
+    number_of_columns = len(matrix[0])
+    word_mask = (1 << word_size) - 1
+    words = [(input >> (word_size * (number_of_columns - 1 - j))) & word_mask for j in range(number_of_columns)]
+    output = 0
+    for row in matrix:
+        output = (output << word_size) | (sum(entry * word for entry, word in zip(row, words)) & word_mask)
+
+    return output
+
+
+def int_print_as_hex_value(name, value, bit_size):
+    """
+    Prints an integer as an hex value - used for debugging
+
+    INPUT:
+
+    - ``name`` -- **string** The name of the value, for display purposes
+    - ``value`` -- **integer** The value to print
+    - ``bit_size`` -- **integer** The bit size of the value
+    """
+    print(f'{name} = 0x{value:0{(bit_size + 3) // 4}x}')
@@ -0,0 +1,198 @@
+
+# ****************************************************************************
+# Copyright 2023 Technology Innovation Institute
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+# ****************************************************************************
+
+
+import numpy as np
+
+WORD_DTYPES = {8: np.uint8, 16: np.uint16, 32: np.uint32, 64: np.uint64}
+
+
+def word_vector_from_byte_vector(input, word_size):
+    """
+    Converts a byte matrix to a word matrix.
+
+    INPUT:
+
+    - ``input`` -- **np.array(dtype = np.uint8)** A numpy matrix with one row per byte, and one column per sample.
+    - ``word_size`` -- **integer**; the bit size of the words (8, 16, 32 or 64)
+    """
+    samples = np.ascontiguousarray(input.transpose())
+    words = samples.view(f'>u{word_size // 8}').astype(WORD_DTYPES[word_size])
+
+    return words.transpose()
+
+
+def word_vector_to_byte_vector(input):
+    """
+    Converts a word matrix to a byte matrix with one row per sample, and one column per byte.
+
+    INPUT:
+
+    - ``input`` -- **np.array** A numpy matrix of unsigned integers with one row per word, and one column per sample.
+    """
+    samples = np.ascontiguousarray(input.transpose(), dtype=f'>u{input.dtype.itemsize}')
+
+    return samples.view(np.uint8)
+
+
+def word_vector_print_as_hex_values(name, x):
+    """
+    Prints a word vector x as an hex value - used for debugging
+
+    INPUT:
+
+    - ``name`` -- **string** The name of the vector, for display purposes
+    - ``x`` -- **np.array** A numpy matrix of unsigned integers with one row per word, and one column per sample.
+    """
+    for j, sample in enumerate(word_vector_to_byte_vector(x)):
+        print(name, j, " : ", hex(int.from_bytes(sample.tobytes(), byteorder='big')))
+
+
+def word_vector_CONCAT(input):
+    """
+    Concatenates word values.
+
+    INPUT:
+
+    - ``input`` -- **list**; A list of numpy matrices to be concatenated, each with one row per word.
+    """
+    if len(input) == 1:
+        return input[0]
+    max_cols = max(x.shape[1] for x in input)
+
+    return np.vstack([np.broadcast_to(x, (x.shape[0], max_cols)) for x in input])
+
+
+def word_vector_XOR(input):
+    """
+    Computes the XOR of the words of the input.
+
+    INPUT:
+
+    - ``input`` -- **np.array** A numpy matrix with one row per word to be XORed, and one column per sample.
+    """
+    return np.bitwise_xor.reduce(input, axis=0, keepdims=True)
+
+
+def word_vector_AND(input):
+    """
+    Computes the AND of the words of the input.
+
+    INPUT:
+
+    - ``input`` -- **np.array** A numpy matrix with one row per word to be ANDed, and one column per sample.
+    """
+    return np.bitwise_and.reduce(input, axis=0, keepdims=True)
+
+
+def word_vector_OR(input):
+    """
+    Computes the OR of the words of the input.
+
+    INPUT:
+
+    - ``input`` -- **np.array** A numpy matrix with one row per word to be ORed, and one column per sample.
+    """
+    return np.bitwise_or.reduce(input, axis=0, keepdims=True)
+
+
+def word_vector_NOT(input):
+    """
+    Computes the NOT of the input.
+
+    INPUT:
+
+    - ``input`` -- **np.array** A numpy matrix with one row per word, and one column per sample.
+    """
+    return np.invert(input)
+
+
+def word_vector_MODADD(input):
+    """
+    Computes the modular addition of the words of the input.
+
+    INPUT:
+
+    - ``input`` -- **np.array** A numpy matrix with one row per word to be added, and one column per sample.
+    """
+    return np.add.reduce(input, axis=0, keepdims=True, dtype=input.dtype)
+
+
+def word_vector_MODSUB(input):
+    """
+    Computes the modular subtraction of the second word of the input from the first one.
+
+    INPUT:
+
+    - ``input`` -- **np.array** A numpy matrix with two rows, and one column per sample.
+    """
+    return input[0:1] - input[1:2]
+
+
+def word_vector_ROTATE(input, rotation_amount, word_size):
+    """
+    Computes the rotation of a word.
+
+    INPUT:
+
+    - ``input`` -- **np.array** A numpy matrix with one row, and one column per sample.
+    - ``rotation_amount`` -- **integer**; the value of the rotation, positive for right rotation,
+        negative for left rotation
+    - ``word_size`` -- **integer**; the bit size of the word
+    """
+    rotation_amount %= word_size
+    if rotation_amount == 0:
+        return input
+
+    return (input >> input.dtype.type(rotation_amount)) | (input << input.dtype.type(word_size - rotation_amount))
+
+
+def word_vector_SHIFT(input, shift_amount, word_size):
+    """
+    Computes the shift of a word.
+
+    INPUT:
+
+    - ``input`` -- **np.array** A numpy matrix with one row, and one column per sample.
+    - ``shift_amount`` -- **integer**; the value of the shift, positive for right shift,
+        negative for left shift
+    - ``word_size`` -- **integer**; the bit size of the word
+    """
+    if abs(shift_amount) >= word_size:
+        return np.zeros_like(input)
+    if shift_amount < 0:
+        return input << input.dtype.type(-shift_amount)
+
+    return input >> input.dtype.type(shift_amount)
+
+
+def word_vector_SHIFT_BY_VARIABLE_AMOUNT(input, word_size, shift_direction):
+    """
+    Computes the shift of the first word of the input by the value of the second word, modulo the word size.
+
+    INPUT:
+
+    - ``input`` -- **np.array** A numpy matrix with two rows, and one column per sample.
+    - ``word_size`` -- **integer**; the bit size of the words
+    - ``shift_direction`` -- **integer**; positive for right shift, negative for left shift
+    """
+    shift_amounts = input[1:2] & input.dtype.type(word_size - 1)
+    if shift_direction == -1:
+        return input[0:1] << shift_amounts
+
+    return input[0:1] >> shift_amounts
@@ -47,7 +47,8 @@ WordString* wordstring_from_hex_string(char *hex_digits, uint16_t string_size) {
     WordString *result = create_wordstring(string_size, false);
     uint16_t hex_length = strlen(hex_digits), k = string_size;
     uint8_t hex_symbols_per_word = word_size / 4;
-    char app[hex_symbols_per_word];
+    char app[hex_symbols_per_word + 1];
+    app[hex_symbols_per_word] = '\0';
 
     for (int i = hex_length - 1; i >= 1 + hex_symbols_per_word; i -= hex_symbols_per_word) {
         for (int j = 0; j < hex_symbols_per_word; j++)
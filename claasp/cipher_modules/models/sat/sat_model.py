@@ -80,7 +80,6 @@ For any further information on internal SAT solvers, visit `Abstract SAT solver
 (MSB) is indexed by 0. Be careful whenever inspecting the code or, as well, a
 CNF.
 """
-import copy
 import math
 import time
 import tracemalloc
@@ -111,7 +110,7 @@ class SatModel:
           rotations and permutations)
         """
         # remove rotations and permutations (if any)
-        internal_graph = copy.deepcopy(cipher)
+        internal_graph = cipher.copy_on_write()
         if compact:
             new_rounds = utils.remove_rotations(internal_graph.rounds_as_list)
             new_rounds = utils.remove_permutations(new_rounds)
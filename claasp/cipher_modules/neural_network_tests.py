@@ -212,25 +212,38 @@ def integer_to_np(val, number_of_bits):
     return np.frombuffer(int(val).to_bytes(length=number_of_bits // 8, byteorder='big'), dtype=np.uint8).reshape(-1, 1)
 
 
-def get_differential_dataset(cipher, input_differences, nr, samples=10 ** 7):
-    from os import urandom
-    inputs_0 = []
-    inputs_1 = []
-    y = np.frombuffer(urandom(samples), dtype=np.uint8) & 1
-    num_rand_samples = np.sum(y == 0)
-    for i, inp in enumerate(cipher.inputs):
-        inputs_0.append(np.frombuffer(urandom(samples * (cipher.inputs_bit_size[i] // 8)),
-                                      dtype=np.uint8).reshape(-1, samples))  # requires input size to be a multiple of 8
-        inputs_1.append(inputs_0[-1] ^ integer_to_np(input_differences[i], cipher.inputs_bit_size[i]))
-        inputs_1[-1][:, y == 0] ^= np.frombuffer(urandom(num_rand_samples * cipher.inputs_bit_size[i] // 8),
-                                                 dtype=np.uint8).reshape(-1, num_rand_samples)
-
-    C0 = np.unpackbits(cipher.evaluate_vectorized(inputs_0, intermediate_outputs=True)['round_output'][nr - 1], axis=1)
-    C1 = np.unpackbits(cipher.evaluate_vectorized(inputs_1, intermediate_outputs=True)['round_output'][nr - 1], axis=1)
-    x = np.hstack([C0, C1])
+def get_differential_dataset(cipher, input_differences, nr, samples=10 ** 7, chunk_size=2 ** 16):
+    y = np.frombuffer(os.urandom(samples), dtype=np.uint8) & 1
+    x = None
+    outputs = cipher.evaluate_vectorized_iter(get_differential_pairs(cipher, input_differences, y, chunk_size),
+                                              outputs={'round_output': [nr - 1]})
+    for start in range(0, samples, chunk_size):
+        C0 = np.unpackbits(next(outputs)['round_output'][0], axis=1)
+        C1 = np.unpackbits(next(outputs)['round_output'][0], axis=1)
+        if x is None:
+            x = np.empty((samples, C0.shape[1] + C1.shape[1]), dtype=np.uint8)
+        x[start:start + chunk_size] = np.hstack([C0, C1])
     return x, y
 
 
+def get_differential_pairs(cipher, input_differences, y, chunk_size):
+    for start in range(0, len(y), chunk_size):
+        y_chunk = y[start:start + chunk_size]
+        samples = len(y_chunk)
+        num_rand_samples = np.sum(y_chunk == 0)
+        inputs_0 = []
+        inputs_1 = []
+        for i, inp in enumerate(cipher.inputs):
+            # requires input size to be a multiple of 8
+            input_byte_size = cipher.inputs_bit_size[i] // 8
+            inputs_0.append(np.frombuffer(os.urandom(samples * input_byte_size), dtype=np.uint8).reshape(-1, samples))
+            inputs_1.append(inputs_0[-1] ^ integer_to_np(input_differences[i], cipher.inputs_bit_size[i]))
+            inputs_1[-1][:, y_chunk == 0] ^= np.frombuffer(os.urandom(num_rand_samples * input_byte_size),
+                                                           dtype=np.uint8).reshape(-1, num_rand_samples)
+        yield inputs_0
+        yield inputs_1
+
+
 def neural_staged_training(cipher, input_difference, starting_round, neural_network=None, training_samples=10 ** 7,
                            testing_samples=10 ** 6, num_epochs=1, word_size = 16):
     acc = 1
@@ -306,7 +319,7 @@ def find_good_input_difference_for_neural_distinguisher(cipher, difference_posit
     # Initialisation
     input_lengths = cipher.inputs_bit_size
     input_tags = cipher.inputs
-    evaluate = lambda x: cipher.evaluate_vectorized(x, intermediate_outputs=True)
+    evaluate = lambda x: cipher.evaluate_vectorized(x, outputs=['round_output'])
     threshold = 0.05
     # Generation of the baseline ciphertexts
     inputs0 = []
@@ -24,6 +24,9 @@ from enum import Enum
 from operator import xor
 from copy import deepcopy
 
+from claasp.cipher_modules.avalanche_tests import (MAXIMUM_NUMBER_OF_EVALUATED_SAMPLES,
+                                                   generate_inputs_prime_from_bit_sizes)
+
 
 class DatasetType(Enum):
     avalanche = "avalanche"
@@ -68,10 +71,14 @@ class DatasetGenerator:
         str_of_inputs_bit_size = list(map(str, cipher.inputs_bit_size))
         self._cipher_primitive = cipher.id + "_" + "_".join(str_of_inputs_bit_size)
 
-    def generate_avalanche_dataset(self, input_index, number_of_samples, save_file=False, filename=""):
+    def generate_avalanche_dataset(self, input_index, number_of_samples, save_file=False, filename="", out=None):
         r"""
         Generate the avalanche dataset.
 
+        All the inputs with one flipped bit are evaluated together, in chunks of at most
+        ``MAXIMUM_NUMBER_OF_EVALUATED_SAMPLES`` samples, and the output differences are written straight into the
+        dataset buffer.
+
         INPUT:
 
         - ``input_index`` -- **integer**; the index of inputs to generate testing data. For example, inputs=[key, plaintest],
@@ -80,6 +87,9 @@ class DatasetGenerator:
         - ``number_of_samples`` -- **integer**; how many testing data should be generated
         - ``save_file`` -- **boolean** (default: `False`); save the generated data to file if it is True
         - ``filename`` -- **string** (default: ``); the file name to save the generated data
+        - ``out`` -- **numpy.ndarray** (default: `None`); a ``uint8`` array of shape ``(number_of_rounds,
+          number_of_samples * input_bit_size * output_bit_size // 8)`` receiving the dataset, e.g. a ``numpy.memmap``
+          to keep large datasets on disk; a new array is allocated if it is None
 
         OUTPUT:
 
@@ -105,39 +115,38 @@ class DatasetGenerator:
                 inputs.append(np.zeros(shape=(bit_size // 8, number_of_samples), dtype=np.uint8))
 
         # output of cipher
-        outputs = self.cipher.evaluate_vectorized(inputs, intermediate_outputs=True)
-
-        # avalanche output of cipher
-        outputs_avanlanche_list = [
-            np.zeros(shape=(number_of_samples,
-                            (self.cipher.inputs_bit_size[input_index] *
-                             self.cipher.output_bit_size) // 8),
-                     dtype=np.uint8)
-            for _ in range(self.cipher.number_of_rounds)]
-
-        # mask to generate avalanche data
-        mask = np.zeros(shape=(self.cipher.inputs_bit_size[input_index], 1), dtype=np.uint8)
-        mask[-1] = 1
-
-        for i in range(self.cipher.inputs_bit_size[input_index]):
-            inputs_avalanche = deepcopy(inputs)
-            inputs_avalanche[input_index] = xor(inputs_avalanche[input_index], np.packbits(mask, axis=0))
-            outputs_avanlanche = self.cipher.evaluate_vectorized(inputs_avalanche, intermediate_outputs=True)
-            for r in range(self.cipher.number_of_rounds - 1):
-                outputs_avanlanche_list[r][:, i * self.cipher.output_bit_size //
-                                           8:(i + 1) * self.cipher.output_bit_size // 8] = \
-                    xor(outputs["round_output"][r], outputs_avanlanche["round_output"][r])
-            outputs_avanlanche_list[-1][:, i * self.cipher.output_bit_size //
-                                        8:(i + 1) * self.cipher.output_bit_size // 8] = \
-                xor(outputs["cipher_output"][0], outputs_avanlanche["cipher_output"][0])
-            mask = np.roll(mask, -1, axis=0)
-
-        dataset = []
-        for r in range(self.cipher.number_of_rounds):
-            samples_r = np.unpackbits(outputs_avanlanche_list[r])
-            samples_r = np.packbits(samples_r, axis=0)
-            dataset.append(samples_r)
-
+        number_of_rounds = self.cipher.number_of_rounds
+        selected_outputs = {"cipher_output": [0]}
+        if number_of_rounds > 1:
+            selected_outputs["round_output"] = list(range(number_of_rounds - 1))
+        outputs = self.cipher.evaluate_vectorized(inputs, outputs=selected_outputs)
+        outputs = outputs.get("round_output", []) + outputs["cipher_output"]
+
+        # avalanche output of cipher, indexed by round, sample, flipped bit and output byte
+        input_bit_size = self.cipher.inputs_bit_size[input_index]
+        output_byte_size = self.cipher.output_bit_size // 8
+        shape = (number_of_rounds, number_of_samples * input_bit_size * output_byte_size)
+        if out is None:
+            out = np.empty(shape, dtype=np.uint8)
+        elif out.shape != shape or out.dtype != np.uint8:
+            raise ValueError(f"The output buffer must be a uint8 array of shape {shape}.")
+        outputs_avalanche = out.reshape(number_of_rounds, number_of_samples, input_bit_size, output_byte_size)
+
+        # the i-th flipped bit is the i-th least significant bit of the input
+        input_diffs = list(reversed(range(input_bit_size)))
+        chunk_size = max(1, MAXIMUM_NUMBER_OF_EVALUATED_SAMPLES // number_of_samples)
+        for start in range(0, input_bit_size, chunk_size):
+            chunk_diffs = input_diffs[start:start + chunk_size]
+            inputs_avalanche = generate_inputs_prime_from_bit_sizes(self.cipher.inputs_bit_size, input_index,
+                                                                    chunk_diffs, inputs)
+            outputs_prime = self.cipher.evaluate_vectorized(inputs_avalanche, outputs=selected_outputs)
+            outputs_prime = outputs_prime.get("round_output", []) + outputs_prime["cipher_output"]
+            for r in range(number_of_rounds):
+                output_prime = outputs_prime[r].reshape(len(chunk_diffs), number_of_samples, output_byte_size)
+                np.bitwise_xor(outputs[r][:, np.newaxis], output_prime.transpose(1, 0, 2),
+                               out=outputs_avalanche[r, :, start:start + len(chunk_diffs)])
+
+        dataset = list(out)
         if save_file:
             if filename == "":
                 filename = self._cipher_primitive + "_avalanche_index_" + str(input_index)
@@ -68,25 +68,31 @@ def free_input(code):
 
 
 class Component:
+    __slots__ = ('_id', '_type', '_input', '_output_bit_size', '_description', '_suffixes')
+
     def __init__(self, component_id, component_type, component_input, output_bit_size, description):
         if not isinstance(component_input.id_links, list):
             print("type of [input_id_link] should be a list")
             return
 
-        if not isinstance(component_input.bit_positions, list):
-            print("type of [input_bit_positions] should be a list")
-            return
+        bit_positions = component_input.compact_bit_positions
+        if bit_positions is None:
+            bit_positions = component_input._bit_positions
 
-        if not isinstance(component_input.bit_positions[0], list):
-            print("element of [input_bit_positions] should be a list")
-            return
+            if not isinstance(bit_positions, list):
+                print("type of [input_bit_positions] should be a list")
+                return
+
+            if not isinstance(bit_positions[0], list):
+                print("element of [input_bit_positions] should be a list")
+                return
 
-        if len(component_input.id_links) != len(component_input.bit_positions):
+        if len(component_input.id_links) != len(bit_positions):
             print("[input_id_link] and [input_bit_positions] should have the same length")
             return
 
         length = 0
-        for i in component_input.bit_positions:
+        for i in bit_positions:
             length += len(i)
         if component_input.bit_size != length:
             print("the length of [input_bit_positions] is not equal to input_bit_size")
@@ -235,7 +241,7 @@ class Component:
             'type': self._type,
             'input_bit_size': self.input_bit_size,
             'input_id_link': self.input_id_links,
-            'input_bit_positions': self.input_bit_positions,
+            'input_bit_positions': [list(positions) for positions in self.input_bit_positions],
             'output_bit_size': self._output_bit_size,
             'description': self._description
         }
@@ -330,6 +336,9 @@ class Component:
         print(f"    'output_bit_size': {self._output_bit_size},")
         print(f"    'description': {self._description},")
 
+    def mark_as_shared(self):
+        self._input.mark_as_shared()
+
     def set_description(self, description):
         self._description = description
 
@@ -404,6 +413,10 @@ class Component:
     def input_bit_positions(self):
         return self._input.bit_positions
 
+    @property
+    def is_shared(self):
+        return self._input.is_shared
+
     @property
     def output_bit_size(self):
         return self._output_bit_size
@@ -93,6 +93,8 @@ def cp_xor_linear_probability_lat(numadd):
 
 
 class AND(MultiInputNonlinearLogicalOperator):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size):
         super().__init__(current_round_number, current_round_number_of_components,
@@ -314,6 +316,12 @@ class AND(MultiInputNonlinearLogicalOperator):
     def get_byte_based_vectorized_python_code(self, params):
         return [f'  {self.id} =byte_vector_AND({params})']
 
+    def get_bitsliced_python_code(self, params):
+        return [f'  {self.id} = bitsliced_AND([{",".join(params)} ], {self.description[1]}, {self.output_bit_size})']
+
+    def get_word_based_vectorized_python_code(self, params, word_size):
+        return [f'  {self.id} = word_vector_AND({params})']
+
     def smt_constraints(self):
         """
         Return a variable list and SMT-LIB list asserts representing AND operation FOR SMT CIPHER model.
@@ -24,6 +24,8 @@ from claasp.cipher_modules.models.sat.utils import constants, utils as sat_utils
 
 
 class CipherOutput(Component):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size, is_intermediate=False, output_tag=""):
         if is_intermediate:
@@ -253,6 +255,19 @@ class CipherOutput(Component):
                 f'      intermediateOutputs["{self.description[0]}"] = []',
                 f'  intermediateOutputs["{self.description[0]}"].append({self.id}.transpose())']
 
+    def get_bitsliced_python_code(self, params):
+        return [f'  {self.id} = bitsliced_CONCAT([{",".join(params)} ])',
+                f'  if "{self.description[0]}" not in intermediateOutputs.keys():',
+                f'      intermediateOutputs["{self.description[0]}"] = []',
+                f'  intermediateOutputs["{self.description[0]}"]'
+                f'.append(bitsliced_to_byte_vector({self.id}, number_of_samples).transpose())']
+
+    def get_word_based_vectorized_python_code(self, params, word_size):
+        return [f'  {self.id} = {params}',
+                f'  if "{self.description[0]}" not in intermediateOutputs.keys():',
+                f'      intermediateOutputs["{self.description[0]}"] = []',
+                f'  intermediateOutputs["{self.description[0]}"].append(word_vector_to_byte_vector({self.id}))']
+
     def milp_constraints(self, model):
         """
         Return lists variables and constrains modeling a component of type
@@ -22,6 +22,8 @@ from claasp.component import Component
 
 
 class Concatenate(Component):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size):
         component_id = f'concatenate_{current_round_number}_{current_round_number_of_components}'
@@ -47,6 +49,12 @@ class Concatenate(Component):
     def get_byte_based_vectorized_python_code(self, params):
         return [f'  {self.id} = np.vstack({params})']
 
+    def get_bitsliced_python_code(self, params):
+        return [f'  {self.id} = bitsliced_CONCAT([{",".join(params)} ])']
+
+    def get_word_based_vectorized_python_code(self, params, word_size):
+        return [f'  {self.id} = {params}']
+
     def get_word_based_c_code(self, verbosity, word_size, wordstring_variables):
         concatenate_code = []
         self.select_words(concatenate_code, word_size, False)
@@ -36,10 +36,12 @@ def constant_to_repr(val, output_size):
 
 
 class Constant(Component):
+    __slots__ = ()
 
     def __init__(self, current_round_number, current_round_number_of_components,
-                 output_bit_size, value):
-        component_id = f'constant_{current_round_number}_{current_round_number_of_components}'
+                 output_bit_size, value, component_id=None):
+        if component_id is None:
+            component_id = f'constant_{current_round_number}_{current_round_number_of_components}'
         component_type = 'constant'
         if output_bit_size % 4 == 0:
             description = [f"{value:#0{(output_bit_size // 4) + 2}x}"]
@@ -307,6 +309,17 @@ class Constant(Component):
         val = constant_to_repr(self.description[0], self.output_bit_size)
         return [f'  {self.id} = np.array({val}, dtype=np.uint8).reshape({len(val)}, 1)']
 
+    def get_bitsliced_python_code(self, params):
+        return [f'  {self.id} = np.array({constant_to_bitstring(self.description[0], self.output_bit_size)}, '
+                f'dtype=np.uint64).reshape({self.output_bit_size, 1}) * ALL_ONES']
+
+    def get_word_based_vectorized_python_code(self, params, word_size):
+        number_of_words = self.output_bit_size // word_size
+        value = int(self.description[0], 0)
+        words = [(value >> (word_size * (number_of_words - 1 - i))) & (2 ** word_size - 1)
+                 for i in range(number_of_words)]
+        return [f'  {self.id} = np.array({words}, dtype=np.uint{word_size}).reshape({number_of_words}, 1)']
+
     def get_word_based_c_code(self, verbosity, word_size, wordstring_variables):
         constant_code = [f'\tWordString *{self.id} = wordstring_from_hex_string("'
                          f'{int(self.description[0], 16):#0{(self.output_bit_size // 4) + 2}x}", '
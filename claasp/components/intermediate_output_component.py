@@ -50,6 +50,8 @@ def update_xor_linear_constraints_for_more_than_one_bit(constraints, intermediat
 
 
 class IntermediateOutput(CipherOutput):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size, output_tag):
         super().__init__(current_round_number, current_round_number_of_components,
@@ -23,6 +23,7 @@ from sage.rings.finite_rings.finite_field_constructor import FiniteField
 
 from claasp.input import Input
 from claasp.component import Component, free_input
+from claasp.cipher_modules.code_generator import linear_layer_to_xor_indices
 from claasp.cipher_modules.models.smt.utils import utils as smt_utils
 from claasp.cipher_modules.models.sat.utils import constants, utils as sat_utils
 from claasp.cipher_modules.models.milp.utils.generate_inequalities_for_xor_with_n_input_bits import (
@@ -54,6 +55,8 @@ def update_constraints_for_more_than_one_bit(constraints, dict_inequalities, i,
 
 
 class LinearLayer(Component):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components, input_id_links,
                  input_bit_positions, output_bit_size, description):
         component_id = f'linear_layer_{current_round_number}_{current_round_number_of_components}'
@@ -334,6 +337,10 @@ class LinearLayer(Component):
     def get_byte_based_vectorized_python_code(self, params):
         return [f'  {self.id} = byte_vector_linear_layer({params}, {self.description})']
 
+    def get_bitsliced_python_code(self, params):
+        return [f'  {self.id} = bitsliced_linear_layer(bitsliced_CONCAT([{",".join(params)} ]), '
+                f'{linear_layer_to_xor_indices(self.description)})']
+
     def milp_constraints(self, model):
         """
         Return lists of variables and constrains modeling a component of type LINEAR LAYER for MILP CIPHER model.
@@ -19,7 +19,7 @@
 
 from copy import deepcopy
 
-from sage.all import ZZ
+from sage.rings.integer_ring import ZZ
 from sage.matrix.constructor import Matrix
 from sage.structure.sequence import Sequence
 from sage.modules.free_module_element import vector
@@ -30,6 +30,7 @@ from claasp.input import Input
 from claasp.component import Component, free_input
 from claasp.utils.utils import int_to_poly
 from claasp.components.linear_layer_component import LinearLayer
+from claasp.cipher_modules.code_generator import mix_column_to_xor_indices
 from claasp.cipher_modules.component_analysis_tests import binary_matrix_of_linear_component, branch_number
 
 
@@ -80,6 +81,8 @@ def cp_get_all_inputs(word_size, input_bit_positions, input_id_link, numb_of_inp
 
 
 class MixColumn(LinearLayer):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components, input_id_links,
                  input_bit_positions, output_bit_size, description):
         super().__init__(current_round_number, current_round_number_of_components, input_id_links,
@@ -388,7 +391,7 @@ class MixColumn(LinearLayer):
         output_size = int(self.output_bit_size)
         input_id_link = self.input_id_links
         output_id_link = self.id
-        input_bit_positions = self.input_bit_positions
+        input_bit_positions = [list(positions) for positions in self.input_bit_positions]
         description = self.description
         numb_of_inp = len(input_id_link)
         all_inputs = []
@@ -541,6 +544,10 @@ class MixColumn(LinearLayer):
             return [f'  {self.id}=byte_vector_mix_column({params} , {matrix}, {mul_tables})']
         return [f'  {self.id}=byte_vector_mix_column_poly0({params} , {matrix})']
 
+    def get_bitsliced_python_code(self, params):
+        xor_indices = mix_column_to_xor_indices(*self.description[:3])
+        return [f'  {self.id} = bitsliced_linear_layer(bitsliced_CONCAT([{",".join(params)} ]), {xor_indices})']
+
     def milp_constraints(self, model):
         """
         Return lists of variables and constrains modeling a component of type MIX COLUMN for MILP CIPHER model.
@@ -40,6 +40,8 @@ def cp_twoterms(input_1, input_2, out, input_length, cp_constraints, cp_declarat
 
 
 class MODADD(Modular):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size):
         super().__init__(current_round_number, current_round_number_of_components,
@@ -237,6 +239,13 @@ class MODADD(Modular):
     def get_byte_based_vectorized_python_code(self, params):
         return [f'  {self.id} = byte_vector_MODADD({params})']
 
+    def get_bitsliced_python_code(self, params):
+        return [f'  {self.id} = '
+                f'bitsliced_MODADD([{",".join(params)} ], {self.description[1]}, {self.output_bit_size})']
+
+    def get_word_based_vectorized_python_code(self, params, word_size):
+        return [f'  {self.id} = word_vector_MODADD({params})']
+
     def sat_constraints(self):
         """
         Return a list of variables and a list of clauses for Modular Addition in SAT CIPHER model.
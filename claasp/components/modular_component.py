@@ -78,6 +78,8 @@ def generic_sign_linear_constraints(inputs, outputs):
 
 
 class Modular(Component):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size, operation):
 
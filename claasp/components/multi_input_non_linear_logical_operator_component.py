@@ -26,6 +26,7 @@ from claasp.cipher_modules.models.milp.utils.generate_inequalities_for_and_opera
 
 
 class MultiInputNonlinearLogicalOperator(Component):
+    __slots__ = ()
 
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size, operation):
@@ -24,6 +24,8 @@ from claasp.cipher_modules.models.sat.utils import constants, utils as sat_utils
 
 
 class NOT(Component):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size):
         component_id = f'not_{current_round_number}_{current_round_number_of_components}'
@@ -283,6 +285,12 @@ class NOT(Component):
     def get_byte_based_vectorized_python_code(self, params):
         return [f'  {self.id} = byte_vector_NOT({params})']
 
+    def get_bitsliced_python_code(self, params):
+        return [f'  {self.id} = bitsliced_NOT([{",".join(params)} ])']
+
+    def get_word_based_vectorized_python_code(self, params, word_size):
+        return [f'  {self.id} = word_vector_NOT({params})']
+
     def get_word_operation_sign(self, sign, solution):
         output_id_link = self.id
         input_size = self.input_bit_size
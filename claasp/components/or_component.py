@@ -22,6 +22,8 @@ from claasp.components.multi_input_non_linear_logical_operator_component import
 
 
 class OR(MultiInputNonlinearLogicalOperator):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size):
         super().__init__(current_round_number, current_round_number_of_components,
@@ -211,6 +213,12 @@ class OR(MultiInputNonlinearLogicalOperator):
     def get_byte_based_vectorized_python_code(self, params):
         return [f'  {self.id} = byte_vector_OR({params})']
 
+    def get_bitsliced_python_code(self, params):
+        return [f'  {self.id} = bitsliced_OR([{",".join(params)} ], {self.description[1]}, {self.output_bit_size})']
+
+    def get_word_based_vectorized_python_code(self, params, word_size):
+        return [f'  {self.id} = word_vector_OR({params})']
+
     def smt_constraints(self):
         """
         Return a variable list and SMT-LIB list asserts for OR operation in SMT CIPHER model.
@@ -21,6 +21,8 @@ from claasp.components.linear_layer_component import LinearLayer
 
 
 class Reverse(LinearLayer):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size):
         matrix = []
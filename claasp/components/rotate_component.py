@@ -24,6 +24,8 @@ from claasp.cipher_modules.models.sat.utils import constants, utils as sat_utils
 
 
 class Rotate(Component):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size, parameter):
         component_id = f'rot_{current_round_number}_{current_round_number_of_components}'
@@ -267,7 +269,7 @@ class Rotate(Component):
         output_size = int(self.output_bit_size)
         input_id_link = self.input_id_links
         output_id_link = self.id
-        input_bit_positions = self.input_bit_positions
+        input_bit_positions = [list(positions) for positions in self.input_bit_positions]
         word_size = model.word_size
         rot_amount = abs(self.description[1]) // word_size
         numb_of_inp = len(input_id_link)
@@ -352,6 +354,12 @@ class Rotate(Component):
     def get_byte_based_vectorized_python_code(self, params):
         return [f'  {self.id} = byte_vector_ROTATE({params}, {self.description[1]})']
 
+    def get_bitsliced_python_code(self, params):
+        return [f'  {self.id} = bitsliced_ROTATE([{",".join(params)} ], {self.description[1]})']
+
+    def get_word_based_vectorized_python_code(self, params, word_size):
+        return [f'  {self.id} = word_vector_ROTATE({params}, {self.description[1]}, {word_size})']
+
     def get_word_based_c_code(self, verbosity, word_size, wordstring_variables):
         rotate_code = []
 
@@ -167,6 +167,8 @@ def smt_get_sbox_probability_constraints(bit_ids, template):
 
 
 class SBOX(Component):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size, s_box_description):
         component_id = f'sbox_{current_round_number}_{current_round_number_of_components}'
@@ -583,6 +585,10 @@ class SBOX(Component):
     def get_byte_based_vectorized_python_code(self, params):
         return [f'  {self.id} = byte_vector_SBOX({params}, np.array({self.description}, dtype=np.uint8))']
 
+    def get_bitsliced_python_code(self, params):
+        return [f'  {self.id} = bitsliced_SBOX(bitsliced_CONCAT([{",".join(params)} ]), '
+                f'{tuple(self.description)}, {self.output_bit_size})']
+
     def get_word_based_c_code(self, verbosity, word_size, wordstring_variables):
         # TODO: consider the option for sbox
         return ['\t//// TODO']
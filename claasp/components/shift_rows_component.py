@@ -21,6 +21,8 @@ from claasp.components.rotate_component import Rotate
 
 
 class ShiftRows(Rotate):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size, parameter):
         super().__init__(current_round_number, current_round_number_of_components,
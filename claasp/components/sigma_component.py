@@ -24,6 +24,8 @@ from claasp.components.linear_layer_component import LinearLayer
 
 
 class Sigma(LinearLayer):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size, rotation_amounts_parameter):
         binary_matrix = linear_layer_to_binary_matrix(SIGMA, output_bit_size, output_bit_size, [rotation_amounts_parameter])
@@ -24,6 +24,8 @@ from claasp.cipher_modules.generic_functions import THETA_KECCAK
 
 
 class ThetaKeccak(LinearLayer):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size):
         binary_matrix = linear_layer_to_binary_matrix(THETA_KECCAK, output_bit_size, output_bit_size, [])
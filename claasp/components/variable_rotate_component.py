@@ -22,6 +22,8 @@ from claasp.component import Component
 
 
 class VariableRotate(Component):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size, parameter):
         component_id = f'var_rot_{current_round_number}_{current_round_number_of_components}'
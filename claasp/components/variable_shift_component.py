@@ -26,6 +26,8 @@ from claasp.cipher_modules.models.smt.utils import utils as smt_utils
 
 
 class VariableShift(Component):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size, parameter):
         component_id = f'var_shift_{current_round_number}_{current_round_number_of_components}'
@@ -127,6 +129,13 @@ class VariableShift(Component):
         return [f'  {self.id} = byte_vector_SHIFT_BY_VARIABLE_AMOUNT({params}, '
                 f'{self.output_bit_size}, {self.description[1]})']
 
+    def get_bitsliced_python_code(self, params):
+        return [f'  {self.id} = bitsliced_SHIFT_BY_VARIABLE_AMOUNT([{",".join(params)} ], '
+                f'{self.output_bit_size}, {self.description[1]})']
+
+    def get_word_based_vectorized_python_code(self, params, word_size):
+        return [f'  {self.id} = word_vector_SHIFT_BY_VARIABLE_AMOUNT({params}, {word_size}, {self.description[1]})']
+
     def get_word_based_c_code(self, verbosity, word_size, wordstring_variables):
         variable_shift_code = []
 
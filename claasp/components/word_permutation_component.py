@@ -21,6 +21,8 @@ from claasp.components.mix_column_component import MixColumn
 
 
 class WordPermutation(MixColumn):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions,
                  output_bit_size, permutation_description, word_size):
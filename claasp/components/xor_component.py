@@ -129,6 +129,8 @@ def get_milp_constraints_from_inequalities(inequalities, input_vars, number_of_i
 
 
 class XOR(Component):
+    __slots__ = ()
+
     def __init__(self, current_round_number, current_round_number_of_components,
                  input_id_links, input_bit_positions, output_bit_size):
         component_id = f'xor_{current_round_number}_{current_round_number_of_components}'
@@ -476,6 +478,12 @@ class XOR(Component):
     def get_byte_based_vectorized_python_code(self, params):
         return [f'  {self.id} = byte_vector_XOR({params})']
 
+    def get_bitsliced_python_code(self, params):
+        return [f'  {self.id} = bitsliced_XOR([{",".join(params)} ], {self.description[1]}, {self.output_bit_size})']
+
+    def get_word_based_vectorized_python_code(self, params, word_size):
+        return [f'  {self.id} = word_vector_XOR({params})']
+
     def get_word_operation_sign(self, constants, sign, solution):
         output_id_link = self.id
         input_id_links = self.input_id_links
@@ -854,7 +862,7 @@ class XOR(Component):
         output_size = int(self.output_bit_size)
         input_id_link = self.input_id_links
         output_id_link = self.id
-        input_bit_positions = self.input_bit_positions
+        input_bit_positions = [list(positions) for positions in self.input_bit_positions]
         description = self.description
         numadd = description[1]
         numb_of_inp = len(input_id_link)
@@ -17,7 +17,8 @@
 # ****************************************************************************
 
 
-from copy import deepcopy
+import hashlib
+from copy import copy, deepcopy
 
 from claasp.components.or_component import OR
 from claasp.components.and_component import AND
@@ -141,6 +142,7 @@ def add_cipher_output_component(cipher, input_id_links, input_bit_positions, out
 
 def add_component(cipher, component):
     cipher.rounds.add_component(component)
+    cipher.invalidate_caches(cipher.current_round_number)
 
 
 def add_concatenate_component(cipher, input_id_links, input_bit_positions, output_bit_size):
@@ -731,6 +733,7 @@ def add_round(cipher):
         }
     """
     cipher.rounds.add_round()
+    cipher.invalidate_caches(cipher.current_round_number)
     cipher.set_id(make_cipher_id(cipher.family_name, cipher.inputs, cipher.inputs_bit_size,
                                  cipher.output_bit_size, cipher.number_of_rounds))
     cipher.set_file_name(make_file_name(cipher.id))
@@ -1277,6 +1280,52 @@ def add_XOR_component(cipher, input_id_links, input_bit_positions, output_bit_si
     return new_component
 
 
+def copy_on_write(cipher):
+    """
+    Return a copy of the cipher sharing its components with the original one.
+
+    The copy has its own rounds, inputs and caches, while the components are shared and marked as such in both
+    ciphers: the editor replaces a shared component with a private copy (see :py:func:`get_writable_component`) before
+    modifying it, so that neither cipher sees the modifications of the other one.
+
+    Any other code modifying a component of either cipher must do the same: a component obtained otherwise may be
+    shared, and modifying it would silently change both ciphers while leaving their fingerprints and compiled
+    evaluators stale. ``set_input_id_links`` and ``set_input_bit_positions`` raise a ``RuntimeError`` on a shared
+    component, whose ``input_id_links`` and ``input_bit_positions`` are read-only as those of any component.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; an instance of the object cipher
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.editor import copy_on_write, get_writable_component
+        sage: speck = SpeckBlockCipher(number_of_rounds=4)
+        sage: speck_copy = copy_on_write(speck)
+        sage: component = get_writable_component(speck_copy, 'xor_1_10')
+        sage: component is speck.get_component_from_id('xor_1_10')
+        False
+        sage: component is speck_copy.get_component_from_id('xor_1_10')
+        True
+        sage: speck.get_component_from_id('xor_1_10').is_shared
+        True
+    """
+    cipher_copy = copy(cipher)
+    cipher_copy._rounds = copy(cipher.rounds)
+    cipher_copy._inputs = list(cipher.inputs)
+    cipher_copy._inputs_bit_size = list(cipher.inputs_bit_size)
+    cipher_copy._rounds_fingerprints = dict(cipher._rounds_fingerprints)
+    components = cipher.get_all_components()
+    for component in components:
+        component.mark_as_shared()
+    components_ids = {component.id for component in components}
+    cipher._shared_component_ids |= components_ids
+    cipher_copy._shared_component_ids = set(components_ids)
+
+    return cipher_copy
+
+
 def generate_expanded_links(component, input_bit_positions):
     expanded_links = []
     for link, positions in zip(component.input_id_links, input_bit_positions):
@@ -1316,6 +1365,27 @@ def get_unique_links_information(new_links):
     return unique_lengths, unique_links
 
 
+def get_writable_component(cipher, component_id):
+    """
+    Return the component of the cipher with id ``component_id``, replacing it first with a private copy if it is shared
+    with another cipher by :py:func:`copy_on_write`.
+
+    The returned component can be modified without affecting any other cipher.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; an instance of the object cipher
+    - ``component_id`` -- **string**; the id of the component
+    """
+    round_number, position, component = cipher.rounds.get_components_index()[component_id]
+    if component_id in cipher._shared_component_ids:
+        component = deepcopy(component)
+        cipher.rounds.replace_component(round_number, position, component)
+        cipher._shared_component_ids.discard(component_id)
+
+    return component
+
+
 def is_linear_layer_permutation(M, M_T):
     ones = [1] * len(M)
     M_has_only_one_1_in_rows = ([sum(row) for row in M] == ones)
@@ -1338,34 +1408,138 @@ def make_file_name(cipher_id):
     return f'{cipher_id}.py'
 
 
-def next_component_index_from(index):
-    return index + 1
+def make_component_fingerprint(component):
+    """
+    Return a hash of the id, the type, the input links, the input bit positions and the description of a component.
+
+    INPUT:
+
+    - ``component`` -- **Component object**; an instance of the object component
+
+    EXAMPLES::
+
+        sage: from claasp.components.rotate_component import Rotate
+        sage: from claasp.editor import make_component_fingerprint
+        sage: rotate = Rotate(0, 0, ['input'], [[0, 1, 2, 3]], 4, 1)
+        sage: make_component_fingerprint(rotate) == make_component_fingerprint(Rotate(0, 0, ['input'], [[0, 1, 2, 3]],
+        ....:                                                                         4, 1))
+        True
+        sage: make_component_fingerprint(rotate) == make_component_fingerprint(Rotate(0, 0, ['input'], [[0, 1, 2, 3]],
+        ....:                                                                         4, 2))
+        False
+    """
+    bit_positions = component._input.compact_bit_positions
+    if bit_positions is None:
+        bit_positions = component.input_bit_positions
+    else:
+        bit_positions = [list(positions) for positions in bit_positions]
+    structure = (component.id, component.type, component.input_bit_size, component.input_id_links, bit_positions,
+                 component.output_bit_size, component.description)
+
+    return hashlib.sha256(repr(structure).encode()).hexdigest()
+
+
+def make_round_fingerprints(cipher_round):
+    """
+    Return the hash of a round and a dictionary with the hash of each of its components.
+
+    The hash of the round is the hash of the sequence of the hashes of its components, so that it depends on their
+    order too.
+
+    INPUT:
+
+    - ``cipher_round`` -- **Round object**; a round of a cipher
+    """
+    components_fingerprints = {}
+    round_digest = hashlib.sha256()
+    for component in cipher_round.components:
+        component_fingerprint = make_component_fingerprint(component)
+        components_fingerprints.setdefault(component.id, component_fingerprint)
+        round_digest.update(component_fingerprint.encode())
+
+    return round_digest.hexdigest(), components_fingerprints
+
+
+def make_structural_fingerprint(cipher):
+    rounds_fingerprints = [cipher.get_round_fingerprint(round_number)
+                           for round_number in range(cipher.number_of_rounds)]
+    structure = (cipher.inputs, cipher.inputs_bit_size, cipher.output_bit_size, rounds_fingerprints)
+
+    return hashlib.sha256(repr(structure).encode()).hexdigest()
+
+
+def make_children_index(cipher):
+    """
+    Return a dictionary mapping the id of each component and each input of the cipher to the ids of the components
+    reading it, in the order of the cipher.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; an instance of the object cipher
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.editor import make_children_index
+        sage: speck = SpeckBlockCipher(number_of_rounds=2)
+        sage: list(make_children_index(speck)['rot_0_0'])
+        ['modadd_0_1']
+    """
+    children_index = {}
+    for component in cipher.get_all_components():
+        for link in component.input_id_links:
+            children_index.setdefault(link, {})[component.id] = None
+
+    return children_index
 
 
 def propagate_equivalences(cipher, round_id, component_id, new_expanded_links, new_positions):
-    for round_ in cipher._rounds.rounds[round_id:]:
-        for component in round_.components:
-            while component_id in component.input_id_links:
-                input_id_link = component.input_id_links
-                id_index = input_id_link.index(component_id)
-                old_positions = component.input_bit_positions[id_index]
-                new_links = [new_expanded_links[i] for i in old_positions]
-                new_input_positions = [new_positions[i] for i in old_positions]
-                unique_lengths, unique_links = get_unique_links_information(new_links)
-                final_input_positions = get_final_input_positions(new_input_positions, unique_lengths)
-                input_id_links = input_id_link[:id_index] + unique_links \
-                                 + input_id_link[id_index + 1:]
-                component.set_input_id_links(input_id_links)
-                input_bit_positions = component.input_bit_positions
-                component.set_input_bit_positions(input_bit_positions[:id_index] \
-                                                  + final_input_positions \
-                                                  + input_bit_positions[id_index + 1:])
-                while [] in component.input_bit_positions:
-                    component.input_bit_positions.remove([])
+    children_index = make_children_index(cipher)
+    rewire_children(cipher, component_id, new_expanded_links, new_positions, children_index)
+    cipher.invalidate_caches()
+
+
+def rewire_children(cipher, component_id, new_expanded_links, new_positions, children_index):
+    """
+    Make the children of a component read the bits its output bits are equal to.
+
+    The ``i``-th output bit of the component is equal to the bit ``new_positions[i]`` of ``new_expanded_links[i]``.
+    The children are looked up in ``children_index`` (see :py:func:`make_children_index`), which is updated with the
+    new links, so that rewiring all the components of a cipher is linear in its size. The caches of the cipher are
+    not invalidated.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; an instance of the object cipher
+    - ``component_id`` -- **string**; the id of the component
+    - ``new_expanded_links`` -- **list**; the link of each output bit of the component
+    - ``new_positions`` -- **list**; the position of each output bit of the component in its link
+    - ``children_index`` -- **dictionary**; the ids of the components reading each link
+    """
+    for child_id in children_index.pop(component_id, ()):
+        component = get_writable_component(cipher, child_id)
+        while component_id in component.input_id_links:
+            input_id_link = component.input_id_links
+            id_index = input_id_link.index(component_id)
+            old_positions = component.input_bit_positions[id_index]
+            new_links = [new_expanded_links[i] for i in old_positions]
+            new_input_positions = [new_positions[i] for i in old_positions]
+            unique_lengths, unique_links = get_unique_links_information(new_links)
+            final_input_positions = get_final_input_positions(new_input_positions, unique_lengths)
+            input_id_links = input_id_link[:id_index] + unique_links \
+                             + input_id_link[id_index + 1:]
+            component.set_input_id_links(input_id_links)
+            input_bit_position = component.input_bit_positions
+            input_bit_positions = input_bit_position[:id_index] + final_input_positions \
+                                  + input_bit_position[id_index + 1:]
+            component.set_input_bit_positions([positions for positions in input_bit_positions if positions != []])
+            for link in unique_links:
+                children_index.setdefault(link, {})[child_id] = None
 
 
 def propagate_permutations(cipher):
-    cipher_without_permutations = deepcopy(cipher)
+    cipher_without_permutations = copy_on_write(cipher)
+    children_index = make_children_index(cipher_without_permutations)
     ids_of_permutations = []
     for round_ in cipher_without_permutations.rounds_as_list:
         for component in round_.components:
@@ -1384,13 +1558,15 @@ def propagate_permutations(cipher):
                                                     for position in positions]
                         new_expanded_links = [expanded_links[row.index(1)] for row in M_T]
                         new_positions = [flat_input_bit_positions[row.index(1)] for row in M_T]
-                        propagate_equivalences(cipher_without_permutations, round_.id, component.id,
-                                               new_expanded_links, new_positions)
+                        rewire_children(cipher_without_permutations, component.id, new_expanded_links,
+                                        new_positions, children_index)
+    cipher_without_permutations.invalidate_caches()
     return (ids_of_permutations, cipher_without_permutations)
 
 
 def propagate_rotations(cipher):
-    cipher_without_rotations = deepcopy(cipher)
+    cipher_without_rotations = copy_on_write(cipher)
+    children_index = make_children_index(cipher_without_rotations)
     for round_ in cipher_without_rotations.rounds_as_list:
         for component in round_.components:
             if component.description[0] == 'ROTATE':
@@ -1403,30 +1579,34 @@ def propagate_rotations(cipher):
                 amount = component.description[1]
                 new_expanded_links = expanded_links[-amount:] + expanded_links[:-amount]
                 new_positions = flat_input_bit_positions[-amount:] + flat_input_bit_positions[:-amount]
-                propagate_equivalences(cipher_without_rotations, round_.id, component.id,
-                                       new_expanded_links, new_positions)
+                rewire_children(cipher_without_rotations, component.id, new_expanded_links, new_positions,
+                                children_index)
+    cipher_without_rotations.invalidate_caches()
     return cipher_without_rotations
 
 
 def remove_cipher_input_keys(cipher):
-    cipher_without_key_schedule = deepcopy(cipher)
+    cipher_without_key_schedule = copy_on_write(cipher)
     if INPUT_KEY in cipher_without_key_schedule.inputs:
         key_index = cipher_without_key_schedule.inputs.index(INPUT_KEY)
         cipher_without_key_schedule.inputs.pop(key_index)
         cipher_without_key_schedule.inputs_bit_size.pop(key_index)
+        cipher_without_key_schedule.invalidate_caches()
     return cipher_without_key_schedule
 
 
 def remove_forbidden_parents(rounds, cipher_without_key_schedule):
     forbidden_parents = {INPUT_KEY, CONSTANT}
     for cipher_round in rounds:
+        forbidden_components_ids = []
         for component in cipher_round.components:
             input_id_links = set(component.input_id_links)
             allowed_inputs = input_id_links - forbidden_parents
             other_links = list(filter(lambda link: CONSTANT in link, allowed_inputs))
             if (not allowed_inputs) or (len(other_links) == len(allowed_inputs)):
                 forbidden_parents.add(component.id)
-                cipher_without_key_schedule.remove_round_component_from_id(cipher_round.id, component.id)
+                forbidden_components_ids.append(component.id)
+        remove_round_components_from_ids(cipher_without_key_schedule, cipher_round.id, forbidden_components_ids)
 
 
 def remove_key_schedule(cipher):
@@ -1483,10 +1663,12 @@ def remove_key_schedule(cipher):
 def remove_orphan_components(cipher_without_key_schedule):
     links_or_types_to_save = {INTERMEDIATE_OUTPUT, CIPHER_OUTPUT}
     for cipher_round in reversed(cipher_without_key_schedule.rounds_as_list):
+        orphan_components_ids = []
         for component in reversed(cipher_round.components):
             links_or_types_to_save.update(component.input_id_links)
             if (component.id not in links_or_types_to_save) and (component.type not in links_or_types_to_save):
-                cipher_without_key_schedule.remove_round_component(cipher_round.id, component)
+                orphan_components_ids.append(component.id)
+        remove_round_components_from_ids(cipher_without_key_schedule, cipher_round.id, orphan_components_ids)
 
 
 def remove_permutations(cipher):
@@ -1544,10 +1726,11 @@ def remove_permutations(cipher):
         }
     """
     (ids_of_permutations, cipher_without_permutations) = propagate_permutations(cipher)
+    ids_of_permutations = set(ids_of_permutations)
     for round_ in cipher.rounds_as_list:
-        for component in round_.components:
-            if component.id in ids_of_permutations:
-                cipher_without_permutations.remove_round_component_from_id(round_.id, component.id)
+        remove_round_components_from_ids(cipher_without_permutations, round_.id,
+                                         [component.id for component in round_.components
+                                          if component.id in ids_of_permutations])
     return cipher_without_permutations
 
 
@@ -1607,18 +1790,27 @@ def remove_rotations(cipher):
     """
     cipher_without_rotations = propagate_rotations(cipher)
     for round_ in cipher.rounds_as_list:
-        for component in round_.components:
-            if component.description[0] == 'ROTATE':
-                cipher_without_rotations.remove_round_component_from_id(round_.id, component.id)
+        remove_round_components_from_ids(cipher_without_rotations, round_.id,
+                                         [component.id for component in round_.components
+                                          if component.description[0] == 'ROTATE'])
     return cipher_without_rotations
 
 
 def remove_round_component(cipher, round_id, component):
     cipher.rounds.remove_round_component(round_id, component)
+    cipher.invalidate_caches(round_id)
 
 
 def remove_round_component_from_id(cipher, round_id, component_id):
     cipher.rounds.remove_round_component_from_id(round_id, component_id)
+    cipher.invalidate_caches(round_id)
+
+
+def remove_round_components_from_ids(cipher, round_id, component_ids):
+    if not component_ids:
+        return
+    cipher.rounds.remove_round_components_from_ids(round_id, set(component_ids))
+    cipher.invalidate_caches(round_id)
 
 
 def sort_cipher(cipher):
@@ -1711,13 +1903,209 @@ def sort_cipher(cipher):
         'cipher_reference_code': None,
         }
     """
-    for i in range(cipher.number_of_rounds):
-        current_round = cipher.rounds.round_at(i)
-        for fixed_index in range(current_round.get_number_of_components()):
-            for moving_index in range(next_component_index_from(fixed_index),
-                                      current_round.number_of_components):
-                if current_round.is_component_input(fixed_index, moving_index):
-                    current_round.swap_components(fixed_index, moving_index)
+    if cipher.is_sorted:
+        return
+
+    is_modified = False
+    for cipher_round in cipher.rounds_as_list:
+        sorted_components = topologically_sorted_components(cipher_round.components)
+        if any(component is not sorted_component
+               for component, sorted_component in zip(cipher_round.components, sorted_components)):
+            cipher_round.components[:] = sorted_components
+            is_modified = True
+    if is_modified:
+        cipher.invalidate_caches()
+    cipher._is_sorted = True
+
+
+def topologically_sorted_components(components):
+    """
+    Return the components of a round sorted so that each component comes after the components of the round it reads.
+
+    The sort is a depth-first search running in time linear in the number of links: every component is emitted right
+    after the components it depends on, so that a round which is already sorted is left unchanged.
+
+    INPUT:
+
+    - ``components`` -- **list**; the components of a round
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.fancy_block_cipher import FancyBlockCipher
+        sage: from claasp.editor import topologically_sorted_components
+        sage: fancy = FancyBlockCipher(number_of_rounds=1)
+        sage: components = fancy.rounds.round_at(0).components
+        sage: topologically_sorted_components(components) == components
+        True
+        sage: sorted_components = topologically_sorted_components(components[::-1])
+        sage: ids = [component.id for component in sorted_components]
+        sage: all(ids.index(link) < ids.index(component.id) for component in sorted_components
+        ....:     for link in component.input_id_links if link in ids)
+        True
+    """
+    positions = {}
+    for position, component in enumerate(components):
+        positions.setdefault(component.id, position)
+    parents = [[positions[link] for link in component.input_id_links if link in positions]
+               for component in components]
+
+    not_visited, visiting, visited = 0, 1, 2
+    states = [not_visited] * len(components)
+    sorted_components = []
+    for root in range(len(components)):
+        if states[root] != not_visited:
+            continue
+        states[root] = visiting
+        stack = [(root, iter(parents[root]))]
+        while stack:
+            position, remaining_parents = stack[-1]
+            for parent in remaining_parents:
+                if states[parent] == visiting:
+                    raise ValueError(f'The round has a cycle through the components {components[parent].id} and '
+                                     f'{components[position].id}.')
+                if states[parent] == not_visited:
+                    states[parent] = visiting
+                    stack.append((parent, iter(parents[parent])))
+                    break
+            else:
+                stack.pop()
+                states[position] = visited
+                sorted_components.append(components[position])
+
+    return sorted_components
+
+
+def specialize(cipher, fixed_inputs):
+    """
+    Return a copy of the cipher in which the inputs ``fixed_inputs`` are fixed.
+
+    Every component depending only on the fixed inputs and on constants (e.g. the whole key schedule when the key is
+    fixed) is evaluated once and replaced by a constant component with the same id, the fixed inputs are replaced by
+    constant components and removed from the inputs of the cipher, and the components which are no longer used are
+    removed. The specialized cipher can be evaluated with any evaluator on the remaining inputs only.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; an instance of the object cipher
+    - ``fixed_inputs`` -- **dictionary**; the value of each fixed input, keyed by the name of the input
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.editor import specialize
+        sage: speck = SpeckBlockCipher(number_of_rounds=4)
+        sage: fixed_key_speck = specialize(speck, {'key': 0x1918111009080100})
+        sage: fixed_key_speck.inputs
+        ['plaintext']
+        sage: fixed_key_speck.evaluate([0x6574694c]) == speck.evaluate([0x6574694c, 0x1918111009080100])
+        True
+    """
+    unknown_inputs = set(fixed_inputs) - set(cipher.inputs)
+    if unknown_inputs:
+        raise ValueError(f'The cipher has no input {", ".join(sorted(unknown_inputs))}.')
+    cipher_input = [fixed_inputs.get(input_name, 0) for input_name in cipher.inputs]
+    components_io = cipher.evaluate(cipher_input, intermediate_output=True, backend='int')[2]
+
+    specialized_cipher = copy_on_write(cipher)
+    fixed_links = set(fixed_inputs) | {''}
+    for cipher_round in specialized_cipher.rounds_as_list:
+        for index, component in enumerate(cipher_round.components):
+            if component.type in (INTERMEDIATE_OUTPUT, CIPHER_OUTPUT) or \
+                    not set(component.input_id_links) <= fixed_links:
+                continue
+            fixed_links.add(component.id)
+            if component.type != CONSTANT:
+                constant = Constant(cipher_round.id, index, component.output_bit_size, components_io[component.id][1],
+                                    component_id=component.id)
+                specialized_cipher.rounds.replace_component(cipher_round.id, index, constant)
+
+    components_ids = set(specialized_cipher.get_all_components_ids())
+    first_round_components = specialized_cipher.rounds.round_at(0).components
+    for input_name, value in fixed_inputs.items():
+        input_index = specialized_cipher.inputs.index(input_name)
+        index = len(first_round_components)
+        while f'{CONSTANT}_0_{index}' in components_ids:
+            index += 1
+        constant = Constant(0, index, specialized_cipher.inputs_bit_size[input_index], value)
+        components_ids.add(constant.id)
+        first_round_components.insert(0, constant)
+        specialized_cipher.rounds.invalidate_components_index()
+        for component in specialized_cipher.get_all_components():
+            if input_name in component.input_id_links:
+                component = get_writable_component(specialized_cipher, component.id)
+                component.set_input_id_links([constant.id if link == input_name else link
+                                              for link in component.input_id_links])
+        specialized_cipher.inputs.pop(input_index)
+        specialized_cipher.inputs_bit_size.pop(input_index)
+
+    specialized_cipher.invalidate_caches()
+    remove_orphan_components(specialized_cipher)
+
+    return specialized_cipher
+
+
+def truncate(cipher, number_of_rounds):
+    """
+    Return a copy of the cipher reduced to its first ``number_of_rounds`` rounds.
+
+    The copy is made by :py:func:`copy_on_write`, so that the components of the remaining rounds are shared with the
+    original cipher. The last ``round_output`` intermediate output of the new last round becomes the cipher output,
+    with the same round and component numbers in its id. The components that were only read by the removed rounds,
+    such as the computations following this ``round_output``, are removed.
+
+    The result is the cipher built with ``number_of_rounds`` rounds only when the last round of the cipher has the
+    same structure as the other ones and the components do not depend on the total number of rounds, as in Speck or
+    ChaCha. For instance, the final key addition of PRESENT is not part of the truncated cipher, and the round
+    constants of a truncated Ascon are those of the first rounds of the original one.
+
+    INPUT:
+
+    - ``cipher`` -- **Cipher object**; an instance of the object cipher
+    - ``number_of_rounds`` -- **integer**; the number of rounds of the truncated cipher
+
+    EXAMPLES::
+
+        sage: from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+        sage: from claasp.editor import truncate
+        sage: speck = SpeckBlockCipher(number_of_rounds=5)
+        sage: speck_3_rounds = truncate(speck, 3)
+        sage: speck_3_rounds.id
+        'speck_p32_k64_o32_r3'
+        sage: speck_3_rounds.get_all_components_ids()[-1]
+        'cipher_output_2_12'
+        sage: speck_3_rounds.get_component_from_id('xor_1_10') is speck.get_component_from_id('xor_1_10')
+        True
+    """
+    if not 0 < number_of_rounds <= cipher.number_of_rounds:
+        raise ValueError(f'The number of rounds must be between 1 and {cipher.number_of_rounds}.')
+
+    truncated_cipher = copy_on_write(cipher)
+    if number_of_rounds == cipher.number_of_rounds:
+        return truncated_cipher
+
+    last_round = truncated_cipher.rounds.round_at(number_of_rounds - 1)
+    round_output_positions = [position for position, component in enumerate(last_round.components)
+                              if component.type == INTERMEDIATE_OUTPUT and component.description == ['round_output']]
+    if not round_output_positions:
+        raise ValueError(f'The round {number_of_rounds - 1} has no round output to be used as cipher output.')
+
+    position = round_output_positions[-1]
+    round_output = last_round.component_from(position)
+    component_number = int(round_output.id.rsplit('_', 1)[1])
+    cipher_output = CipherOutput(last_round.id, component_number, list(round_output.input_id_links),
+                                 [list(positions) for positions in round_output.input_bit_positions],
+                                 round_output.output_bit_size)
+    truncated_cipher.rounds.remove_rounds_from(number_of_rounds)
+    truncated_cipher.rounds.replace_component(last_round.id, position, cipher_output)
+    for round_number in range(number_of_rounds - 1, cipher.number_of_rounds):
+        truncated_cipher.invalidate_caches(round_number)
+    remove_orphan_components(truncated_cipher)
+    truncated_cipher.set_id(make_cipher_id(truncated_cipher.family_name, truncated_cipher.inputs,
+                                           truncated_cipher.inputs_bit_size, truncated_cipher.output_bit_size,
+                                           number_of_rounds))
+    truncated_cipher.set_file_name(make_file_name(truncated_cipher.id))
+
+    return truncated_cipher
 
 
 def update_cipher_inputs(cipher_without_key_schedule, component_id, modified, offset):
@@ -1730,14 +2118,18 @@ def update_component_inputs(component, component_id, parent_links):
     offset = 0
     modified = False
     parent_links.add(component.id)
-    input_id_links = component.input_id_links
+    input_id_links = list(component.input_id_links)
+    input_bit_positions = list(component.input_bit_positions)
     for i in range(len(input_id_links)):
         if input_id_links[i] not in parent_links and input_id_links[i] != '':
             input_id_links[i] = component_id
-            bit_len = len(component.input_bit_positions[i])
-            component.input_bit_positions[i] = list(range(offset, bit_len + offset))
+            bit_len = len(input_bit_positions[i])
+            input_bit_positions[i] = list(range(offset, bit_len + offset))
             offset += bit_len
             modified = True
+    if modified:
+        component.set_input_id_links(input_id_links)
+        component.set_input_bit_positions(input_bit_positions)
     return modified, offset
 
 
@@ -1746,5 +2138,8 @@ def update_inputs(cipher_without_key_schedule):
     for cipher_round in cipher_without_key_schedule.rounds_as_list:
         for index, component in enumerate(cipher_round.components):
             component_id = f'key_{cipher_round.id}_{index}'
+            if any(link not in parent_links and link != '' for link in component.input_id_links):
+                component = get_writable_component(cipher_without_key_schedule, component.id)
             modified, offset = update_component_inputs(component, component_id, parent_links)
             update_cipher_inputs(cipher_without_key_schedule, component_id, modified, offset)
+    cipher_without_key_schedule.invalidate_caches()
@@ -16,27 +16,198 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 # ****************************************************************************
 
+from collections.abc import Sequence
+
+SHARED_INPUT_MODIFICATION_ERROR = ("The component is shared between ciphers by copy_on_write: get it with "
+                                   "claasp.editor.get_writable_component before modifying it.")
+READ_ONLY_INPUT_ERROR = ("The inputs of a component are read-only: use Component.set_input_id_links and "
+                         "Component.set_input_bit_positions to modify them.")
+
+
+class ReadOnlyList(list):
+    """
+    A list whose methods modifying it in place raise a ``TypeError``. Copies and pickles of it are plain lists.
+
+    EXAMPLES::
+
+        sage: from claasp.input import ReadOnlyList
+        sage: positions = ReadOnlyList(range(4))
+        sage: positions == [0, 1, 2, 3]
+        True
+        sage: positions.append(4)
+        Traceback (most recent call last):
+        ...
+        TypeError: The inputs of a component are read-only: use Component.set_input_id_links and ...
+    """
+    __slots__ = ()
+
+    def _raise_read_only_error(self, *args, **kwargs):
+        raise TypeError(READ_ONLY_INPUT_ERROR)
+
+    append = extend = insert = remove = pop = clear = sort = reverse = _raise_read_only_error
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _raise_read_only_error
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+class BitPositionsView(Sequence):
+    """
+    A read-only view of the bit positions of an input, behaving as a list of :py:class:`ReadOnlyList`.
+
+    Each list of bit positions is built from the stored form when it is read and is not kept, so that reading the bit
+    positions does not cost more memory than the compact form. Copies and pickles of the view are plain lists of lists.
+
+    INPUT:
+
+    - ``bit_positions`` -- **tuple**; the bit positions in the compact form returned by :py:func:`compact_bit_positions`
+
+    EXAMPLES::
+
+        sage: from claasp.input import BitPositionsView
+        sage: bit_positions = BitPositionsView((range(0, 4), (7, 5)))
+        sage: bit_positions
+        [[0, 1, 2, 3], [7, 5]]
+        sage: bit_positions == [[0, 1, 2, 3], [7, 5]]
+        True
+        sage: bit_positions[1]
+        [7, 5]
+    """
+    __slots__ = ('_bit_positions',)
+    __hash__ = None
+
+    def __init__(self, bit_positions):
+        self._bit_positions = bit_positions
+
+    def __add__(self, other):
+        return list(self) + other
+
+    def __radd__(self, other):
+        return other + list(self)
+
+    def __eq__(self, other):
+        if isinstance(other, BitPositionsView):
+            other = list(other)
+        if not isinstance(other, list):
+            return NotImplemented
+
+        return list(self) == other
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ReadOnlyList(positions) for positions in self._bit_positions[index]]
+
+        return ReadOnlyList(self._bit_positions[index])
+
+    def __iter__(self):
+        return map(ReadOnlyList, self._bit_positions)
+
+    def __len__(self):
+        return len(self._bit_positions)
+
+    def __reduce__(self):
+        return list, ([list(positions) for positions in self._bit_positions],)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+def compact_bit_positions(bit_positions):
+    """
+    Return the bit positions as a tuple with a ``range`` for each list of consecutive positions, a tuple otherwise.
+
+    Ranges and tuples of integers are immutable, so that they are shared instead of copied by ``deepcopy``, and a
+    range takes the same memory whatever its length. Return None if ``bit_positions`` is not a list of lists of
+    integers.
+
+    INPUT:
+
+    - ``bit_positions`` -- **list**; a list of lists of bit positions
+
+    EXAMPLES::
+
+        sage: from claasp.input import compact_bit_positions
+        sage: compact_bit_positions([[0, 1, 2, 3], [7, 5]])
+        (range(0, 4), (7, 5))
+    """
+    if isinstance(bit_positions, BitPositionsView):
+        bit_positions = list(bit_positions)
+    if not isinstance(bit_positions, list):
+        return None
+    compact = []
+    for positions in bit_positions:
+        if not isinstance(positions, list) or not all(type(position) is int for position in positions):
+            return None
+        if positions and all(position == positions[0] + i for i, position in enumerate(positions)):
+            compact.append(range(positions[0], positions[0] + len(positions)))
+        else:
+            compact.append(tuple(positions))
+
+    return tuple(compact)
+
 
 class Input:
+    """
+    The input of a component: its bit size, the ids of the components it reads and the bit positions read in each.
+
+    The bit positions are stored in the compact form returned by :py:func:`compact_bit_positions` and read through
+    a :py:class:`BitPositionsView`, which expands them without keeping the lists. They are read-only: they are
+    modified with :py:meth:`set_input_bit_positions` only. Copies and pickles store the compact form.
+
+    The ids are a :py:class:`ReadOnlyList` as well, modified with :py:meth:`set_input_id_links` only.
+
+    An input marked as shared by :py:func:`~claasp.editor.copy_on_write` belongs to several ciphers and must not be
+    modified: its setters raise a ``RuntimeError``. Copies and pickles are never shared.
+    """
+    __slots__ = ('_bit_size', '_id_links', '_bit_positions', '_compact_bit_positions', '_is_shared')
+
     def __init__(self, input_bit_size, id_links, bit_positions):
         self._bit_size = input_bit_size
-        self._id_links = id_links
-        self._bit_positions = bit_positions
+        self._is_shared = False
+        self.set_input_id_links(id_links)
+        self.set_input_bit_positions(bit_positions)
+
+    def __getstate__(self):
+        return self._bit_size, self._id_links, self._bit_positions, self._compact_bit_positions
+
+    def __setstate__(self, state):
+        self._bit_size, id_links, self._bit_positions, self._compact_bit_positions = state
+        self._id_links = ReadOnlyList(id_links) if isinstance(id_links, list) else id_links
+        self._is_shared = False
+
+    def mark_as_shared(self):
+        self._is_shared = True
 
     def set_input_id_links(self, id_links):
-        self._id_links = id_links
+        if self._is_shared:
+            raise RuntimeError(SHARED_INPUT_MODIFICATION_ERROR)
+        self._id_links = ReadOnlyList(id_links) if isinstance(id_links, list) else id_links
 
     def set_input_bit_positions(self, bit_positions):
-        self._bit_positions = bit_positions
+        if self._is_shared:
+            raise RuntimeError(SHARED_INPUT_MODIFICATION_ERROR)
+        self._compact_bit_positions = compact_bit_positions(bit_positions)
+        self._bit_positions = bit_positions if self._compact_bit_positions is None else None
 
     @property
     def bit_positions(self):
-        return self._bit_positions
+        if self._compact_bit_positions is None:
+            return BitPositionsView(self._bit_positions)
+
+        return BitPositionsView(self._compact_bit_positions)
 
     @property
     def bit_size(self):
         return self._bit_size
 
+    @property
+    def compact_bit_positions(self):
+        return self._compact_bit_positions
+
     @property
     def id_links(self):
         return self._id_links
+
+    @property
+    def is_shared(self):
+        return self._is_shared
@@ -18,10 +18,18 @@
 
 
 class Round:
+    __slots__ = ('_id', '_components')
+
     def __init__(self, round_id):
         self._id = round_id
         self._components = []
 
+    def __copy__(self):
+        round_copy = Round(self._id)
+        round_copy._components = list(self._components)
+
+        return round_copy
+
     def add_component(self, component):
         self._components.append(component)
 
@@ -91,6 +99,9 @@ class Round:
     def remove_component_from_id(self, component_id):
         self._components.remove(self.get_component_from_id(component_id))
 
+    def remove_components_from_ids(self, component_ids):
+        self._components[:] = [component for component in self._components if component.id not in component_ids]
+
     def round_as_python_dictionary(self):
         round_dictionary = []
         for component_number in range(self.number_of_components):
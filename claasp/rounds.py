@@ -17,17 +17,39 @@
 # ****************************************************************************
 
 
+from copy import copy
+
 from claasp.round import Round
 from claasp.DTOs.power_of_2_word_based_dto import PowerOf2WordBasedDTO
 
 
 class Rounds:
+    __slots__ = ('_current_round_number', '_rounds', '_components_index', '_all_components')
+
     def __init__(self):
         self._current_round_number = None  # No rounds added on creation
         self._rounds = []
+        self._components_index = None
+        self._all_components = None
+
+    def __copy__(self):
+        rounds_copy = Rounds()
+        rounds_copy._current_round_number = self._current_round_number
+        rounds_copy._rounds = [copy(cipher_round) for cipher_round in self._rounds]
+        if self._components_index is not None:
+            rounds_copy._components_index = dict(self._components_index)
+        if self._all_components is not None:
+            rounds_copy._all_components = list(self._all_components)
+
+        return rounds_copy
 
     def add_component(self, component):
         self.current_round.add_component(component)
+        if self._components_index is not None:
+            self._components_index.setdefault(
+                component.id, (self._current_round_number, self.current_round.number_of_components - 1, component))
+        if self._all_components is not None:
+            self._all_components.append(component)
 
     def add_round(self):
         if self._current_round_number is None:
@@ -98,34 +120,57 @@ class Rounds:
         return self.round_at(round_number).components
 
     def get_all_components(self):
-        components = []
-        for cipher_round in self._rounds:
-            components += cipher_round.components
+        if self._all_components is None:
+            self._all_components = []
+            for cipher_round in self._rounds:
+                self._all_components += cipher_round.components
 
-        return components
+        return list(self._all_components)
 
     def get_all_components_ids(self):
-        components_ids = []
-        for cipher_round in self._rounds:
-            components_ids += cipher_round.get_components_ids()
-
-        return components_ids
+        return [component.id for component in self.get_all_components()]
 
     def get_component_from_id(self, component_id):
-        for cipher_round in self._rounds:
-            component = cipher_round.get_component_from_id(component_id)
-            if component is not None:
-                return component
-        raise ValueError(f'Component with id {component_id} not found.')
+        location = self.get_components_index().get(component_id)
+        if location is None:
+            raise ValueError(f'Component with id {component_id} not found.')
+
+        return location[2]
+
+    def get_components_index(self):
+        """
+        Return a dictionary mapping the id of each component to its round number, its position and the component.
+
+        The index is built on the first call and kept up to date by :py:meth:`add_component`,
+        :py:meth:`remove_round_component`, :py:meth:`remove_round_component_from_id` and :py:meth:`swap_components`.
+        Code modifying the rounds directly must call :py:meth:`invalidate_components_index`.
+
+        EXAMPLES::
+
+            sage: from claasp.ciphers.block_ciphers.fancy_block_cipher import FancyBlockCipher
+            sage: fancy = FancyBlockCipher(number_of_rounds=2)
+            sage: round_number, position, component = fancy.rounds.get_components_index()['xor_1_14']
+            sage: round_number, position, component.id
+            (1, 14, 'xor_1_14')
+        """
+        if self._components_index is None:
+            self._components_index = {}
+            for round_number, cipher_round in enumerate(self._rounds):
+                for position, component in enumerate(cipher_round.components):
+                    self._components_index.setdefault(component.id, (round_number, position, component))
+
+        return self._components_index
 
     def get_round_from_component_id(self, component_id):
-        for cipher_round in self._rounds:
-            round_number = cipher_round.get_round_from_component_id(component_id)
+        location = self.get_components_index().get(component_id)
+        if location is None:
+            return -1
 
-            if round_number is not None:
-                return round_number
+        return location[0]
 
-        return -1
+    def invalidate_components_index(self):
+        self._components_index = None
+        self._all_components = None
 
     def is_power_of_2_word_based(self):
         dto = PowerOf2WordBasedDTO()
@@ -152,9 +197,31 @@ class Rounds:
 
     def remove_round_component(self, round_number, component):
         self._rounds[round_number].remove_component(component)
+        self.invalidate_components_index()
 
     def remove_round_component_from_id(self, round_number, component_id):
         self._rounds[round_number].remove_component_from_id(component_id)
+        self.invalidate_components_index()
+
+    def remove_round_components_from_ids(self, round_number, component_ids):
+        self._rounds[round_number].remove_components_from_ids(component_ids)
+        self.invalidate_components_index()
+
+    def remove_rounds_from(self, round_number):
+        del self._rounds[round_number:]
+        self._current_round_number = round_number - 1 if round_number > 0 else None
+        self.invalidate_components_index()
+
+    def replace_component(self, round_number, position, component):
+        cipher_round = self._rounds[round_number]
+        replaced_component = cipher_round.component_from(position)
+        cipher_round.components[position] = component
+        if component.id != replaced_component.id:
+            self.invalidate_components_index()
+            return
+        self._all_components = None
+        if self._components_index is not None and self._components_index[component.id][2] is replaced_component:
+            self._components_index[component.id] = (round_number, position, component)
 
     def round_at(self, round_number):
         return self._rounds[round_number]
@@ -167,6 +234,21 @@ class Rounds:
 
         return rounds_dictionary
 
+    def swap_components(self, round_number, fixed_index, moving_index):
+        cipher_round = self._rounds[round_number]
+        cipher_round.swap_components(fixed_index, moving_index)
+        self._all_components = None
+        if self._components_index is None:
+            return
+        fixed_component = cipher_round.component_from(fixed_index)
+        moving_component = cipher_round.component_from(moving_index)
+        if fixed_component.id == moving_component.id:
+            self._components_index = None
+            return
+        for position, component in ((fixed_index, fixed_component), (moving_index, moving_component)):
+            if self._components_index[component.id][2] is component:
+                self._components_index[component.id] = (round_number, position, component)
+
     @property
     def current_round(self):
         return self._rounds[self._current_round_number]
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from claasp.cipher_modules import avalanche_tests
+from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+
+
+def test_avalanche_probability_vectors(monkeypatch):
+    speck = SpeckBlockCipher(block_bit_size=16, key_bit_size=32, number_of_rounds=5)
+    np.random.seed(0)
+    apvs = avalanche_tests.avalanche_probability_vectors(speck, 100)
+    assert len(apvs["key"]["round_output"]) == 32
+    assert len(apvs["plaintext"]["cipher_output"][15][0]) == 16
+
+    monkeypatch.setattr(avalanche_tests, "MAXIMUM_NUMBER_OF_EVALUATED_SAMPLES", 300)
+    np.random.seed(0)
+    assert avalanche_tests.avalanche_probability_vectors(speck, 100) == apvs
+
+
+def test_generate_inputs_prime():
+    speck = SpeckBlockCipher(block_bit_size=16, key_bit_size=32, number_of_rounds=5)
+    inputs = [np.zeros((2, 3), dtype=np.uint8), np.zeros((4, 3), dtype=np.uint8)]
+    inputs_prime = avalanche_tests.generate_inputs_prime(speck, 0, [0, 15], inputs)
+    assert inputs_prime[0].tolist() == [[0x80, 0x80, 0x80, 0, 0, 0], [0, 0, 0, 1, 1, 1]]
+    assert inputs_prime[1].shape == (4, 6)
+    assert not inputs_prime[1].any()
+
+
+def test_avalanche_probability_vectors_until_decided():
+    speck = SpeckBlockCipher(block_bit_size=16, key_bit_size=32, number_of_rounds=5)
+    criteria_parameters = {"avalanche_dependence_vectors": [True, 1, 0]}
+    np.random.seed(0)
+    apvs, number_of_samples = avalanche_tests.avalanche_probability_vectors_until_decided(
+        speck, 10000, 0.95, 0.05, criteria_parameters)
+    assert number_of_samples < 10000
+    assert len(apvs["key"]["round_output"]) == 32
+
+    np.random.seed(0)
+    _, number_of_samples = avalanche_tests.avalanche_probability_vectors_until_decided(
+        speck, 150, 0.95, 0.05, criteria_parameters)
+    assert number_of_samples == 150
+
+
+def test_are_avalanche_criteria_decided():
+    criteria_parameters = {"avalanche_weight_vectors": [True, 1 / 2, 0.5]}
+    flip_counts = {"plaintext": {"round_output": np.full((1, 1, 2), 500)}}
+    assert avalanche_tests.are_avalanche_criteria_decided(flip_counts, 1000, 0.95, 0.05, criteria_parameters)
+    assert not avalanche_tests.are_avalanche_criteria_decided(flip_counts, 1000, 0.95, 0.05,
+                                                              {"avalanche_weight_vectors": [True, 1 / 2, 0.01]})
+    assert avalanche_tests.are_avalanche_criteria_decided(flip_counts, 1000, 0.95, 0.05,
+                                                          {"avalanche_weight_vectors": [False, 1 / 2, 0.01]})
+
+
+def test_are_avalanche_criteria_decided_for_all_intervals():
+    criteria_parameters = {"avalanche_weight_vectors": [True, 1 / 2, 0.1]}
+    flip_counts = {"plaintext": {"round_output": np.full((1, 1, 2), 500)}}
+    assert avalanche_tests.are_avalanche_criteria_decided(flip_counts, 1000, 0.95, 0.05, criteria_parameters)
+    flip_counts["key"] = {"round_output": np.full((1000, 1, 2), 500)}
+    assert not avalanche_tests.are_avalanche_criteria_decided(flip_counts, 1000, 0.95, 0.05, criteria_parameters)
+
+
+def test_get_batch_sizes():
+    assert avalanche_tests.get_batch_sizes(1000) == [100, 100, 200, 400, 200]
+    assert avalanche_tests.get_batch_sizes(150) == [100, 50]
+    assert avalanche_tests.get_batch_sizes(50) == [50]
+
+
+def test_avalanche_tests_with_arrays():
+    speck = SpeckBlockCipher(block_bit_size=16, key_bit_size=32, number_of_rounds=5)
+    np.random.seed(0)
+    d = avalanche_tests.avalanche_tests(speck, number_of_samples=100)
+    np.random.seed(0)
+    a = avalanche_tests.avalanche_tests(speck, number_of_samples=100, result_format="arrays")
+    dependence = a["test_results"]["key"]["round_output"]["avalanche_dependence_vectors"]
+    assert dependence["vectors"].shape == (32, 4, 16)
+    assert dependence["totals"].shape == dependence["criterion_satisfied"].shape == (32, 4)
+    assert dependence["average_vectors"].shape == (4, 16)
+
+    v = avalanche_tests.convert_avalanche_test_results_to_dictionary(a)
+    assert v["input_parameters"] == d["input_parameters"]
+    assert v["test_results"]["key"]["round_output"]["avalanche_dependence_vectors"] == \
+        d["test_results"]["key"]["round_output"]["avalanche_dependence_vectors"]
+    assert v["test_results"]["plaintext"]["cipher_output"]["avalanche_weight_vectors"]["worst_differences"] == \
+        d["test_results"]["plaintext"]["cipher_output"]["avalanche_weight_vectors"]["worst_differences"]
+    assert avalanche_tests.generate_heatmap_graphs_for_avalanche_tests(speck, a) == \
+        avalanche_tests.generate_heatmap_graphs_for_avalanche_tests(speck, d)
+
+    with pytest.raises(ValueError):
+        avalanche_tests.avalanche_tests(speck, number_of_samples=100, result_format="json")
+
+
+def test_get_worst_input_differences():
+    criterion_satisfied = np.array([[False, True, True], [True, False, True], [True, True, True], [False, False, True]])
+    assert avalanche_tests.get_worst_input_differences(criterion_satisfied, np.array([0, 1, 2])) == [1, 3]
+    assert avalanche_tests.get_worst_input_differences(np.ones((2, 3), dtype=bool), np.array([0, 1, 2])) == []
+
+
+def test_avalanche_tests_with_processes():
+    speck = SpeckBlockCipher(block_bit_size=16, key_bit_size=32, number_of_rounds=5)
+    d = avalanche_tests.avalanche_tests(speck, number_of_samples=100, seed=0)
+    assert d["input_parameters"]["seed"] == 0
+    assert avalanche_tests.avalanche_tests(speck, number_of_samples=100, processes=2, seed=0) == d
+    assert avalanche_tests.avalanche_tests(speck, number_of_samples=100, processes=3, seed=0) == d
+
+    d = avalanche_tests.avalanche_tests(speck, number_of_samples=10000, confidence_level=0.95, seed=1,
+                                        run_avalanche_weight=False, run_avalanche_entropy=False)
+    assert avalanche_tests.avalanche_tests(speck, number_of_samples=10000, confidence_level=0.95, processes=2,
+                                           seed=1, run_avalanche_weight=False, run_avalanche_entropy=False) == d
@@ -0,0 +1,30 @@
+import os
+
+from claasp.cipher_modules.c_build_cache import build_c_artifact, delete_c_artifacts, get_c_build_key
+
+
+def test_get_c_build_key():
+    assert get_c_build_key('int main() {}', [], ['-O3']) == get_c_build_key('int main() {}', [], ['-O3'])
+    assert get_c_build_key('int main() {}', [], ['-O3']) != get_c_build_key('int main() {}', [], ['-O2'])
+    assert get_c_build_key('int main() {}', [], ['-O3']) != get_c_build_key('int main() { }', [], ['-O3'])
+
+
+def test_build_c_artifact(tmp_path, monkeypatch):
+    monkeypatch.setenv('CLAASP_C_BUILD_CACHE_DIR', str(tmp_path))
+    path = build_c_artifact('empty', 'int main() { return 0; }', [], ['-w'], '.o')
+    modification_time = os.path.getmtime(path)
+
+    assert os.path.dirname(path) == str(tmp_path)
+    assert build_c_artifact('empty', 'int main() { return 0; }', [], ['-w'], '.o') == path
+    assert os.path.getmtime(path) == modification_time
+
+
+def test_delete_c_artifacts(tmp_path, monkeypatch):
+    monkeypatch.setenv('CLAASP_C_BUILD_CACHE_DIR', str(tmp_path))
+    path = build_c_artifact('empty', 'int main() { return 0; }', [], ['-w'], '.o')
+    other_path = build_c_artifact('empty_main', 'int main() { return 0; }', [], ['-w'], '.o')
+    delete_c_artifacts('empty')
+
+    assert not os.path.exists(path)
+    assert all(name.startswith('empty_main_') for name in os.listdir(tmp_path))
+    assert os.path.exists(other_path)
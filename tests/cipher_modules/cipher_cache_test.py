@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+from claasp.cipher_modules import cipher_cache
+from claasp.cipher_modules.cipher_cache import get_cipher_key, load_cipher, load_or_build_cipher, save_cipher
+
+
+def test_get_cipher_key():
+    assert get_cipher_key(SpeckBlockCipher, {'number_of_rounds': 4}) == \
+           get_cipher_key(SpeckBlockCipher, {'number_of_rounds': 4})
+    assert get_cipher_key(SpeckBlockCipher, {'number_of_rounds': 4}) != \
+           get_cipher_key(SpeckBlockCipher, {'number_of_rounds': 5})
+
+
+def test_get_cipher_key_of_modified_claasp(monkeypatch):
+    key = get_cipher_key(SpeckBlockCipher, {'number_of_rounds': 4})
+    monkeypatch.setattr(cipher_cache, 'get_claasp_digest', lambda: '0' * 64)
+    assert get_cipher_key(SpeckBlockCipher, {'number_of_rounds': 4}) != key
+
+
+def test_save_cipher(tmp_path):
+    speck = SpeckBlockCipher(number_of_rounds=4)
+    file_name = str(tmp_path / 'speck.pickle')
+    save_cipher(speck, file_name)
+    loaded_speck = load_cipher(file_name)
+
+    assert type(loaded_speck) is SpeckBlockCipher
+    assert loaded_speck.as_python_dictionary() == speck.as_python_dictionary()
+    assert loaded_speck.evaluate([0x6574, 0x0100]) == speck.evaluate([0x6574, 0x0100])
+
+    with open(file_name, 'wb') as f:
+        f.write(b'\x80\x05N.')
+    with pytest.raises(ValueError):
+        load_cipher(file_name)
+
+
+def test_load_or_build_cipher(tmp_path, monkeypatch):
+    monkeypatch.setenv('CLAASP_CIPHER_CACHE_DIR', str(tmp_path))
+    speck = load_or_build_cipher(SpeckBlockCipher, number_of_rounds=4)
+    paths = [path for path in os.listdir(tmp_path) if path.endswith('.pickle')]
+    modification_time = os.path.getmtime(tmp_path / paths[0])
+
+    assert len(paths) == 1
+    assert speck.as_python_dictionary() == SpeckBlockCipher(number_of_rounds=4).as_python_dictionary()
+    assert load_or_build_cipher(SpeckBlockCipher, number_of_rounds=4).as_python_dictionary() == \
+           speck.as_python_dictionary()
+    assert os.path.getmtime(tmp_path / paths[0]) == modification_time
+
+
+def test_load_or_build_cipher_with_positional_arguments(tmp_path, monkeypatch):
+    monkeypatch.setenv('CLAASP_CIPHER_CACHE_DIR', str(tmp_path))
+    speck = load_or_build_cipher(SpeckBlockCipher, 32, 64, None, None, 4)
+    load_or_build_cipher(SpeckBlockCipher, number_of_rounds=4)
+    load_or_build_cipher(SpeckBlockCipher, block_bit_size=32, number_of_rounds=4)
+
+    assert len([path for path in os.listdir(tmp_path) if path.endswith('.pickle')]) == 1
+    assert speck.as_python_dictionary() == SpeckBlockCipher(number_of_rounds=4).as_python_dictionary()
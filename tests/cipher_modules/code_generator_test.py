@@ -1,5 +1,8 @@
-from claasp.cipher_modules import code_generator
+import pytest
+
+from claasp.cipher_modules import code_generator, evaluator
 from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
+from claasp.ciphers.block_ciphers.present_block_cipher import PresentBlockCipher
 
 
 def test_generate_bit_based_vectorized_python_code_string():
@@ -7,3 +10,62 @@ def test_generate_bit_based_vectorized_python_code_string():
     string_python_code = code_generator.generate_bit_based_vectorized_python_code_string(speck)
 
     assert string_python_code.split("\n")[0] == 'from claasp.cipher_modules.generic_functions_vectorized_bit import *'
+
+
+def test_generate_int_based_python_code_string():
+    speck = SpeckBlockCipher(number_of_rounds=2)
+    string_python_code = code_generator.generate_int_based_python_code_string(speck)
+
+    assert string_python_code.split("\n")[0] == 'from claasp.cipher_modules.generic_functions_int import *'
+    assert "components_io['" not in string_python_code
+
+
+def test_optimize_components():
+    speck = SpeckBlockCipher(number_of_rounds=4)
+    components, report = code_generator.optimize_components(speck, store_intermediate_outputs=False)
+
+    assert all(component.type != 'intermediate_output' for component in components)
+    assert report['components'] == len(speck.get_all_components())
+    assert report['components'] - report['eliminated_components'] == len(components)
+
+    evaluate_function = evaluator.compile_python_code_string(
+        code_generator.generate_word_based_vectorized_python_code_string(speck, 16))
+    assert evaluate_function.optimization_report == report
+    assert speck.get_optimization_report() == report
+    assert speck.get_optimization_report(intermediate_outputs=True)['eliminated_components'] < \
+           report['eliminated_components']
+    assert speck.get_optimization_report(outputs={'round_output': [1]})['eliminated_components'] > \
+           report['eliminated_components']
+
+
+def test_get_selected_outputs():
+    speck = SpeckBlockCipher(number_of_rounds=4)
+    selected_outputs = code_generator.get_selected_outputs(speck, {'round_output': [-1, 1], 'cipher_output': None})
+    assert selected_outputs == (('cipher_output', (0,)), ('round_output', (1, 2)))
+    assert code_generator.get_selected_outputs(speck, ['round_output']) == (('round_output', (0, 1, 2)),)
+
+    with pytest.raises(ValueError):
+        code_generator.get_selected_outputs(speck, {'round_output': [3]})
+    with pytest.raises(ValueError):
+        code_generator.get_selected_outputs(speck, ['unknown_output'])
+
+    components, _ = code_generator.optimize_components(speck, selected_outputs=(('round_output', (1,)),))
+    assert components[-1].id == 'intermediate_output_1_12'
+    assert all(component.type != 'cipher_output' for component in components)
+
+
+def test_select_bits_int_expression():
+    assert code_generator.select_bits_int_expression([('x', 0), ('x', 1), ('y', 6), ('y', 7)], {'x': 4, 'y': 8}) == \
+           '((x_output >> 2) << 2) | (y_output & 0x3)'
+
+
+def test_generate_word_based_vectorized_python_code_string():
+    speck = SpeckBlockCipher()
+    string_python_code = code_generator.generate_word_based_vectorized_python_code_string(speck, 16)
+
+    assert string_python_code.split("\n")[0] == 'from claasp.cipher_modules.generic_functions_vectorized_word import *'
+
+
+def test_get_word_based_vectorized_word_size():
+    assert code_generator.get_word_based_vectorized_word_size(SpeckBlockCipher()) == 16
+    assert code_generator.get_word_based_vectorized_word_size(PresentBlockCipher()) is False
@@ -0,0 +1,12 @@
+import numpy as np
+
+from claasp.cipher_modules.generic_functions_bitsliced import (bitsliced_SBOX, bitsliced_from_byte_vector,
+                                                               bitsliced_to_byte_vector)
+
+
+def test_bitsliced_SBOX():
+    sbox = (0xC, 0x5, 0x6, 0xB, 0x9, 0x0, 0xA, 0xD, 0x3, 0xE, 0xF, 0x8, 0x4, 0x7, 0x1, 0x2)
+    values = np.arange(256, dtype=np.uint8).reshape(1, 256)
+    output = bitsliced_to_byte_vector(bitsliced_SBOX(bitsliced_from_byte_vector(values, 4), sbox, 4), 256)
+
+    assert list(output[0]) == [sbox[x >> 4] << 4 for x in range(256)]
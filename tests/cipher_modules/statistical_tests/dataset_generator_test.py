@@ -1,3 +1,6 @@
+import pytest
+import numpy as np
+
 from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
 from claasp.cipher_modules.statistical_tests.dataset_generator import DatasetGenerator
 
@@ -13,6 +16,22 @@ def test_generate_avalanche_dataset():
     assert str(type(dataset[2])) == numpy_array_type
 
 
+def test_generate_avalanche_dataset_into_buffer():
+    dataset_generator = DatasetGenerator(SpeckBlockCipher(number_of_rounds=3))
+    np.random.seed(0)
+    dataset = dataset_generator.generate_avalanche_dataset(input_index=1, number_of_samples=3)
+    np.random.seed(0)
+    buffer = np.zeros((3, 3 * 64 * 32 // 8), dtype=np.uint8)
+    dataset_in_buffer = dataset_generator.generate_avalanche_dataset(input_index=1, number_of_samples=3, out=buffer)
+
+    assert all(np.array_equal(buffer[r], dataset[r]) for r in range(3))
+    assert all(np.shares_memory(buffer, round_dataset) for round_dataset in dataset_in_buffer)
+    # only the 16 least significant key bits are used in the first round of Speck
+    assert not dataset[0].reshape(3, 64, 4)[:, 16:].any()
+    with pytest.raises(ValueError):
+        dataset_generator.generate_avalanche_dataset(input_index=1, number_of_samples=3, out=buffer[:2])
+
+
 def test_generate_cbc_dataset():
     dataset_generator = DatasetGenerator(SpeckBlockCipher(number_of_rounds=3))
     dataset = dataset_generator.generate_cbc_dataset(input_index=0, number_of_samples=2,
@@ -3,9 +3,11 @@ import sys
 import pytest
 import inspect
 import os.path
+import subprocess
 import numpy as np
 from io import StringIO
 from decimal import Decimal
+from random import getrandbits
 
 import claasp
 from claasp.cipher import Cipher
@@ -27,9 +29,6 @@ from claasp.cipher_modules.neural_network_tests import get_differential_dataset
 
 EVALUATION_PY = 'evaluation.py'
 DICTIONARY_EXAMPLE_PY = "claasp/ciphers/dictionary_example.py"
-BIT_BASED_C_FUNCTIONS_O_FILE = 'claasp/cipher_modules/generic_bit_based_c_functions.o'
-FANCY_EVALUATE_O_FILE = 'claasp/cipher_modules/fancy_block_cipher_p24_k24_o24_r20_evaluate.o'
-FANCY_EVALUATE_C_FILE = 'claasp/cipher_modules/fancy_block_cipher_p24_k24_o24_r20_evaluate.c'
 
 
 def test_algebraic_tests():
@@ -141,17 +140,17 @@ def test_continuous_neutrality_measure_for_bit_j():
     assert output['plaintext']['cipher_output']['continuous_neutrality_measure']['values'][0]['2'] > 0
 
 
-def test_delete_generated_evaluate_c_shared_library():
-    file_c = open(FANCY_EVALUATE_C_FILE, 'a')
-    file_o = open(FANCY_EVALUATE_O_FILE, 'a')
-    file_generic = open(BIT_BASED_C_FUNCTIONS_O_FILE, 'a')
-    file_c.close()
-    file_o.close()
-    file_generic.close()
-    FancyBlockCipher().delete_generated_evaluate_c_shared_library()
-    assert os.path.exists(FANCY_EVALUATE_C_FILE) is False
-    assert os.path.exists(FANCY_EVALUATE_O_FILE) is False
-    assert os.path.exists(BIT_BASED_C_FUNCTIONS_O_FILE) is False
+def test_delete_generated_evaluate_c_shared_library(tmp_path, monkeypatch):
+    monkeypatch.setenv('CLAASP_C_BUILD_CACHE_DIR', str(tmp_path))
+    fancy = FancyBlockCipher(number_of_rounds=2)
+    executable_path = fancy.generate_evaluate_c_code_shared_library(False, False)
+    other_executable_path = FancyBlockCipher(number_of_rounds=3).generate_evaluate_c_code_shared_library(False, False)
+    assert os.path.exists(executable_path)
+
+    fancy.delete_generated_evaluate_c_shared_library()
+    assert os.path.exists(executable_path) is False
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(fancy.id + '_')]
+    assert os.path.exists(other_executable_path)
 
 
 def test_diffusion_tests():
@@ -187,11 +186,82 @@ def test_diffusion_tests():
            'intermediate_output_3_141'
 
 
+def test_diffusion_tests_with_confidence_level():
+    speck = SpeckBlockCipher(block_bit_size=16, key_bit_size=32, number_of_rounds=5)
+    d = speck.diffusion_tests(number_of_samples=100000, confidence_level=0.95, run_avalanche_dependence_uniform=False,
+                              run_avalanche_weight=False, run_avalanche_entropy=False)
+    assert d["input_parameters"]["confidence_level"] == 0.95
+    assert d["input_parameters"]["number_of_samples_used"] < 100000
+    assert d["test_results"]["key"]["round_output"]["avalanche_dependence_vectors"]["differences"][0][
+        "output_vectors"][0]["vector"] == [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+
+
+def test_evaluate_int_backend():
+    aes = AESBlockCipher(number_of_rounds=2)
+    assert aes.evaluate([0x3243f6a8885a308d313198a2e0370734, 0x2b7e151628aed2a6abf7158809cf4f3c], backend='int') == \
+           aes.evaluate([0x3243f6a8885a308d313198a2e0370734, 0x2b7e151628aed2a6abf7158809cf4f3c])
+
+    present = PresentBlockCipher(number_of_rounds=3)
+    assert present.evaluate([0x0123456789abcdef, 0x00112233445566778899], intermediate_output=True, backend='int') == \
+           present.evaluate([0x0123456789abcdef, 0x00112233445566778899], intermediate_output=True)
+
+    speck = SpeckBlockCipher(block_bit_size=32, key_bit_size=64)
+    assert speck.evaluate([0x6574694c, 0x1918111009080100], backend='int') == 0xa86842f2
+    assert speck.evaluate([0x6574694c, 0x1918111009080100], intermediate_output=True, backend='int')[1] == \
+           speck.evaluate([0x6574694c, 0x1918111009080100], intermediate_output=True)[1]
+
+
+def test_evaluate_int_backend_matches_bitstring():
+    ciphers = [AESBlockCipher(number_of_rounds=2), AsconPermutation(number_of_rounds=2),
+               FancyBlockCipher(number_of_rounds=2), IdentityBlockCipher(), KeccakPermutation(number_of_rounds=2),
+               MidoriBlockCipher(number_of_rounds=2), PresentBlockCipher(number_of_rounds=2),
+               SpeckBlockCipher(number_of_rounds=3), TeaBlockCipher(number_of_rounds=3),
+               XTeaBlockCipher(number_of_rounds=3), XoodooPermutation(number_of_rounds=2)]
+    for cipher in ciphers:
+        for _ in range(3):
+            cipher_input = [getrandbits(bit_size) for bit_size in cipher.inputs_bit_size]
+            assert cipher.evaluate(cipher_input, intermediate_output=True, backend='int') == \
+                   cipher.evaluate(cipher_input, intermediate_output=True)
+
+
+def test_evaluate_bitsliced():
+    present = PresentBlockCipher(number_of_rounds=3)
+    X = np.random.randint(256, size=(8, 100), dtype=np.uint8)
+    K = np.random.randint(256, size=(10, 100), dtype=np.uint8)
+    assert np.array_equal(present.evaluate_bitsliced([X, K])[-1], present.evaluate_vectorized([X, K])[-1])
+
+    ascon = AsconPermutation(number_of_rounds=2)
+    X = np.random.randint(256, size=(40, 70), dtype=np.uint8)
+    assert np.array_equal(ascon.evaluate_bitsliced([X])[-1], ascon.evaluate_vectorized([X])[-1])
+
+    speck = SpeckBlockCipher(block_bit_size=32, key_bit_size=64, number_of_rounds=5)
+    X = np.random.randint(256, size=(4, 3), dtype=np.uint8)
+    K = np.random.randint(256, size=(8, 1), dtype=np.uint8)
+    result = speck.evaluate_bitsliced([X, K], intermediate_outputs=True)
+    assert np.array_equal(result['cipher_output'][-1], speck.evaluate_vectorized([X, K])[-1])
+
+
 def test_evaluate_using_c():
     assert FancyBlockCipher(number_of_rounds=2).evaluate_using_c([0x012345, 0x89ABCD], True) == {
         'round_key_output': [3502917, 73728],
         'round_output': [9834215],
         'cipher_output': [7457252]}
+    assert FancyBlockCipher(number_of_rounds=2).evaluate_using_c([0x012345, 0x89ABCD]) == 7457252
+    assert SpeckBlockCipher().evaluate_using_c([0x6574694c, 0x1918111009080100]) == 0xa86842f2
+
+
+def test_evaluate_batch_using_c():
+    speck = SpeckBlockCipher(block_bit_size=32, key_bit_size=64, number_of_rounds=22)
+    K = np.random.randint(256, size=(8, 2), dtype=np.uint8)
+    X = np.random.randint(256, size=(4, 2), dtype=np.uint8)
+    result = speck.evaluate_batch_using_c([X, K])
+    assert np.array_equal(result[-1], speck.evaluate_vectorized([X, K])[-1])
+
+    speck = SpeckBlockCipher(block_bit_size=48, key_bit_size=72, number_of_rounds=5)
+    K = np.random.randint(256, size=(9, 3), dtype=np.uint8)
+    X = np.random.randint(256, size=(6, 3), dtype=np.uint8)
+    result = speck.evaluate_batch_using_c([X, K])
+    assert np.array_equal(result[-1], speck.evaluate_vectorized([X, K])[-1])
 
 
 def test_evaluate_vectorized():
@@ -210,6 +280,76 @@ def test_evaluate_vectorized():
     assert int.from_bytes(result[-1][1].tobytes(), byteorder='big') == C1Lib
 
 
+def test_evaluate_vectorized_with_workers():
+    present = PresentBlockCipher(number_of_rounds=3)
+    X = np.random.randint(256, size=(8, 1000), dtype=np.uint8)
+    K = np.random.randint(256, size=(10, 1), dtype=np.uint8)
+    result = present.evaluate_vectorized([X, K], intermediate_outputs=True)
+    parallel_result = present.evaluate_vectorized([X, K], intermediate_outputs=True, workers=3)
+    assert list(parallel_result) == list(result)
+    for tag in result:
+        assert all(np.array_equal(a, b) for a, b in zip(parallel_result[tag], result[tag]))
+
+
+def test_evaluate_vectorized_with_outputs():
+    speck = SpeckBlockCipher(block_bit_size=32, key_bit_size=64, number_of_rounds=8)
+    X = np.random.randint(256, size=(4, 1000), dtype=np.uint8)
+    K = np.random.randint(256, size=(8, 1000), dtype=np.uint8)
+    result = speck.evaluate_vectorized([X, K], intermediate_outputs=True)
+    selected = speck.evaluate_vectorized([X, K], outputs={'round_output': [5, 2]})
+    assert list(selected) == ['round_output']
+    assert len(selected['round_output']) == 2
+    assert np.array_equal(selected['round_output'][0], result['round_output'][2])
+    assert np.array_equal(selected['round_output'][1], result['round_output'][5])
+
+    selected = speck.evaluate_vectorized([X, K], outputs=['cipher_output'], workers=2)
+    assert np.array_equal(selected['cipher_output'][0], result['cipher_output'][0])
+
+    present = PresentBlockCipher(number_of_rounds=4)
+    X = np.random.randint(256, size=(8, 100), dtype=np.uint8)
+    K = np.random.randint(256, size=(10, 100), dtype=np.uint8)
+    result = present.evaluate_vectorized([X, K], intermediate_outputs=True)
+    selected = present.evaluate_vectorized([X, K], outputs={'round_output': [-1]})
+    assert np.array_equal(selected['round_output'][0], result['round_output'][-1])
+
+
+def test_evaluate_vectorized_iter():
+    speck = SpeckBlockCipher(block_bit_size=32, key_bit_size=64, number_of_rounds=5)
+    X = np.random.randint(256, size=(4, 1000), dtype=np.uint8)
+    K = np.random.randint(256, size=(8, 1000), dtype=np.uint8)
+    round_outputs = speck.evaluate_vectorized([X, K], intermediate_outputs=True)['round_output']
+    chunks = list(speck.evaluate_vectorized_iter([X, K], chunk_size=300, outputs=['round_output']))
+    assert [list(chunk) for chunk in chunks] == [['round_output']] * 4
+    assert np.array_equal(np.vstack([chunk['round_output'][-1] for chunk in chunks]), round_outputs[-1])
+
+    def input_chunks():
+        yield [X[:, :500], K[:, :1]]
+        yield [X[:, 500:], K[:, :1]]
+
+    outputs = np.vstack([chunk[-1] for chunk in speck.evaluate_vectorized_iter(input_chunks())])
+    assert np.array_equal(outputs, speck.evaluate_vectorized([X, np.broadcast_to(K[:, :1], K.shape)])[-1])
+
+
+def test_evaluate_vectorized_word_based():
+    xtea = XTeaBlockCipher(number_of_rounds=8)
+    X = np.random.randint(256, size=(8, 5), dtype=np.uint8)
+    K = np.random.randint(256, size=(16, 5), dtype=np.uint8)
+    result = xtea.evaluate_vectorized([X, K])
+    for i in range(5):
+        plaintext = int.from_bytes(X[:, i].tobytes(), byteorder='big')
+        key = int.from_bytes(K[:, i].tobytes(), byteorder='big')
+        assert int.from_bytes(result[-1][i].tobytes(), byteorder='big') == xtea.evaluate([plaintext, key])
+
+    speck = SpeckBlockCipher(number_of_rounds=4)
+    X = np.random.randint(256, size=(4, 5), dtype=np.uint8)
+    K = np.random.randint(256, size=(8, 5), dtype=np.uint8)
+    result = speck.evaluate_vectorized([X, K])
+    for i in range(5):
+        plaintext = int.from_bytes(X[:, i].tobytes(), byteorder='big')
+        key = int.from_bytes(K[:, i].tobytes(), byteorder='big')
+        assert int.from_bytes(result[-1][i].tobytes(), byteorder='big') == speck.evaluate([plaintext, key])
+
+
 def test_evaluate_with_intermediate_outputs_continuous_diffusion_analysis():
     plaintext_input = [Decimal('1') for _ in range(32)]
     plaintext_input[10] = Decimal('0.802999073954890452142763024312444031238555908203125')
@@ -299,6 +439,33 @@ def test_get_component_from_id():
     assert component.description == [0, 2, 4, 6, 8, 10, 12, 14, 1, 3, 5, 7, 9, 11, 13, 15]
 
 
+def test_get_component_fingerprint():
+    speck = SpeckBlockCipher(number_of_rounds=3)
+    assert speck.get_component_fingerprint('xor_1_10') == \
+           SpeckBlockCipher(number_of_rounds=4).get_component_fingerprint('xor_1_10')
+    assert speck.get_component_fingerprint('xor_1_10') != speck.get_component_fingerprint('xor_2_10')
+    with pytest.raises(ValueError):
+        speck.get_component_fingerprint('xor_5_10')
+
+
+def test_get_components_index():
+    fancy = FancyBlockCipher(number_of_rounds=2)
+    index = fancy.rounds.get_components_index()
+    assert list(index) == fancy.get_all_components_ids()
+    assert all(fancy.component_from(round_number, position) is component
+               for round_number, position, component in index.values())
+
+    fancy.add_round()
+    fancy.add_constant_component(4, 0xF)
+    assert fancy.get_round_from_component_id('constant_2_0') == 2
+    assert fancy.get_all_components()[-1].id == 'constant_2_0'
+
+    fancy.remove_round_component_from_id(2, 'constant_2_0')
+    assert fancy.get_round_from_component_id('constant_2_0') == -1
+    with pytest.raises(ValueError):
+        fancy.get_component_from_id('constant_2_0')
+
+
 def test_get_current_component_id():
     cipher = Cipher("cipher_name", "permutation", ["input"], [4], 4)
     cipher.add_round()
@@ -314,6 +481,35 @@ def test_get_round_from_component_id():
     assert fancy.get_round_from_component_id('xor_1_14') == 1
 
 
+def test_get_round_fingerprint():
+    speck = SpeckBlockCipher(number_of_rounds=3)
+    fingerprint = speck.get_structural_fingerprint()
+    round_fingerprints = [speck.get_round_fingerprint(round_number) for round_number in range(3)]
+    assert round_fingerprints[1] == SpeckBlockCipher(number_of_rounds=4).get_round_fingerprint(1)
+
+    speck.remove_round_component_from_id(2, 'xor_2_10')
+    assert speck.get_round_fingerprint(1) == round_fingerprints[1]
+    assert speck.get_round_fingerprint(2) != round_fingerprints[2]
+    assert speck.get_structural_fingerprint() != fingerprint
+
+
+def test_import_time():
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             'from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher'],
+                            capture_output=True, text=True, check=True)
+    cumulative_times = {}
+    for line in result.stderr.splitlines()[1:]:
+        fields = line.split('|')
+        if len(fields) == 3 and line.startswith('import time:'):
+            cumulative_times[fields[2].strip()] = int(fields[1])
+    imported_modules = set(cumulative_times)
+    assert not {'matplotlib', 'jinja2', 'claasp.cipher_modules.continuous_tests',
+                'claasp.cipher_modules.neural_network_tests', 'claasp.cipher_modules.avalanche_tests',
+                'claasp.cipher_modules.algebraic_tests',
+                'claasp.cipher_modules.models.algebraic.algebraic_model'} & imported_modules
+    assert cumulative_times['claasp.ciphers.block_ciphers.speck_block_cipher'] < 10 ** 7
+
+
 def test_is_algebraically_secure():
     identity = IdentityBlockCipher()
     assert identity.is_algebraically_secure(120) is False
@@ -514,3 +710,31 @@ def test_vector_check():
     input_list.append([0x11111111, 0x1111111111111111])
     output_list.append(0xFFFFFFFF)
     assert speck.test_vector_check(input_list, output_list) is False
+
+
+def test_compiled_evaluators_cache():
+    speck = SpeckBlockCipher(number_of_rounds=4)
+    plaintext = 0x6574694c
+    key = 0x1918111009080100
+    ciphertext = speck.evaluate([plaintext, key])
+    assert len(speck.compiled_evaluators) == 1
+    assert speck.evaluate([plaintext, key]) == ciphertext
+    assert len(speck.compiled_evaluators) == 1
+
+    speck.add_round()
+    assert speck.compiled_evaluators == {}
+
+
+def test_compiled_evaluators_cache_of_vectorized_evaluation():
+    speck = SpeckBlockCipher(number_of_rounds=4)
+    X = np.random.randint(256, size=(4, 10), dtype=np.uint8)
+    K = np.random.randint(256, size=(8, 10), dtype=np.uint8)
+    selected = speck.evaluate_vectorized([X, K], outputs={'round_output': [1]})
+    number_of_cached_values = len(speck.compiled_evaluators)
+    assert speck.evaluate_vectorized([X, K], outputs={'round_output': [1]}).keys() == selected.keys()
+    assert len(speck.compiled_evaluators) == number_of_cached_values
+    assert any(key[1] == 'word_based_vectorized_word_size' for key in speck.compiled_evaluators)
+    assert any(key[1] == 'selected_outputs' for key in speck.compiled_evaluators)
+
+    speck.add_round()
+    assert speck.compiled_evaluators == {}
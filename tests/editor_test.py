@@ -1,9 +1,13 @@
+from copy import deepcopy
 from random import getrandbits
 
+import pytest
+
 from claasp.cipher import Cipher
 from claasp.ciphers.block_ciphers.present_block_cipher import PresentBlockCipher
 from claasp.ciphers.block_ciphers.speck_block_cipher import SpeckBlockCipher
-from claasp.editor import remove_permutations, remove_rotations
+from claasp.editor import copy_on_write, get_writable_component, make_children_index, remove_permutations, \
+    remove_rotations, specialize, topologically_sorted_components, truncate
 
 
 def test_add_shift_rows_component():
@@ -32,6 +36,46 @@ def test_add_variable_rotate_component():
                                                              'description': ['ROTATE_BY_VARIABLE_AMOUNT', -1]}]]
 
 
+def test_copy_on_write():
+    speck = SpeckBlockCipher(number_of_rounds=3)
+    speck_dictionary = speck.as_python_dictionary()
+    speck_copy = copy_on_write(speck)
+    assert speck_copy.get_component_from_id('xor_1_10') is speck.get_component_from_id('xor_1_10')
+
+    component = get_writable_component(speck_copy, 'xor_1_10')
+    assert component is not speck.get_component_from_id('xor_1_10')
+    assert get_writable_component(speck_copy, 'xor_1_10') is component
+    component.set_input_id_links(['rot_1_9', 'rot_1_9'])
+    speck_copy.remove_round_component_from_id(2, 'xor_2_10')
+    speck_copy.inputs.pop()
+    assert speck.as_python_dictionary() == speck_dictionary
+
+    removed_key_speck = speck.remove_key_schedule()
+    speck_no_rotations = remove_rotations(speck)
+    fixed_key_speck = specialize(speck, {'key': 0x1918111009080100})
+    assert speck.as_python_dictionary() == speck_dictionary
+    assert removed_key_speck.get_component_from_id('rot_1_6') is speck.get_component_from_id('rot_1_6')
+    assert speck_no_rotations.get_component_from_id('xor_1_10') is not speck.get_component_from_id('xor_1_10')
+    assert fixed_key_speck.inputs == ['plaintext']
+
+    shared_component = speck.get_component_from_id('modadd_1_7')
+    assert shared_component.is_shared
+    with pytest.raises(RuntimeError):
+        shared_component.set_input_id_links(['rot_1_6', 'key'])
+    with pytest.raises(RuntimeError):
+        shared_component.set_input_bit_positions([list(range(16)), list(range(16))])
+    assert not get_writable_component(speck, 'modadd_1_7').is_shared
+    assert not deepcopy(shared_component).is_shared
+
+
+def test_make_children_index():
+    speck = SpeckBlockCipher(number_of_rounds=2)
+    children_index = make_children_index(speck)
+    assert list(children_index['rot_0_0']) == ['modadd_0_1']
+    assert all(component.id in children_index[link]
+               for component in speck.get_all_components() for link in component.input_id_links)
+
+
 def test_remove_key_schedule():
     speck = SpeckBlockCipher(number_of_rounds=4)
     removed_key_speck = speck.remove_key_schedule()
@@ -65,3 +109,81 @@ def test_remove_rotations():
     ciphertext = speck.evaluate([plaintext, key])
     ciphertext_no_rotations = speck_no_rotations.evaluate([plaintext, key])
     assert ciphertext == ciphertext_no_rotations
+
+
+def test_sort_cipher():
+    cipher = Cipher("cipher_name", "permutation", ["input"], [4], 4)
+    cipher.add_round()
+    cipher.add_SBOX_component(["sbox_0_1"], [[0, 1, 2, 3]], 4, list(range(16)))
+    cipher.add_SBOX_component(["input"], [[0, 1, 2, 3]], 4, list(range(16)))
+    assert not cipher.is_sorted
+    cipher.sort_cipher()
+    assert cipher.is_sorted
+    assert cipher.get_all_components_ids() == ['sbox_0_1', 'sbox_0_0']
+    assert cipher.get_component_from_id('sbox_0_0') is cipher.component_from(0, 1)
+
+    cipher.add_SBOX_component(["sbox_0_0"], [[0, 1, 2, 3]], 4, list(range(16)))
+    assert not cipher.is_sorted
+
+    speck = SpeckBlockCipher(number_of_rounds=3)
+    components = speck.get_all_components()
+    speck.sort_cipher()
+    assert speck.get_all_components() == components
+
+
+def test_topologically_sorted_components():
+    cipher = Cipher("cipher_name", "permutation", ["input"], [4], 4)
+    cipher.add_round()
+    cipher.add_SBOX_component(["sbox_0_1"], [[0, 1, 2, 3]], 4, list(range(16)))
+    cipher.add_SBOX_component(["sbox_0_0"], [[0, 1, 2, 3]], 4, list(range(16)))
+    with pytest.raises(ValueError):
+        topologically_sorted_components(cipher.get_all_components())
+
+
+def test_specialize():
+    present = PresentBlockCipher(number_of_rounds=5)
+    key = getrandbits(80)
+    fixed_key_present = specialize(present, {'key': key})
+    assert fixed_key_present.inputs == ['plaintext']
+    for _ in range(5):
+        plaintext = getrandbits(64)
+        assert fixed_key_present.evaluate([plaintext]) == present.evaluate([plaintext, key])
+
+
+def test_truncate():
+    speck = SpeckBlockCipher(number_of_rounds=6)
+    speck_dictionary = speck.as_python_dictionary()
+    for number_of_rounds in range(1, 7):
+        truncated_speck = truncate(speck, number_of_rounds)
+        assert truncated_speck.as_python_dictionary() == \
+               SpeckBlockCipher(number_of_rounds=number_of_rounds).as_python_dictionary()
+    assert speck.as_python_dictionary() == speck_dictionary
+
+    truncated_speck = speck.truncate(3)
+    assert truncated_speck.id == 'speck_p32_k64_o32_r3'
+    assert truncated_speck.get_component_from_id('xor_1_10') is speck.get_component_from_id('xor_1_10')
+    plaintext = getrandbits(32)
+    key = getrandbits(64)
+    assert truncated_speck.evaluate([plaintext, key]) == SpeckBlockCipher(number_of_rounds=3).evaluate([plaintext, key])
+    with pytest.raises(ValueError):
+        truncate(speck, 7)
+
+    cipher = Cipher("cipher_name", "permutation", ["input"], [4], 4)
+    cipher.add_round()
+    cipher.add_SBOX_component(["input"], [[0, 1, 2, 3]], 4, list(range(16)))
+    cipher.add_round()
+    cipher.add_SBOX_component(["sbox_0_0"], [[0, 1, 2, 3]], 4, list(range(16)))
+    with pytest.raises(ValueError):
+        truncate(cipher, 1)
+
+    cipher = Cipher("cipher_name", "permutation", ["input"], [4], 4)
+    cipher.add_round()
+    cipher.add_SBOX_component(["input"], [[0, 1, 2, 3]], 4, list(range(16)))
+    cipher.add_SBOX_component(["input"], [[0, 1, 2, 3]], 4, list(range(16)))
+    cipher.add_round_output_component(["sbox_0_1"], [[0, 1, 2, 3]], 4)
+    cipher.add_SBOX_component(["sbox_0_1"], [[0, 1, 2, 3]], 4, list(range(16)))
+    cipher.add_round()
+    cipher.add_cipher_output_component(["sbox_0_3"], [[0, 1, 2, 3]], 4)
+    cipher.remove_round_component_from_id(0, 'sbox_0_0')
+    truncated_cipher = truncate(cipher, 1)
+    assert truncated_cipher.get_all_components_ids() == ['sbox_0_1', 'cipher_output_0_2']
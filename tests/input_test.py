@@ -0,0 +1,83 @@
+import copy
+import pickle
+import tracemalloc
+
+import pytest
+
+from claasp.ciphers.permutations.keccak_permutation import KeccakPermutation
+from claasp.input import Input, compact_bit_positions
+
+
+def test_compact_bit_positions():
+    assert compact_bit_positions([[0, 1, 2, 3], [7, 5], []]) == (range(0, 4), (7, 5), ())
+    assert compact_bit_positions([(0, 1)]) is None
+    assert compact_bit_positions((0, 1)) is None
+
+
+def test_input_bit_positions():
+    component_input = Input(6, ['a', 'b'], [[0, 1, 2, 3], [7, 5]])
+    assert component_input.bit_positions == [[0, 1, 2, 3], [7, 5]]
+    assert repr(component_input.bit_positions) == '[[0, 1, 2, 3], [7, 5]]'
+    with pytest.raises(TypeError):
+        component_input.bit_positions[1].remove(7)
+    assert component_input.compact_bit_positions == (range(0, 4), (7, 5))
+
+    component_input.set_input_bit_positions(component_input.bit_positions[:1] + [[5]])
+    assert component_input.bit_positions == [[0, 1, 2, 3], [5]]
+    assert component_input.compact_bit_positions == (range(0, 4), range(5, 6))
+
+    copied_input = copy.deepcopy(component_input)
+    assert copied_input.bit_positions == [[0, 1, 2, 3], [5]]
+    copied_bit_positions = copy.deepcopy(component_input.bit_positions)
+    assert type(copied_bit_positions) is list and type(copied_bit_positions[0]) is list
+    assert pickle.loads(pickle.dumps(component_input)).bit_positions == [[0, 1, 2, 3], [5]]
+
+
+def test_input_id_links():
+    component_input = Input(6, ['a', 'b'], [[0, 1, 2, 3], [7, 5]])
+    with pytest.raises(TypeError):
+        component_input.id_links[0] = 'c'
+    component_input.set_input_id_links(['c', 'b'])
+    assert component_input.id_links == ['c', 'b']
+    assert type(copy.deepcopy(component_input.id_links)) is list
+
+    component_input.mark_as_shared()
+    with pytest.raises(RuntimeError):
+        component_input.set_input_id_links(['a', 'b'])
+    with pytest.raises(RuntimeError):
+        component_input.set_input_bit_positions([[0, 1, 2, 3], [5, 7]])
+    copied_input = pickle.loads(pickle.dumps(component_input))
+    assert not copied_input.is_shared
+    with pytest.raises(TypeError):
+        copied_input.id_links.append('d')
+
+
+def test_input_bit_positions_memory_of_keccak():
+    keccak = KeccakPermutation(number_of_rounds=24, word_size=64)
+    components = keccak.get_all_components()
+    tracemalloc.start()
+    for component in components:
+        for positions in component.input_bit_positions:
+            len(positions)
+    read_memory = tracemalloc.get_traced_memory()[0]
+    expanded_bit_positions = [[list(positions) for positions in component.input_bit_positions]
+                              for component in components]
+    expanded_memory = tracemalloc.get_traced_memory()[0] - read_memory
+    tracemalloc.stop()
+    assert read_memory * 100 < expanded_memory
+
+
+def test_input_deepcopy_memory():
+    bit_positions = [list(range(64 * i, 64 * (i + 1))) for i in range(25)]
+    inputs = [Input(1600, ['state'] * 25, bit_positions) for _ in range(100)]
+    tracemalloc.start()
+    copy.deepcopy(inputs)
+    compact_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    lists_of_bit_positions = [copy.deepcopy(bit_positions) for _ in range(100)]
+    tracemalloc.start()
+    copy.deepcopy(lists_of_bit_positions)
+    list_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert compact_peak < list_peak